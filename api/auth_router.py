@@ -13,17 +13,21 @@ from auth.jwt_handler import (
     create_access_token,
     create_refresh_token,
 )
-from auth.password_handler import get_password_hash, validate_password
+from auth.password_handler import get_password_hash_async, validate_password
+from auth.user_cache import invalidate_user
 from db.connect import get_database
+import logging
+
+logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
 
 @router.post("/register", response_model=UserResponse)
 async def register(user: UserCreate, database=Depends(get_database)):
-    print("register start", user.email)
+    logger.debug("register start %s", user.email)
     created = await create_user(user, database)
-    print("register ok", created.email)
+    logger.info("register ok %s", created.email)
     return created
 
 
@@ -31,15 +35,15 @@ async def register(user: UserCreate, database=Depends(get_database)):
 async def login(
     form_data: OAuth2PasswordRequestForm = Depends(), database=Depends(get_database)
 ):
-    print("login start", form_data.username)
+    logger.debug("login start %s", form_data.username)
     tokens = await login_user(form_data.username, form_data.password, database)
-    print("login ok", form_data.username)
+    logger.info("login ok %s", form_data.username)
     return tokens
 
 
 @router.post("/refresh", response_model=Token)
 async def refresh_token(refresh_token: str = Body(...), database=Depends(get_database)):
-    print("refresh start")
+    logger.debug("refresh start")
     payload = verify_refresh_token(refresh_token)
     token_data = {
         "sub": payload.get("sub"),
@@ -54,23 +58,23 @@ async def refresh_token(refresh_token: str = Body(...), database=Depends(get_dat
         "token_type": "bearer",
         "user_id": token_data.get("sub"),
     }
-    print("refresh ok", token_data.get("sub"))
+    logger.info("refresh ok %s", token_data.get("sub"))
     return out
 
 
 @router.post("/reset-password/request", status_code=200)
 async def request_password_reset(payload: ResetRequest, database=Depends(get_database)):
-    print("reset request start", payload.email)
+    logger.debug("reset request start %s", payload.email)
     user = await database["users"].find_one({"email": payload.email})
     if not user:
-        print("reset request no user", payload.email)
+        logger.warning("reset request no user %s", payload.email)
         return {
             "message": "If an account with that email exists, a reset link has been sent."
         }
     reset_token = create_access_token(
         {"sub": str(user["_id"])}, extra_claims={"reset": True}
     )
-    print("reset request ok", payload.email)
+    logger.info("reset request ok %s", payload.email)
     return {
         "message": "If an account with that email exists, a reset link has been sent.",
         "reset_token": reset_token,
@@ -79,7 +83,7 @@ async def request_password_reset(payload: ResetRequest, database=Depends(get_dat
 
 @router.post("/reset-password/confirm", status_code=200)
 async def confirm_password_reset(payload: ResetConfirm, database=Depends(get_database)):
-    print("reset confirm start")
+    logger.debug("reset confirm start")
     token_payload = verify_token(payload.token)
     if not token_payload.get("reset"):
         raise HTTPException(
@@ -98,7 +102,7 @@ async def confirm_password_reset(payload: ResetConfirm, database=Depends(get_dat
                 "Password must be at least 8 characters and contain uppercase, lowercase, number, and special character"
             ),
         )
-    hashed = get_password_hash(payload.new_password)
+    hashed = await get_password_hash_async(payload.new_password)
     result = await database["users"].update_one(
         {"_id": ObjectId(user_id)}, {"$set": {"password_hash": hashed}}
     )
@@ -106,5 +110,6 @@ async def confirm_password_reset(payload: ResetConfirm, database=Depends(get_dat
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, detail="User not found"
         )
-    print("reset confirm ok", user_id)
+    invalidate_user(user_id)
+    logger.info("reset confirm ok %s", user_id)
     return {"message": "Password has been reset successfully."}
@@ -1,10 +1,14 @@
-from fastapi import APIRouter, Depends, HTTPException
-from typing import List
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from typing import List, Optional
 from pydantic import BaseModel
 from models.prompt_model import Prompt
-from models.course_model import Course
+from models.course_model import Course, CoursePage
+from models.job_model import JobAccepted
+from models.batch_model import CourseBatch, CourseBatchRequest
 from schemas.user_schema import UserInDB
 from services.course_service import get_response, get_user_courses
+from services.job_service import enqueue_job, job_accepted
+from services.batch_service import attach_job, create_batch, get_batch
 from auth.dependencies import get_course_access_user
 from db.connect import get_database
 from bson import ObjectId
@@ -24,12 +28,65 @@ async def create_course(
     return await get_response(prompt, database)
 
 
-@router.get("/all", response_model=List[Course])
+@router.post("/jobs", response_model=JobAccepted, status_code=202)
+async def create_course_job(
+    prompt: Prompt,
+    response: Response,
+    current_user: UserInDB = Depends(get_course_access_user),
+    database=Depends(get_database),
+) -> JobAccepted:
+    """Queue course generation for a worker; poll the returned status_url."""
+    if str(prompt.user_id) != str(current_user.id):
+        raise HTTPException(status_code=403, detail="User ID mismatch")
+
+    job = await enqueue_job("course", prompt.model_dump(), current_user.id, database)
+    accepted = job_accepted(job)
+    response.headers["Location"] = accepted.status_url
+    return accepted
+
+
+@router.post("/batch", response_model=CourseBatch, status_code=202)
+async def create_course_batch(
+    request: CourseBatchRequest,
+    response: Response,
+    current_user: UserInDB = Depends(get_course_access_user),
+    database=Depends(get_database),
+) -> CourseBatch:
+    """
+    Queue one course per prompt, generated by a worker; poll
+    GET /course/batch/{batch_id} for per-item status and course ids.
+    """
+    if str(request.user_id) != str(current_user.id):
+        raise HTTPException(status_code=403, detail="User ID mismatch")
+
+    batch = await create_batch(request, database)
+    job = await enqueue_job(
+        "course_batch", {"batch_id": str(batch["_id"])}, current_user.id, database
+    )
+    batch = await attach_job(batch, job["_id"], database)
+    response.headers["Location"] = f"/course/batch/{batch['_id']}"
+    return CourseBatch(**batch)
+
+
+@router.get("/batch/{batch_id}", response_model=CourseBatch)
+async def get_course_batch(
+    batch_id: str,
+    current_user: UserInDB = Depends(get_course_access_user),
+    database=Depends(get_database),
+) -> CourseBatch:
+    return await get_batch(batch_id, current_user.id, database)
+
+
+@router.get("/all", response_model=CoursePage)
 async def list_courses(
+    limit: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = None,
     current_user: UserInDB = Depends(get_course_access_user),
     database=Depends(get_database),
-) -> List[Course]:
-    return await get_user_courses(ObjectId(current_user.id), database)
+) -> CoursePage:
+    return await get_user_courses(
+        ObjectId(current_user.id), database, limit=limit, cursor=cursor
+    )
 
 
 @router.get("/{course_id}", response_model=Course)
@@ -0,0 +1,17 @@
+from fastapi import APIRouter, Depends
+from models.job_model import JobStatus
+from schemas.user_schema import UserInDB
+from services.job_service import get_job
+from auth.dependencies import get_current_active_user
+from db.connect import get_database
+
+router = APIRouter()
+
+
+@router.get("/{job_id}", response_model=JobStatus)
+async def get_job_status(
+    job_id: str,
+    current_user: UserInDB = Depends(get_current_active_user),
+    database=Depends(get_database),
+) -> JobStatus:
+    return await get_job(job_id, current_user.id, database)
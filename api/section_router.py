@@ -1,11 +1,18 @@
-from fastapi import APIRouter, Depends, HTTPException
+import json
+import logging
+from fastapi import APIRouter, Depends, HTTPException, Response
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import StreamingResponse
 from models.section_model import Section_response, Section_request
+from models.job_model import JobAccepted
 from schemas.user_schema import UserInDB
-from services.section_service import get_section
+from services.section_service import get_section, stream_section
+from services.job_service import enqueue_job, job_accepted
 from auth.dependencies import get_section_access_user
 from db.connect import get_database
 
 router = APIRouter()
+logger = logging.getLogger(__name__)
 
 
 @router.post("/", response_model=Section_response)
@@ -15,3 +22,50 @@ async def get_section_with_slash(
     database=Depends(get_database),
 ) -> Section_response:
     return await get_section(section, database)
+
+
+def _sse(event: str, data) -> str:
+    return f"event: {event}\ndata: {json.dumps(jsonable_encoder(data))}\n\n"
+
+
+async def _sse_stream(events):
+    try:
+        async for event, data in events:
+            yield _sse(event, data)
+    except HTTPException as e:
+        yield _sse("error", {"detail": e.detail})
+    except Exception:
+        logger.exception("Section stream failed")
+        yield _sse("error", {"detail": "Failed to generate section content"})
+
+
+@router.post("/stream")
+async def stream_section_with_slash(
+    section: Section_request,
+    current_user: UserInDB = Depends(get_section_access_user),
+    database=Depends(get_database),
+) -> StreamingResponse:
+    """
+    Server-Sent Events version of POST /section/: text deltas, headings, MCQs
+    and media links as they are produced, then the persisted section.
+    """
+    events = await stream_section(section, database)
+    return StreamingResponse(
+        _sse_stream(events),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@router.post("/jobs", response_model=JobAccepted, status_code=202)
+async def create_section_job(
+    section: Section_request,
+    response: Response,
+    current_user: UserInDB = Depends(get_section_access_user),
+    database=Depends(get_database),
+) -> JobAccepted:
+    """Queue section generation for a worker; poll the returned status_url."""
+    job = await enqueue_job("section", section.model_dump(), current_user.id, database)
+    accepted = job_accepted(job)
+    response.headers["Location"] = accepted.status_url
+    return accepted
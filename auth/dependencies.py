@@ -5,7 +5,11 @@ from fastapi.security import OAuth2PasswordBearer, SecurityScopes
 from auth.jwt_handler import verify_token
 from schemas.user_schema import UserInDB
 from services.user_service import get_user_by_id
+from auth.user_cache import get_cached_user, cache_user
 from db.connect import get_database
+import logging
+
+logger = logging.getLogger(__name__)
 
 oauth2_scheme = OAuth2PasswordBearer(
     tokenUrl="auth/login",
@@ -41,13 +45,16 @@ async def get_current_user(
             raise credentials_exception
 
         token_scopes = payload.get("scopes", [])
-        print("get_current_user token_scopes", token_scopes, "type", type(token_scopes))
+        logger.debug("get_current_user token_scopes %s", token_scopes)
     except Exception:
         raise credentials_exception
 
-    user = await get_user_by_id(user_id, database)
+    user = get_cached_user(user_id)
     if user is None:
-        raise credentials_exception
+        user = await get_user_by_id(user_id, database)
+        if user is None:
+            raise credentials_exception
+        cache_user(user)
 
     if not user.is_active:
         raise HTTPException(
@@ -57,8 +64,8 @@ async def get_current_user(
         )
 
     for scope in security_scopes.scopes:
-        print("scope check", scope, "in", token_scopes, "?", scope in token_scopes)
         if scope not in token_scopes:
+            logger.warning("scope check failed: %s not in %s", scope, token_scopes)
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN,
                 detail="Not enough permissions",
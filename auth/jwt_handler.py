@@ -11,6 +11,9 @@ from config import (
     ACCESS_TOKEN_EXPIRE_MINUTES,
     REFRESH_TOKEN_EXPIRE_DAYS,
 )
+import logging
+
+logger = logging.getLogger(__name__)
 
 ISSUER = "your-app"
 AUDIENCE = "auth"
@@ -35,7 +38,7 @@ def create_access_token(data: dict, extra_claims: Optional[dict] = None) -> str:
     if extra_claims:
         payload.update(extra_claims)
     token = jwt.encode(payload, ACCESS_SECRET_KEY, algorithm=ALGORITHM)
-    print("create_access_token", payload.get("sub"), payload.get("jti"))
+    logger.debug("create_access_token %s %s", payload.get("sub"), payload.get("jti"))
     return token
 
 
@@ -53,7 +56,7 @@ def create_refresh_token(data: dict) -> str:
         "exp": now + timedelta(days=REFRESH_TOKEN_EXPIRE_DAYS),
     }
     token = jwt.encode(payload, REFRESH_SECRET_KEY, algorithm=ALGORITHM)
-    print("create_refresh_token", payload.get("sub"), payload.get("jti"))
+    logger.debug("create_refresh_token %s %s", payload.get("sub"), payload.get("jti"))
     return token
 
 
@@ -78,7 +81,7 @@ def verify_access_token(token: str) -> dict:
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Invalid token type",
         )
-    print("verify_access_token", payload.get("sub"), payload.get("jti"))
+    logger.debug("verify_access_token %s %s", payload.get("sub"), payload.get("jti"))
     return payload
 
 
@@ -110,7 +113,7 @@ def verify_refresh_token(token: str) -> dict:
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Malformed refresh token",
         )
-    print("verify_refresh_token", payload.get("sub"), jti)
+    logger.debug("verify_refresh_token %s %s", payload.get("sub"), jti)
     return payload
 
 
@@ -139,5 +142,5 @@ def verify_token(token: str) -> dict:
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Malformed access token",
         )
-    print("verify_token", payload.get("sub"), payload.get("jti"))
+    logger.debug("verify_token %s %s", payload.get("sub"), payload.get("jti"))
     return payload
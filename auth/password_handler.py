@@ -1,22 +1,46 @@
 from passlib.context import CryptContext
+from concurrent.futures import ThreadPoolExecutor
+import asyncio
 import hashlib
+from config import PASSWORD_HASH_WORKERS
+import logging
+
+logger = logging.getLogger(__name__)
 
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
+# bcrypt releases the GIL, so a small thread pool keeps hashing off the event
+# loop while the pool size caps how many CPU-bound hashes run at once.
+_hash_executor = ThreadPoolExecutor(
+    max_workers=PASSWORD_HASH_WORKERS, thread_name_prefix="bcrypt"
+)
+
 
 def get_password_hash(password: str) -> str:
     h = hashlib.sha256(password.encode("utf-8")).hexdigest()
-    print("get_password_hash")
+    logger.debug("get_password_hash")
     return pwd_context.hash(h)
 
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     h = hashlib.sha256(plain_password.encode("utf-8")).hexdigest()
     ok = pwd_context.verify(h, hashed_password)
-    print("verify_password", ok)
+    logger.debug("verify_password %s", ok)
     return ok
 
 
+async def get_password_hash_async(password: str) -> str:
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_hash_executor, get_password_hash, password)
+
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(
+        _hash_executor, verify_password, plain_password, hashed_password
+    )
+
+
 def validate_password(password: str) -> bool:
     if len(password) < 8:
         return False
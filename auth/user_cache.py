@@ -0,0 +1,38 @@
+"""
+Process-local cache of resolved users for get_current_user.
+
+Entries are keyed by user id and expire after USER_CACHE_TTL_SECONDS, which
+bounds how stale a cached user can get on another worker. Anything that changes
+a user's credentials, active flag or roles must call invalidate_user().
+"""
+
+from typing import Optional
+from schemas.user_schema import UserInDB
+from utils.ttl_cache import TTLCache
+from config import USER_CACHE_TTL_SECONDS, USER_CACHE_MAX_ENTRIES
+
+_users = TTLCache(USER_CACHE_MAX_ENTRIES, USER_CACHE_TTL_SECONDS)
+_invalidations = 0
+
+
+def get_cached_user(user_id: str) -> Optional[UserInDB]:
+    return _users.get(str(user_id))
+
+
+def cache_user(user: UserInDB) -> None:
+    _users.set(str(user.id), user)
+
+
+def invalidate_user(user_id: str) -> None:
+    """Evict a user after a password reset, deactivation or role change."""
+    global _invalidations
+    _users.pop(str(user_id))
+    _invalidations += 1
+
+
+def clear_user_cache() -> None:
+    _users.clear()
+
+
+def get_user_cache_stats() -> dict:
+    return {**_users.stats(), "invalidations": _invalidations}
@@ -0,0 +1,187 @@
+"""
+Micro-benchmarks for model-output parsing and placeholder substitution.
+
+Covers utils/json_stream.py (one-shot and fed in 64-char chunks), the parse
+paths of utils/course_inference.py and utils/section_inference.py, and
+substitute_media_placeholders, on small, typical and pathological inputs
+(~100 KB outputs, deeply nested braces, fenced output with trailing commas).
+
+    python -m benchmarks.json_repair                    # run and print
+    python -m benchmarks.json_repair --save-baseline    # store results
+    python -m benchmarks.json_repair --compare          # fail on regressions
+
+Each case is recorded relative to a fixed pure-Python reference workload
+timed in the same process, so the stored baseline is a cost ratio rather
+than a machine-specific duration and --compare works on any box. The two
+are sampled alternately and the best of each kept; the default 40%
+tolerance still covers the spread between identical runs on a busy box.
+"""
+
+import argparse
+import json
+import logging
+import sys
+import timeit
+from pathlib import Path
+from benchmarks.loadtest.stubs import course_outline, section_content
+from utils import course_inference, section_inference
+from utils.json_stream import JSONStreamParser, parse_json_object
+
+BASELINE_PATH = Path(__file__).parent / "baselines" / "json_repair.json"
+_SAMPLE_SECONDS = 0.02
+
+
+def _inputs() -> dict[str, str]:
+    typical_course = json.dumps(course_outline("Docker"))
+    typical_section = json.dumps(section_content("Container Networking"))
+    big = section_content("Scaling")
+    big["text"] = big["text"] * 40  # ~100 KB
+    big_json = json.dumps(big)
+    nested = '{"a": ' * 400 + "1" + "}" * 400
+    fenced = (
+        "Here is your course:\n```json\n"
+        + json.dumps(course_outline("Kubernetes basics"), indent=2)
+        .replace("]\n", "],\n")
+        .replace('"\n  }', '",\n  }')
+        + "\n```\nLet me know if you need anything else."
+    )
+    single_quoted = str(course_outline("Intro to React"))
+    return {
+        "small": '{"title": "x", "sections": ["a", "b"]}',
+        "typical_course": typical_course,
+        "typical_section": typical_section,
+        "prose_wrapped": "Sure! " + typical_course + " Hope this helps.",
+        "fenced_trailing_commas": fenced,
+        "single_quoted": single_quoted,
+        "nested_400": nested,
+        "large_100kb": big_json,
+        "large_100kb_prose": "Output follows.\n" + big_json + "\nDone.",
+    }
+
+
+def _reference(text: str = json.dumps(section_content("Reference"))) -> int:
+    """Fixed interpreter-bound workload every case is measured against."""
+    depth = quotes = 0
+    for char in text:
+        if char == "{":
+            depth += 1
+        elif char == "}":
+            depth -= 1
+        elif char == '"':
+            quotes += 1
+    return depth + quotes
+
+
+def _feed_chunks(text: str, size: int) -> dict | None:
+    parser = JSONStreamParser()
+    for i in range(0, len(text), size):
+        parser.feed(text[i : i + size])
+    return parser.close()
+
+
+def _cases() -> dict[str, callable]:
+    inputs = _inputs()
+    cases = {}
+    for name, text in inputs.items():
+        cases[f"json_stream.parse[{name}]"] = lambda t=text: parse_json_object(t)[0]
+        cases[f"json_stream.feed_64[{name}]"] = lambda t=text: _feed_chunks(t, 64)
+    for name, text in inputs.items():
+        cases[f"course.parse[{name}]"] = (
+            lambda t=text: course_inference._parse_course_outline(t)
+        )
+        cases[f"section.parse[{name}]"] = (
+            lambda t=text: section_inference._parse_section_content(t)
+        )
+
+    outline = course_outline("Docker")
+    images = {"1": "https://images.example.test/a.jpg", "2": "https://images.example.test/b.jpg"}
+    videos = {"1": "https://www.youtube.com/watch?v=abcdefghijk"}
+    descriptions = {
+        "typical": outline["description"],
+        "large": outline["description"] * 50,
+        "no_placeholders": outline["description"].replace("__image1__", "").replace("__ytvid1__", ""),
+    }
+    for name, description in descriptions.items():
+        cases[f"course.substitute_placeholders[{name}]"] = (
+            lambda d=description: course_inference.substitute_media_placeholders(d, images, videos)
+        )
+    return cases
+
+
+def _calls_per_sample(func) -> int:
+    number, elapsed = timeit.Timer(func).autorange()
+    # short samples, so many of them fit in a run and min() can drop the noisy ones
+    return max(1, int(number * _SAMPLE_SECONDS / elapsed))
+
+
+def _relative_cost(func, rounds: int) -> tuple[float, float]:
+    """
+    (best seconds per call, that divided by the reference's), sampling the
+    case and the reference alternately so both see the same machine state.
+    """
+    case_timer, reference_timer = timeit.Timer(func), timeit.Timer(_reference)
+    case_number = _calls_per_sample(func)
+    reference_number = _calls_per_sample(_reference)
+    best = reference = float("inf")
+    for _ in range(rounds):
+        reference = min(reference, reference_timer.timeit(reference_number) / reference_number)
+        best = min(best, case_timer.timeit(case_number) / case_number)
+    return best, best / reference
+
+
+def run(rounds: int) -> dict[str, float]:
+    """Return every case's cost relative to the reference workload."""
+    results = {}
+    for name, func in _cases().items():
+        best, results[name] = _relative_cost(func, rounds)
+        print(f"{name:60} {best * 1e6:>12.2f} us {results[name]:>10.3f}x ref")
+    return results
+
+
+def compare(results: dict[str, float], tolerance: float) -> int:
+    if not BASELINE_PATH.exists():
+        print(f"No baseline at {BASELINE_PATH}; run with --save-baseline first")
+        return 1
+    baseline = json.loads(BASELINE_PATH.read_text())
+    regressions = []
+    print()
+    for name, value in results.items():
+        if name not in baseline:
+            continue
+        ratio = value / baseline[name]
+        marker = ""
+        if ratio > 1 + tolerance:
+            marker = "  REGRESSION"
+            regressions.append(name)
+        elif ratio < 1 - tolerance:
+            marker = "  faster"
+        print(f"{name:60} {ratio:>7.2f}x{marker}")
+    if regressions:
+        print(f"\n❌ {len(regressions)} regression(s) beyond {tolerance:.0%}")
+        return 1
+    print("\n✅ No regressions")
+    return 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--save-baseline", action="store_true")
+    parser.add_argument("--compare", action="store_true")
+    parser.add_argument("--tolerance", type=float, default=0.4)
+    parser.add_argument("--rounds", type=int, default=15)
+    args = parser.parse_args()
+    # Parse failures are part of the workload; keep their warnings out of the timings.
+    logging.disable(logging.CRITICAL)
+
+    results = run(args.rounds)
+    if args.save_baseline:
+        BASELINE_PATH.parent.mkdir(parents=True, exist_ok=True)
+        BASELINE_PATH.write_text(json.dumps(results, indent=2, sort_keys=True))
+        print(f"\nBaseline saved to {BASELINE_PATH}")
+    if args.compare:
+        return compare(results, args.tolerance)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
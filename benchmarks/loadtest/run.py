@@ -0,0 +1,229 @@
+"""
+Offline end-to-end load test.
+
+Starts the upstream stubs and the API (uvicorn) as subprocesses, points the
+API at the stubs through the same env vars config.py reads, then drives
+register -> login -> create course -> open sections -> list courses traffic
+at a fixed concurrency and reports throughput and p50/p95/p99 per endpoint.
+
+Needs a MongoDB at --mongo-url (a throwaway local mongod is fine); the run
+uses its own database, dropped at the end unless --keep-db is given.
+
+Usage:
+    python -m benchmarks.loadtest.run --users 50 --concurrency 10 --sections 2
+    python -m benchmarks.loadtest.run --app-url http://127.0.0.1:8000  # existing app
+"""
+
+import argparse
+import asyncio
+import os
+import subprocess
+import sys
+import time
+import uuid
+from collections import defaultdict
+import httpx
+from benchmarks.login_storm import percentile
+from benchmarks.loadtest.stubs import add_profile_args
+
+
+class Recorder:
+    def __init__(self):
+        self.samples: dict[str, list[float]] = defaultdict(list)
+        self.errors: dict[str, int] = defaultdict(int)
+        self.wall_seconds = 0.0
+
+    async def call(self, name: str, request):
+        started = time.perf_counter()
+        try:
+            response = await request
+        except Exception:
+            self.errors[name] += 1
+            return None
+        self.samples[name].append(time.perf_counter() - started)
+        if response.status_code >= 400:
+            self.errors[name] += 1
+            return None
+        return response.json()
+
+    def report(self, wall_seconds: float) -> str:
+        lines = [
+            f"{'endpoint':22} {'count':>6} {'errors':>6} {'rps':>8} "
+            f"{'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}"
+        ]
+        for name in sorted(set(self.samples) | set(self.errors)):
+            values = self.samples.get(name, [])
+            lines.append(
+                f"{name:22} {len(values):>6} {self.errors.get(name, 0):>6} "
+                f"{len(values) / wall_seconds:>8.2f} "
+                f"{percentile(values, 50) * 1000:>9.1f} "
+                f"{percentile(values, 95) * 1000:>9.1f} "
+                f"{percentile(values, 99) * 1000:>9.1f}"
+            )
+        return "\n".join(lines)
+
+
+async def user_flow(client: httpx.AsyncClient, rec: Recorder, args, index: int):
+    tag = f"{uuid.uuid4().hex[:10]}{index}"
+    password = "Loadtest#Pass1"
+    user = await rec.call(
+        "POST /auth/register",
+        client.post(
+            "/auth/register",
+            json={"username": f"lt_{tag}", "email": f"lt_{tag}@example.com", "password": password},
+        ),
+    )
+    if not user:
+        return
+    tokens = await rec.call(
+        "POST /auth/login",
+        client.post(
+            "/auth/login",
+            data={"username": f"lt_{tag}@example.com", "password": password},
+        ),
+    )
+    if not tokens:
+        return
+    headers = {"Authorization": f"Bearer {tokens['access_token']}"}
+
+    topic = args.topics[index % len(args.topics)]
+    course = await rec.call(
+        "POST /course/",
+        client.post(
+            "/course/",
+            json={
+                "user_id": tokens["user_id"],
+                "prompt_text": topic,
+                "bypass_cache": args.bypass_cache,
+            },
+            headers=headers,
+        ),
+    )
+    if course:
+        for section_id in course.get("sections", [])[: args.sections]:
+            await rec.call(
+                "POST /section/",
+                client.post(
+                    "/section/",
+                    json={"section_id": section_id, "course_id": course["_id"]},
+                    headers=headers,
+                ),
+            )
+    await rec.call("GET /course/all", client.get("/course/all", headers=headers))
+
+
+async def drive(args) -> Recorder:
+    rec = Recorder()
+    semaphore = asyncio.Semaphore(args.concurrency)
+    limits = httpx.Limits(max_connections=args.concurrency * 2)
+    async with httpx.AsyncClient(
+        base_url=args.app_url, timeout=args.timeout, limits=limits
+    ) as client:
+
+        async def bounded(i):
+            async with semaphore:
+                await user_flow(client, rec, args, i)
+
+        started = time.perf_counter()
+        await asyncio.gather(*[bounded(i) for i in range(args.users)])
+        rec.wall_seconds = time.perf_counter() - started
+    return rec
+
+
+def wait_until_up(url: str, timeout: float = 30.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            httpx.get(url, timeout=1.0)
+            return
+        except Exception:
+            time.sleep(0.2)
+    raise RuntimeError(f"{url} did not come up within {timeout}s")
+
+
+def start_processes(args) -> list[subprocess.Popen]:
+    stub_url = f"http://127.0.0.1:{args.stub_port}"
+    stub_cmd = [
+        sys.executable, "-m", "benchmarks.loadtest.stubs",
+        "--port", str(args.stub_port),
+        "--llm-latency", str(args.llm_latency),
+        "--llm-jitter", str(args.llm_jitter),
+        "--llm-failure-rate", str(args.llm_failure_rate),
+        "--llm-invalid-rate", str(args.llm_invalid_rate),
+        "--media-latency", str(args.media_latency),
+        "--media-jitter", str(args.media_jitter),
+        "--media-failure-rate", str(args.media_failure_rate),
+    ]
+    env = {
+        **os.environ,
+        "GROQ_API_KEY": "stub-key",
+        "GROQ_BASE_URL": stub_url,
+        "PEXELS_API_KEY": "stub-key",
+        "PEXELS_API_URL": f"{stub_url}/v1/search",
+        "YOUTUBE_API_KEY": "stub-key",
+        "YOUTUBE_API_URL": f"{stub_url}/youtube/v3/search",
+        "MONGO_URL": args.mongo_url,
+        "DB_NAME": args.db_name,
+        "ACCESS_SECRET_KEY": os.environ.get("ACCESS_SECRET_KEY", "loadtest-access"),
+        "REFRESH_SECRET_KEY": os.environ.get("REFRESH_SECRET_KEY", "loadtest-refresh"),
+        "LOG_LEVEL": os.environ.get("LOG_LEVEL", "WARNING"),
+    }
+    app_cmd = [
+        sys.executable, "-m", "uvicorn", "main:app",
+        "--port", str(args.app_port),
+        "--workers", str(args.workers),
+        "--log-level", "warning",
+    ]
+    procs = [subprocess.Popen(stub_cmd), subprocess.Popen(app_cmd, env=env)]
+    wait_until_up(f"{stub_url}/docs")
+    wait_until_up(f"{args.app_url}/")
+    return procs
+
+
+async def drop_database(args):
+    from motor.motor_asyncio import AsyncIOMotorClient
+
+    client = AsyncIOMotorClient(args.mongo_url, serverSelectionTimeoutMS=5000)
+    await client.drop_database(args.db_name)
+    client.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--users", type=int, default=20)
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--sections", type=int, default=2, help="sections opened per course")
+    parser.add_argument("--topics", nargs="+", default=["Docker", "Kubernetes basics", "Intro to React"])
+    parser.add_argument("--bypass-cache", action="store_true", help="force fresh LLM calls")
+    parser.add_argument("--timeout", type=float, default=120.0)
+    parser.add_argument("--app-url", default=None, help="target an already running app")
+    parser.add_argument("--app-port", type=int, default=8765)
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--stub-port", type=int, default=9100)
+    parser.add_argument("--mongo-url", default="mongodb://localhost:27017")
+    parser.add_argument("--db-name", default=f"coursegen_loadtest_{uuid.uuid4().hex[:6]}")
+    parser.add_argument("--keep-db", action="store_true")
+    add_profile_args(parser)
+    args = parser.parse_args()
+
+    procs = []
+    if args.app_url is None:
+        args.app_url = f"http://127.0.0.1:{args.app_port}"
+        procs = start_processes(args)
+    try:
+        rec = asyncio.run(drive(args))
+        print(
+            f"\n{args.users} users, concurrency {args.concurrency}, "
+            f"wall {rec.wall_seconds:.1f}s\n"
+        )
+        print(rec.report(rec.wall_seconds))
+    finally:
+        for proc in procs:
+            proc.terminate()
+            proc.wait()
+        if procs and not args.keep_db:
+            asyncio.run(drop_database(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,301 @@
+"""
+Local stand-ins for the Groq chat-completions, Pexels search and YouTube
+search APIs, with configurable latency and failure profiles. Chat requests
+with "stream": true get an SSE stream spread across the same latency.
+
+Point the app at them with:
+    GROQ_BASE_URL=http://127.0.0.1:<port>
+    PEXELS_API_URL=http://127.0.0.1:<port>/v1/search
+    YOUTUBE_API_URL=http://127.0.0.1:<port>/youtube/v3/search
+
+Usage:
+    python -m benchmarks.loadtest.stubs --port 9100 --llm-latency 2 --media-latency 0.2
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import re
+import time
+import uuid
+import uvicorn
+from dataclasses import dataclass
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+# Streamed completions: share of the latency spent before the first token,
+# and characters per chunk after that.
+STREAM_FIRST_TOKEN_SHARE = 0.1
+STREAM_CHUNK_CHARS = 24
+
+
+@dataclass
+class Profile:
+    """
+    Latency is mean seconds +/- jitter; failure_rate is the chance of an error,
+    invalid_rate (completions only) the chance of a field of the wrong type.
+    """
+
+    latency: float = 0.0
+    jitter: float = 0.0
+    failure_rate: float = 0.0
+    rate_limit_share: float = 0.5  # share of failures returned as 429 vs 500
+    invalid_rate: float = 0.0
+
+    def delay(self) -> float:
+        return max(0.0, self.latency + random.uniform(-self.jitter, self.jitter))
+
+    async def apply(self, delay: float | None = None) -> JSONResponse | None:
+        delay = self.delay() if delay is None else delay
+        if delay:
+            await asyncio.sleep(delay)
+        if self.failure_rate and random.random() < self.failure_rate:
+            if random.random() < self.rate_limit_share:
+                return JSONResponse(
+                    {"error": {"message": "rate limited (stub)"}},
+                    status_code=429,
+                    headers={"Retry-After": "1"},
+                )
+            return JSONResponse({"error": {"message": "stub failure"}}, status_code=500)
+        return None
+
+
+def course_outline(topic: str) -> dict:
+    return {
+        "title": f"Mastering {topic}",
+        "image_queries": {
+            "1": f"{topic} architecture diagram",
+            "2": f"{topic} workflow infographic",
+        },
+        "ytvid_queries": {"1": f"{topic} introduction tutorial"},
+        "description": (
+            f"This course introduces {topic} from first principles __image1__ and "
+            f"builds toward production use __ytvid1__. " * 20
+        ).strip(),
+        "sections": [
+            f"Foundations of {topic}",
+            f"Core Concepts of {topic}",
+            f"Working with {topic} in Practice",
+            f"Advanced {topic} Patterns",
+            f"{topic} Best Practices",
+        ],
+    }
+
+
+def section_content(section_title: str) -> dict:
+    body = (
+        f"__h1_1__ {section_title} starts with the basics. __image1__ "
+        "Each idea is explained with examples. __h2_1__ __ytvid1__ __mcq1__ "
+    )
+    return {
+        "image_queries": {"1": f"{section_title} diagram", "2": f"{section_title} chart"},
+        "ytvid_queries": {"1": f"{section_title} explained", "2": f"{section_title} demo"},
+        "text": body * 25,
+        "headings": {
+            "h1": {"1": section_title, "2": "Going Further"},
+            "h2": {"1": "Key Ideas", "2": "Examples"},
+        },
+    }
+
+
+def mcq_content(section_title: str) -> dict:
+    return {
+        "mcqs": [
+            {
+                "question": f"Question {i} about {section_title}?",
+                "options": ["A", "B", "C", "D"],
+                "answer": "A",
+            }
+            for i in range(1, 4)
+        ]
+    }
+
+
+def repair_content(prompt: str) -> dict:
+    """Valid values for the keys a schema repair prompt asks for."""
+    keys = re.search(r"ONLY the keys (.*?), fixed", prompt)
+    valid = {
+        **course_outline("Testing"),
+        **section_content("Testing"),
+        **mcq_content("Testing"),
+    }
+    if not keys:
+        return {}
+    return {key: valid[key] for key in keys.group(1).split(", ") if key in valid}
+
+
+def broken(document: dict) -> dict:
+    """`document` with one field the way models get them wrong."""
+    field = random.choice(list(document))
+    value = document[field]
+    if isinstance(value, list):
+        document[field] = ", ".join(map(str, value))
+    elif isinstance(value, dict):
+        document[field] = list(value.values())
+    else:
+        del document[field]
+    return document
+
+
+def completion_for(prompt: str, invalid_rate: float = 0.0) -> str:
+    if "ONLY the keys" in prompt:
+        return json.dumps(repair_content(prompt))
+    section = re.search(r'Section Title: "([^"]*)"', prompt)
+    if section and "multiple-choice questions" in prompt:
+        document = mcq_content(section.group(1))
+    elif section:
+        document = section_content(section.group(1))
+    else:
+        topic = re.search(r'course topic:\s*"([^"]*)"', prompt)
+        document = course_outline(topic.group(1) if topic else "Testing")
+    if invalid_rate and random.random() < invalid_rate:
+        document = broken(document)
+    return json.dumps(document)
+
+
+async def stream_completion(content: str, model: str, total_delay: float):
+    """Yield an OpenAI-style SSE stream spread evenly over total_delay."""
+    completion_id = f"chatcmpl-{uuid.uuid4().hex}"
+    created = int(time.time())
+    pieces = [
+        content[i : i + STREAM_CHUNK_CHARS]
+        for i in range(0, len(content), STREAM_CHUNK_CHARS)
+    ]
+    gap = total_delay * (1 - STREAM_FIRST_TOKEN_SHARE) / max(len(pieces), 1)
+
+    def frame(delta: dict, finish_reason: str | None = None) -> str:
+        chunk = {
+            "id": completion_id,
+            "object": "chat.completion.chunk",
+            "created": created,
+            "model": model,
+            "choices": [
+                {
+                    "index": 0,
+                    "delta": delta,
+                    "logprobs": None,
+                    "finish_reason": finish_reason,
+                }
+            ],
+        }
+        return f"data: {json.dumps(chunk)}\n\n"
+
+    yield frame({"role": "assistant", "content": ""})
+    for piece in pieces:
+        if gap:
+            await asyncio.sleep(gap)
+        yield frame({"content": piece})
+    yield frame({}, "stop")
+    yield "data: [DONE]\n\n"
+
+
+def create_app(llm: Profile, pexels: Profile, youtube: Profile) -> FastAPI:
+    app = FastAPI(title="CourseGen upstream stubs")
+
+    @app.post("/openai/v1/chat/completions")
+    async def chat_completions(request: Request):
+        payload = await request.json()
+        delay = llm.delay()
+        if payload.get("stream"):
+            failure = await llm.apply(delay * STREAM_FIRST_TOKEN_SHARE)
+            if failure:
+                return failure
+            content = completion_for(
+                payload["messages"][-1]["content"], llm.invalid_rate
+            )
+            return StreamingResponse(
+                stream_completion(content, payload.get("model", "stub"), delay),
+                media_type="text/event-stream",
+            )
+
+        failure = await llm.apply(delay)
+        if failure:
+            return failure
+        prompt = payload["messages"][-1]["content"]
+        content = completion_for(prompt, llm.invalid_rate)
+        return {
+            "id": f"chatcmpl-{uuid.uuid4().hex}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": payload.get("model", "stub"),
+            "choices": [
+                {
+                    "index": 0,
+                    "message": {"role": "assistant", "content": content},
+                    "logprobs": None,
+                    "finish_reason": "stop",
+                }
+            ],
+            "usage": {
+                "prompt_tokens": len(prompt) // 4,
+                "completion_tokens": len(content) // 4,
+                "total_tokens": (len(prompt) + len(content)) // 4,
+            },
+        }
+
+    @app.get("/v1/search")
+    async def pexels_search(query: str, per_page: int = 1):
+        failure = await pexels.apply()
+        if failure:
+            return failure
+        slug = re.sub(r"\W+", "-", query.lower()).strip("-")
+        return {
+            "photos": [
+                {"src": {"large": f"https://images.example.test/{slug}/{i}.jpg"}}
+                for i in range(per_page)
+            ]
+        }
+
+    @app.get("/youtube/v3/search")
+    async def youtube_search(q: str, maxResults: int = 1):
+        failure = await youtube.apply()
+        if failure:
+            return failure
+        return {
+            "items": [
+                {"id": {"videoId": uuid.uuid5(uuid.NAMESPACE_URL, f"{q}/{i}").hex[:11]}}
+                for i in range(maxResults)
+            ]
+        }
+
+    return app
+
+
+def add_profile_args(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument("--llm-latency", type=float, default=2.0)
+    parser.add_argument("--llm-jitter", type=float, default=0.5)
+    parser.add_argument("--llm-failure-rate", type=float, default=0.0)
+    parser.add_argument("--llm-invalid-rate", type=float, default=0.0)
+    parser.add_argument("--media-latency", type=float, default=0.2)
+    parser.add_argument("--media-jitter", type=float, default=0.05)
+    parser.add_argument("--media-failure-rate", type=float, default=0.0)
+
+
+def profiles_from_args(args) -> tuple[Profile, Profile, Profile]:
+    llm = Profile(
+        args.llm_latency,
+        args.llm_jitter,
+        args.llm_failure_rate,
+        invalid_rate=args.llm_invalid_rate,
+    )
+    media = Profile(args.media_latency, args.media_jitter, args.media_failure_rate)
+    return llm, media, Profile(**vars(media))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=9100)
+    add_profile_args(parser)
+    args = parser.parse_args()
+    uvicorn.run(
+        create_app(*profiles_from_args(args)),
+        host=args.host,
+        port=args.port,
+        log_level="warning",
+    )
+
+
+if __name__ == "__main__":
+    main()
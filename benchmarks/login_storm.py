@@ -0,0 +1,92 @@
+"""
+Login-storm benchmark for password hashing.
+
+Fires a burst of concurrent bcrypt verifications (what N simultaneous logins
+do) while a probe coroutine plays the part of an unrelated endpoint, measuring
+how long it waits for the event loop. Runs once with inline (blocking)
+verification and once with the executor-backed verify_password_async.
+
+Usage:
+    python -m benchmarks.login_storm [--logins 50] [--probe-interval 0.01]
+"""
+
+import argparse
+import asyncio
+import statistics
+import time
+from auth.password_handler import (
+    get_password_hash,
+    verify_password,
+    verify_password_async,
+)
+
+PASSWORD = "Benchmark#Pass1"
+
+
+def percentile(values: list[float], pct: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+async def _probe(stop: asyncio.Event, interval: float, samples: list[float]):
+    """Stand-in for an unrelated endpoint: sleep, then record the overshoot."""
+    while not stop.is_set():
+        started = time.perf_counter()
+        await asyncio.sleep(interval)
+        samples.append((time.perf_counter() - started - interval) * 1000)
+
+
+async def _inline_login(hashed: str):
+    # what login_user did before: bcrypt directly on the event loop
+    verify_password(PASSWORD, hashed)
+
+
+async def _offloaded_login(hashed: str):
+    await verify_password_async(PASSWORD, hashed)
+
+
+async def run_storm(login, hashed: str, logins: int, interval: float) -> dict:
+    samples: list[float] = []
+    stop = asyncio.Event()
+    probe = asyncio.create_task(_probe(stop, interval, samples))
+    await asyncio.sleep(interval * 5)
+
+    started = time.perf_counter()
+    await asyncio.gather(*[login(hashed) for _ in range(logins)])
+    elapsed = time.perf_counter() - started
+
+    stop.set()
+    await probe
+    return {
+        "storm_seconds": elapsed,
+        "probe_p50_ms": percentile(samples, 50),
+        "probe_p99_ms": percentile(samples, 99),
+        "probe_max_ms": max(samples) if samples else 0.0,
+        "probe_mean_ms": statistics.fmean(samples) if samples else 0.0,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--logins", type=int, default=50)
+    parser.add_argument("--probe-interval", type=float, default=0.01)
+    args = parser.parse_args()
+
+    hashed = get_password_hash(PASSWORD)
+    for name, login in (("inline", _inline_login), ("executor", _offloaded_login)):
+        result = asyncio.run(
+            run_storm(login, hashed, args.logins, args.probe_interval)
+        )
+        print(
+            f"{name:9} storm={result['storm_seconds']:.2f}s "
+            f"probe p50={result['probe_p50_ms']:.1f}ms "
+            f"p99={result['probe_p99_ms']:.1f}ms "
+            f"max={result['probe_max_ms']:.1f}ms"
+        )
+
+
+if __name__ == "__main__":
+    main()
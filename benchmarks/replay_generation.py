@@ -0,0 +1,126 @@
+"""
+Deterministic timing of the generation pipeline from recorded fixtures.
+
+Record once against real upstreams (or the load-test stubs):
+    HTTP_FIXTURE_MODE=record GROQ_API_KEY=... PEXELS_API_KEY=... YOUTUBE_API_KEY=... \
+        python -m benchmarks.replay_generation --topic Docker
+
+Then replay with no network, optionally adding per-response latency:
+    python -m benchmarks.replay_generation --topic Docker --latency 0.5 --runs 20
+
+Without --mongo-url this times the inference + media path (LLM/media caches
+disabled). With --mongo-url it times get_response and get_section end to end
+against a scratch database that is dropped afterwards.
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import time
+import uuid
+
+
+def _configure_env(args):
+    # must happen before any app module imports config
+    os.environ.setdefault("HTTP_FIXTURE_MODE", "replay")
+    os.environ["HTTP_FIXTURE_LATENCY"] = str(args.latency)
+    os.environ.setdefault("LLM_CACHE_ENABLED", "false")
+    os.environ.setdefault("MEDIA_CACHE_ENABLED", "false")
+    os.environ.setdefault("GROQ_API_KEY", "replay")
+    os.environ.setdefault("PEXELS_API_KEY", "replay")
+    os.environ.setdefault("YOUTUBE_API_KEY", "replay")
+    os.environ.setdefault("ACCESS_SECRET_KEY", "replay-access")
+    os.environ.setdefault("REFRESH_SECRET_KEY", "replay-refresh")
+    if args.mongo_url:
+        os.environ["MONGO_URL"] = args.mongo_url
+        os.environ["DB_NAME"] = f"coursegen_replay_{uuid.uuid4().hex[:6]}"
+
+
+async def _time(label: str, runs: int, make_call) -> None:
+    timings = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        result = await make_call()
+        timings.append(time.perf_counter() - started)
+        if isinstance(result, dict) and "error" in result:
+            print(f"{label}: error {result['error']} ({result.get('detail', '')})")
+            return
+    print(
+        f"{label:28} runs={runs} mean={statistics.fmean(timings) * 1000:.1f}ms "
+        f"min={min(timings) * 1000:.1f}ms max={max(timings) * 1000:.1f}ms"
+    )
+
+
+async def run_inference(args):
+    from utils.course_inference import infer_course_structure
+    from utils.section_inference import infer_section_content
+    from utils.media_fetcher import fetch_media_from_queries
+
+    course = await infer_course_structure(args.topic, use_cache=False)
+    if "error" in course:
+        sys.exit(f"course generation failed: {course}")
+    section_title = course["sections"][0]
+
+    async def section_with_media():
+        data = await infer_section_content(section_title, course["title"], use_cache=False)
+        if "error" not in data:
+            await fetch_media_from_queries(
+                data.get("image_queries", {}), data.get("ytvid_queries", {})
+            )
+        return data
+
+    await _time("infer_course_structure", args.runs, lambda: infer_course_structure(args.topic, use_cache=False))
+    await _time("section + media", args.runs, section_with_media)
+
+
+async def run_services(args):
+    from bson import ObjectId
+    from db.connect import client, db
+    from models.prompt_model import Prompt
+    from models.section_model import Section_request
+    from services.course_service import get_response
+    from services.section_service import get_section
+
+    user_id = str(ObjectId())
+    try:
+        course = await get_response(Prompt(user_id=user_id, prompt_text=args.topic), db)
+
+        async def fresh_course():
+            return await get_response(Prompt(user_id=user_id, prompt_text=args.topic), db)
+
+        async def fresh_section():
+            c = await get_response(Prompt(user_id=user_id, prompt_text=args.topic), db)
+            started = time.perf_counter()
+            await get_section(Section_request(section_id=c.sections[0], course_id=c.id), db)
+            return time.perf_counter() - started
+
+        await _time("get_response", args.runs, fresh_course)
+        section_times = [await fresh_section() for _ in range(args.runs)]
+        print(
+            f"{'get_section':28} runs={args.runs} "
+            f"mean={statistics.fmean(section_times) * 1000:.1f}ms"
+        )
+        assert course.sections
+    finally:
+        await client.drop_database(db.name)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--topic", default="Docker")
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds added per replayed response")
+    parser.add_argument("--mongo-url", default=None)
+    args = parser.parse_args()
+    _configure_env(args)
+
+    if os.environ["HTTP_FIXTURE_MODE"] == "record":
+        args.runs = 1
+    runner = run_services if args.mongo_url else run_inference
+    asyncio.run(runner(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -12,8 +12,79 @@ if env_path.exists():
 # Use os.environ.get() for production compatibility
 GROQ_API_KEY = os.environ.get("GROQ_API_KEY")
 GROQ_MODEL = os.environ.get("GROQ_MODEL", "llama-3.3-70b-versatile")
+GROQ_FAST_MODEL = os.environ.get("GROQ_FAST_MODEL", "llama-3.1-8b-instant")
+# Model routing per generation stage: primary, fallback ("" = none) and the
+# latency budget after which the fallback takes over (utils/model_router.py)
+OUTLINE_MODEL = os.environ.get("OUTLINE_MODEL", GROQ_FAST_MODEL)
+OUTLINE_FALLBACK_MODEL = os.environ.get("OUTLINE_FALLBACK_MODEL", GROQ_MODEL)
+OUTLINE_LATENCY_BUDGET_SECONDS = float(os.environ.get("OUTLINE_LATENCY_BUDGET_SECONDS", "15"))
+SECTION_MODEL = os.environ.get("SECTION_MODEL", GROQ_MODEL)
+SECTION_FALLBACK_MODEL = os.environ.get("SECTION_FALLBACK_MODEL", GROQ_FAST_MODEL)
+SECTION_LATENCY_BUDGET_SECONDS = float(os.environ.get("SECTION_LATENCY_BUDGET_SECONDS", "30"))
+MCQ_MODEL = os.environ.get("MCQ_MODEL", GROQ_FAST_MODEL)
+MCQ_FALLBACK_MODEL = os.environ.get("MCQ_FALLBACK_MODEL", GROQ_MODEL)
+MCQ_LATENCY_BUDGET_SECONDS = float(os.environ.get("MCQ_LATENCY_BUDGET_SECONDS", "15"))
+REPAIR_MODEL = os.environ.get("REPAIR_MODEL", GROQ_FAST_MODEL)
+REPAIR_FALLBACK_MODEL = os.environ.get("REPAIR_FALLBACK_MODEL", GROQ_MODEL)
+REPAIR_LATENCY_BUDGET_SECONDS = float(os.environ.get("REPAIR_LATENCY_BUDGET_SECONDS", "10"))
+# Ask for JSON-object responses and validate them against the schemas in
+# models/generation_model.py; invalid fields are re-prompted for on their own
+# up to STRUCTURED_REPAIR_ATTEMPTS times (utils/structured_output.py)
+STRUCTURED_OUTPUT = os.environ.get("STRUCTURED_OUTPUT", "true").lower() == "true"
+STRUCTURED_REPAIR_ATTEMPTS = int(os.environ.get("STRUCTURED_REPAIR_ATTEMPTS", "2"))
+# Upstream endpoints; overridable so load tests can point at local stubs
+GROQ_BASE_URL = os.environ.get("GROQ_BASE_URL") or None
+PEXELS_API_URL = os.environ.get("PEXELS_API_URL", "https://api.pexels.com/v1/search")
+YOUTUBE_API_URL = os.environ.get("YOUTUBE_API_URL", "https://www.googleapis.com/youtube/v3/search")
+LLM_TIMEOUT_SECONDS = float(os.environ.get("LLM_TIMEOUT_SECONDS", "120"))
+LLM_MAX_CONNECTIONS = int(os.environ.get("LLM_MAX_CONNECTIONS", "100"))
+LLM_MAX_KEEPALIVE_CONNECTIONS = int(os.environ.get("LLM_MAX_KEEPALIVE_CONNECTIONS", "20"))
+# Per-request time budget (0 = none); LLM calls get what's left minus the reserve
+REQUEST_DEADLINE_SECONDS = float(os.environ.get("REQUEST_DEADLINE_SECONDS", "60"))
+LLM_DEADLINE_RESERVE_SECONDS = float(os.environ.get("LLM_DEADLINE_RESERVE_SECONDS", "5"))
+LLM_MAX_RETRIES = int(os.environ.get("LLM_MAX_RETRIES", "2"))
+# Hedging: duplicate a call still unanswered at the stage's latency percentile
+LLM_HEDGE_ENABLED = os.environ.get("LLM_HEDGE_ENABLED", "true").lower() == "true"
+LLM_HEDGE_PERCENTILE = float(os.environ.get("LLM_HEDGE_PERCENTILE", "0.95"))
+LLM_HEDGE_DELAY_SECONDS = float(os.environ.get("LLM_HEDGE_DELAY_SECONDS", "10"))
+LLM_HEDGE_MIN_DELAY_SECONDS = float(os.environ.get("LLM_HEDGE_MIN_DELAY_SECONDS", "0.5"))
+LLM_HEDGE_MIN_SAMPLES = int(os.environ.get("LLM_HEDGE_MIN_SAMPLES", "20"))
+LLM_CACHE_ENABLED = os.environ.get("LLM_CACHE_ENABLED", "true").lower() == "true"
+LLM_CACHE_TTL_SECONDS = int(os.environ.get("LLM_CACHE_TTL_SECONDS", str(30 * 24 * 3600)))
+# Stream completions and start media lookups as soon as their queries appear
+PIPELINED_GENERATION = os.environ.get("PIPELINED_GENERATION", "true").lower() == "true"
 YOUTUBE_API_KEY = os.environ.get("YOUTUBE_API_KEY")
 PEXELS_API_KEY = os.environ.get("PEXELS_API_KEY")
+MEDIA_TIMEOUT_SECONDS = float(os.environ.get("MEDIA_TIMEOUT_SECONDS", "10"))
+MEDIA_MAX_CONNECTIONS = int(os.environ.get("MEDIA_MAX_CONNECTIONS", "50"))
+PEXELS_MAX_CONCURRENCY = int(os.environ.get("PEXELS_MAX_CONCURRENCY", "8"))
+YOUTUBE_MAX_CONCURRENCY = int(os.environ.get("YOUTUBE_MAX_CONCURRENCY", "8"))
+# Longest a generation waits for outstanding media once its text is done (0 =
+# no limit); the rest is persisted without media and backfilled in the background
+MEDIA_DEADLINE_SECONDS = float(os.environ.get("MEDIA_DEADLINE_SECONDS", "3"))
+MEDIA_BACKFILL_ATTEMPTS = int(os.environ.get("MEDIA_BACKFILL_ATTEMPTS", "3"))
+MEDIA_BACKFILL_RETRY_SECONDS = float(os.environ.get("MEDIA_BACKFILL_RETRY_SECONDS", "10"))
+MEDIA_BREAKER_FAILURES = int(os.environ.get("MEDIA_BREAKER_FAILURES", "5"))
+MEDIA_BREAKER_RESET_SECONDS = float(os.environ.get("MEDIA_BREAKER_RESET_SECONDS", "30"))
+BACKGROUND_DRAIN_SECONDS = float(os.environ.get("BACKGROUND_DRAIN_SECONDS", "20"))
+
+# Upstream rate budgets per minute (0 = no local bucket; provider headers still apply)
+GROQ_RPM = int(os.environ.get("GROQ_RPM", "0"))
+GROQ_TPM = int(os.environ.get("GROQ_TPM", "0"))
+GROQ_EXPECTED_COMPLETION_TOKENS = int(os.environ.get("GROQ_EXPECTED_COMPLETION_TOKENS", "1500"))
+PEXELS_RPM = int(os.environ.get("PEXELS_RPM", "0"))
+YOUTUBE_RPM = int(os.environ.get("YOUTUBE_RPM", "0"))
+# Retries of 429/5xx upstream responses (jittered exponential backoff)
+RATE_LIMIT_MAX_RETRIES = int(os.environ.get("RATE_LIMIT_MAX_RETRIES", "3"))
+RATE_LIMIT_BACKOFF_BASE_SECONDS = float(os.environ.get("RATE_LIMIT_BACKOFF_BASE_SECONDS", "1"))
+RATE_LIMIT_BACKOFF_MAX_SECONDS = float(os.environ.get("RATE_LIMIT_BACKOFF_MAX_SECONDS", "30"))
+
+SECTION_LEASE_SECONDS = int(os.environ.get("SECTION_LEASE_SECONDS", "180"))
+SECTION_LEASE_POLL_SECONDS = float(os.environ.get("SECTION_LEASE_POLL_SECONDS", "1.0"))
+MEDIA_CACHE_ENABLED = os.environ.get("MEDIA_CACHE_ENABLED", "true").lower() == "true"
+MEDIA_CACHE_MAX_ENTRIES = int(os.environ.get("MEDIA_CACHE_MAX_ENTRIES", "2048"))
+MEDIA_CACHE_TTL_SECONDS = int(os.environ.get("MEDIA_CACHE_TTL_SECONDS", str(7 * 24 * 3600)))
+MEDIA_CACHE_NEGATIVE_TTL_SECONDS = int(os.environ.get("MEDIA_CACHE_NEGATIVE_TTL_SECONDS", "3600"))
 MONGO_URL = os.environ.get("MONGO_URL") or os.environ.get("MONGODB_URI", "mongodb://localhost:27017")
 DB_NAME = os.environ.get("DB_NAME", "coursegen")
 ACCESS_SECRET_KEY = os.environ.get("ACCESS_SECRET_KEY")
@@ -21,6 +92,29 @@ REFRESH_SECRET_KEY = os.environ.get("REFRESH_SECRET_KEY")
 ALGORITHM = os.environ.get("ALGORITHM", "HS256")
 ACCESS_TOKEN_EXPIRE_MINUTES = int(os.environ.get("ACCESS_TOKEN_EXPIRE_MINUTES", "30"))
 REFRESH_TOKEN_EXPIRE_DAYS = int(os.environ.get("REFRESH_TOKEN_EXPIRE_DAYS", "7"))
+PASSWORD_HASH_WORKERS = int(os.environ.get("PASSWORD_HASH_WORKERS", str(min(4, os.cpu_count() or 1))))
+USER_CACHE_TTL_SECONDS = int(os.environ.get("USER_CACHE_TTL_SECONDS", "60"))
+USER_CACHE_MAX_ENTRIES = int(os.environ.get("USER_CACHE_MAX_ENTRIES", "4096"))
+
+# Generation job queue (worker.py)
+JOB_LEASE_SECONDS = int(os.environ.get("JOB_LEASE_SECONDS", "300"))
+JOB_MAX_ATTEMPTS = int(os.environ.get("JOB_MAX_ATTEMPTS", "3"))
+JOB_RETRY_BASE_SECONDS = float(os.environ.get("JOB_RETRY_BASE_SECONDS", "15"))
+JOB_POLL_SECONDS = float(os.environ.get("JOB_POLL_SECONDS", "1"))
+JOB_WORKER_CONCURRENCY = int(os.environ.get("JOB_WORKER_CONCURRENCY", "4"))
+# Batch course generation: prompts per batch, courses generated at once per batch
+BATCH_MAX_PROMPTS = int(os.environ.get("BATCH_MAX_PROMPTS", "50"))
+BATCH_CONCURRENCY = int(os.environ.get("BATCH_CONCURRENCY", "4"))
+
+# Record/replay of upstream HTTP traffic: "off", "record" or "replay"
+HTTP_FIXTURE_MODE = os.environ.get("HTTP_FIXTURE_MODE", "off").lower()
+HTTP_FIXTURE_DIR = os.environ.get("HTTP_FIXTURE_DIR", str(Path(__file__).parent / "fixtures" / "http"))
+HTTP_FIXTURE_LATENCY = float(os.environ.get("HTTP_FIXTURE_LATENCY", "0"))
+
+# Logging
+LOG_LEVEL = os.environ.get("LOG_LEVEL", "INFO").upper()
+LOG_DEBUG_SAMPLE_RATE = float(os.environ.get("LOG_DEBUG_SAMPLE_RATE", "0.1"))
+LOG_MAX_PAYLOAD_CHARS = int(os.environ.get("LOG_MAX_PAYLOAD_CHARS", "2000"))
 
 # CORS Configuration
 CORS_ORIGINS = os.environ.get(
@@ -27,3 +27,23 @@ async def get_database() -> AsyncIOMotorDatabase:
     No PyMongo, no threadpool, pure async/await.
     """
     return db
+
+
+_transactions_supported = None
+
+
+async def supports_transactions() -> bool:
+    """
+    Multi-document transactions need a replica set or a sharded cluster.
+    Checked once against the server and cached for the process lifetime.
+    """
+    global _transactions_supported
+    if _transactions_supported is None:
+        try:
+            hello = await client.admin.command("hello")
+            _transactions_supported = bool(
+                hello.get("setName") or hello.get("msg") == "isdbgrid"
+            )
+        except Exception:
+            _transactions_supported = False
+    return _transactions_supported
@@ -0,0 +1,71 @@
+"""
+Index registry.
+
+Every index the services rely on is declared here per collection and applied
+idempotently at startup (create_index is a no-op when the index already
+exists). Keys use the same (field, direction) form Motor accepts directly.
+"""
+
+from motor.motor_asyncio import AsyncIOMotorDatabase
+import logging
+
+logger = logging.getLogger(__name__)
+
+ASCENDING = 1
+DESCENDING = -1
+
+INDEXES: dict[str, list[dict]] = {
+    "users": [
+        # login / register lookups; unique closes the check-then-insert race
+        {"keys": [("email", ASCENDING)], "name": "email_unique", "unique": True},
+        {"keys": [("username", ASCENDING)], "name": "username_unique", "unique": True},
+    ],
+    "courses": [
+        # get_user_courses: filter by owner, keyset on (created_at, _id)
+        {
+            "keys": [
+                ("user_id", ASCENDING),
+                ("created_at", DESCENDING),
+                ("_id", DESCENDING),
+            ],
+            "name": "user_created_at_id",
+        },
+    ],
+    "sections": [
+        # delete_course cascades by course_id
+        {"keys": [("course_id", ASCENDING)], "name": "course_id"},
+    ],
+    "jobs": [
+        # claim_job: next runnable job, oldest first
+        {"keys": [("status", ASCENDING), ("run_after", ASCENDING)], "name": "status_run_after"},
+        # claim_job: reclaim jobs whose worker died mid-run
+        {"keys": [("status", ASCENDING), ("lease.expires_at", ASCENDING)], "name": "status_lease_expires_at"},
+    ],
+    "media_cache": [
+        {"keys": [("expires_at", ASCENDING)], "name": "expires_at_ttl", "expireAfterSeconds": 0},
+    ],
+    "llm_cache": [
+        {"keys": [("expires_at", ASCENDING)], "name": "expires_at_ttl", "expireAfterSeconds": 0},
+    ],
+}
+
+
+async def apply_indexes(database: AsyncIOMotorDatabase) -> list[str]:
+    """
+    Create every registered index. Failures are reported per index so one bad
+    index (e.g. duplicates blocking a unique index) doesn't stop the rest.
+    Returns the list of failures.
+    """
+    failures = []
+    for collection_name, specs in INDEXES.items():
+        collection = database.get_collection(collection_name)
+        for spec in specs:
+            options = {k: v for k, v in spec.items() if k != "keys"}
+            try:
+                await collection.create_index(spec["keys"], **options)
+            except Exception as e:
+                failures.append(f"{collection_name}.{spec['name']}: {e}")
+                logger.error(
+                    "Failed to create index %s.%s: %s", collection_name, spec["name"], e
+                )
+    return failures
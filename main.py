@@ -1,17 +1,49 @@
-from fastapi import FastAPI, Request, status
+import time
+from fastapi import FastAPI, Request, Response, status
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
 from api.user_router import router as user_router
 from api.course_router import router as course_router
 from api.section_router import router as section_router
 from api.auth_router import router as auth_router
-from config import CORS_ORIGINS
+from api.job_router import router as job_router
+from config import BACKGROUND_DRAIN_SECONDS, CORS_ORIGINS, REQUEST_DEADLINE_SECONDS
+from utils.llm_client import close_llm_client
+from utils.media_fetcher import close_http_client
+from utils.background import drain as drain_background
+from utils.deadline import start_deadline
+from utils.media_cache import get_media_cache_stats
+from auth.user_cache import get_user_cache_stats
+from utils.logger import configure_logging, shutdown_logging, start_request_context
+from utils.metrics import REQUEST_LATENCY, render_metrics
 import logging
 
+configure_logging()
 logger = logging.getLogger(__name__)
 
 app = FastAPI(title="CourseGen API")
 
+
+@app.middleware("http")
+async def request_context(request: Request, call_next):
+    request_id = start_request_context(request.headers.get("X-Request-ID"))
+    start_deadline(REQUEST_DEADLINE_SECONDS)
+    started = time.perf_counter()
+    status_code = 500
+    try:
+        response = await call_next(request)
+        status_code = response.status_code
+    finally:
+        # label by route template, not raw path, to keep cardinality bounded
+        route = request.scope.get("route")
+        REQUEST_LATENCY.labels(
+            request.method,
+            getattr(route, "path", "unmatched"),
+            str(status_code),
+        ).observe(time.perf_counter() - started)
+    response.headers["X-Request-ID"] = request_id
+    return response
+
 # CORS - Allow all origins temporarily for debugging
 app.add_middleware(
     CORSMiddleware,
@@ -37,6 +69,25 @@ async def global_exception_handler(request: Request, exc: Exception):
     )
 
 
+@app.on_event("startup")
+async def bootstrap_indexes():
+    from db.connect import db
+    from db.indexes import apply_indexes
+
+    try:
+        await apply_indexes(db)
+    except Exception as e:
+        logger.error(f"Index bootstrap failed: {e}", exc_info=True)
+
+
+@app.on_event("shutdown")
+async def shutdown_clients():
+    await drain_background(BACKGROUND_DRAIN_SECONDS)
+    await close_llm_client()
+    await close_http_client()
+    shutdown_logging()
+
+
 @app.get("/")
 async def root():
     return {"message": "CourseGen API is running", "status": "healthy"}
@@ -76,7 +127,27 @@ async def health_db():
         }
 
 
+@app.get("/metrics")
+async def metrics():
+    """Prometheus scrape endpoint"""
+    payload, content_type = render_metrics()
+    return Response(content=payload, headers={"Content-Type": content_type})
+
+
+@app.get("/health/media-cache")
+async def health_media_cache():
+    """Hit/miss counters for the Pexels/YouTube query cache"""
+    return get_media_cache_stats()
+
+
+@app.get("/health/user-cache")
+async def health_user_cache():
+    """Hit/miss counters for the authenticated-user cache"""
+    return get_user_cache_stats()
+
+
 app.include_router(auth_router, prefix="/auth", tags=["Authentication"])
 app.include_router(user_router, prefix="/users", tags=["Users"])
 app.include_router(course_router, prefix="/course", tags=["Courses"])
 app.include_router(section_router, prefix="/section", tags=["Sections"])
+app.include_router(job_router, prefix="/jobs", tags=["Jobs"])
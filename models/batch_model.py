@@ -0,0 +1,48 @@
+from pydantic import BaseModel, Field, ConfigDict
+from pydantic.functional_validators import BeforeValidator
+from datetime import datetime
+from bson import ObjectId
+from typing import Annotated, Union, Optional, List
+
+
+PyObjectId = Annotated[Union[str, ObjectId], BeforeValidator(str)]
+
+
+class CourseBatchRequest(BaseModel):
+    user_id: str
+    prompts: List[str]
+    bypass_cache: bool = False
+
+    model_config = ConfigDict(
+        populate_by_name=True,
+        arbitrary_types_allowed=True,
+        json_encoders={ObjectId: str},
+    )
+
+
+class CourseBatchItem(BaseModel):
+    index: int
+    prompt: str
+    status: str
+    course_id: Optional[PyObjectId] = None
+    error: Optional[str] = None
+
+    model_config = ConfigDict(
+        arbitrary_types_allowed=True,
+        json_encoders={ObjectId: str},
+    )
+
+
+class CourseBatch(BaseModel):
+    id: PyObjectId = Field(alias="_id")
+    job_id: Optional[PyObjectId] = None
+    status: str
+    items: List[CourseBatchItem] = []
+    created_at: Optional[datetime] = None
+    updated_at: Optional[datetime] = None
+
+    model_config = ConfigDict(
+        populate_by_name=True,
+        arbitrary_types_allowed=True,
+        json_encoders={ObjectId: str, datetime: lambda v: v.isoformat() if v else None},
+    )
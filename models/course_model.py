@@ -33,3 +33,22 @@ class Course(BaseModel):
         arbitrary_types_allowed=True,
         json_encoders={ObjectId: str, datetime: lambda v: v.isoformat() if v else None},
     )
+
+
+class CourseSummary(BaseModel):
+    id: PyObjectId = Field(alias="_id")
+    title: str
+    prompt: str = ""
+    section_count: int = 0
+    created_at: Optional[datetime] = None
+
+    model_config = ConfigDict(
+        populate_by_name=True,
+        arbitrary_types_allowed=True,
+        json_encoders={ObjectId: str, datetime: lambda v: v.isoformat() if v else None},
+    )
+
+
+class CoursePage(BaseModel):
+    items: List[CourseSummary] = []
+    next_cursor: Optional[str] = None
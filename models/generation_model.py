@@ -0,0 +1,42 @@
+from pydantic import BaseModel, Field, model_validator
+from typing import Dict, List
+from models.section_model import Mcq
+
+
+# Schemas the LLM output is validated against (utils/structured_output.py).
+# Each top-level field can be re-prompted for on its own, so keep them
+# independent of each other.
+
+
+class CourseOutline(BaseModel):
+    title: str = Field(min_length=1)
+    image_queries: Dict[str, str] = {}
+    ytvid_queries: Dict[str, str] = {}
+    description: str = Field(min_length=1)
+    sections: List[str] = Field(min_length=1)
+
+
+class SectionHeadings(BaseModel):
+    h1: Dict[str, str] = {}
+    h2: Dict[str, str] = {}
+
+
+class SectionContent(BaseModel):
+    image_queries: Dict[str, str] = {}
+    ytvid_queries: Dict[str, str] = {}
+    text: str = Field(min_length=1)
+    headings: SectionHeadings = SectionHeadings()
+
+
+class GeneratedMcq(Mcq):
+    options: List[str] = Field(min_length=2)
+
+    @model_validator(mode="after")
+    def answer_is_an_option(self):
+        if self.answer not in self.options:
+            raise ValueError("answer must be one of the options")
+        return self
+
+
+class SectionMcqs(BaseModel):
+    mcqs: List[GeneratedMcq] = Field(min_length=1)
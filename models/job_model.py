@@ -0,0 +1,37 @@
+from pydantic import BaseModel, Field, ConfigDict
+from pydantic.functional_validators import BeforeValidator
+from datetime import datetime
+from bson import ObjectId
+from typing import Any, Annotated, Union, Optional
+
+
+PyObjectId = Annotated[Union[str, ObjectId], BeforeValidator(str)]
+
+
+class JobAccepted(BaseModel):
+    job_id: PyObjectId
+    status: str
+    status_url: str
+
+    model_config = ConfigDict(
+        arbitrary_types_allowed=True,
+        json_encoders={ObjectId: str},
+    )
+
+
+class JobStatus(BaseModel):
+    id: PyObjectId = Field(alias="_id")
+    kind: str
+    status: str
+    attempts: int = 0
+    max_attempts: int = 0
+    error: Optional[str] = None
+    result: Optional[Any] = None
+    created_at: Optional[datetime] = None
+    updated_at: Optional[datetime] = None
+
+    model_config = ConfigDict(
+        populate_by_name=True,
+        arbitrary_types_allowed=True,
+        json_encoders={ObjectId: str, datetime: lambda v: v.isoformat() if v else None},
+    )
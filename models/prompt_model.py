@@ -19,6 +19,7 @@ PyObjectId = Annotated[Union[str, ObjectId], BeforeValidator(str)]
 class Prompt(BaseModel):
     user_id: str
     prompt_text: str
+    bypass_cache: bool = False
 
     model_config = ConfigDict(
         populate_by_name=True,
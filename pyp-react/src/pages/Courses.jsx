@@ -51,6 +51,8 @@ function Courses() {
     const deleteCourse = useStore((state) => state.deleteCourse)
     const coursesState = useStore((state) => state.courses)
     const courses = coursesState.items || []
+    const nextCursor = coursesState.nextCursor
+    const [isLoadingMore, setIsLoadingMore] = useState(false)
     const isLoading = coursesState.status === 'loading'
     const error = coursesState.error
 
@@ -97,6 +99,15 @@ function Courses() {
         }
     }
 
+    const handleLoadMore = async () => {
+        setIsLoadingMore(true)
+        try {
+            await fetchCourses(nextCursor)
+        } finally {
+            setIsLoadingMore(false)
+        }
+    }
+
     const handleDeleteClick = (course) => {
         setCourseToDelete(course)
         setDeleteDialogOpen(true)
@@ -318,7 +329,7 @@ function Courses() {
                                         <div className="flex items-center gap-4 text-xs text-muted-foreground">
                                             <span className="flex items-center gap-1">
                                                 <BookOpen className="h-3 w-3" />
-                                                <span className="font-medium">{course.sections?.length || 0}</span> section{(course.sections?.length || 0) !== 1 ? 's' : ''}
+                                                <span className="font-medium">{course.sectionCount || 0}</span> section{(course.sectionCount || 0) !== 1 ? 's' : ''}
                                             </span>
                                             <span className="flex items-center gap-1">
                                                 <Calendar className="h-3 w-3" />
@@ -398,6 +409,19 @@ function Courses() {
                             </div>
                         </div>
                     )}
+
+                    {nextCursor && (
+                        <div className="flex justify-center pt-4">
+                            <Button
+                                variant="outline"
+                                size="sm"
+                                onClick={handleLoadMore}
+                                disabled={isLoadingMore}
+                            >
+                                {isLoadingMore ? 'Loading...' : 'Load more courses'}
+                            </Button>
+                        </div>
+                    )}
                 </>
             )}
 
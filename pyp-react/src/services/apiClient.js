@@ -85,4 +85,56 @@ const requestForm = async (path, formBody, options = {}) => {
     }
 }
 
-export { request, authRequest, requestForm }
+// POST that reads a text/event-stream response, calling onEvent(event, data)
+// for every message. Resolves when the server closes the stream.
+const authStream = async (path, token, options = {}, onEvent) => {
+    const { body, headers, ...rest } = options
+
+    const response = await fetch(`${baseUrl}${path}`, {
+        method: 'POST',
+        headers: {
+            'Content-Type': 'application/json',
+            Accept: 'text/event-stream',
+            ...(headers ?? {}),
+            ...(token ? { Authorization: `Bearer ${token}` } : {}),
+        },
+        body: typeof body === 'string' ? body : JSON.stringify(body),
+        ...rest,
+    })
+
+    if (!response.ok) {
+        let errorBody = null
+        try {
+            errorBody = await response.json()
+        } catch (_) { }
+        const message =
+            errorBody?.detail || errorBody?.message || response.statusText || 'Request failed'
+        throw new Error(message)
+    }
+
+    const reader = response.body.getReader()
+    const decoder = new TextDecoder()
+    let buffer = ''
+
+    for (; ;) {
+        const { value, done } = await reader.read()
+        if (done) break
+        buffer += decoder.decode(value, { stream: true })
+
+        let boundary
+        while ((boundary = buffer.indexOf('\n\n')) !== -1) {
+            const message = buffer.slice(0, boundary)
+            buffer = buffer.slice(boundary + 2)
+
+            let event = 'message'
+            const dataLines = []
+            message.split('\n').forEach((line) => {
+                if (line.startsWith('event:')) event = line.slice(6).trim()
+                else if (line.startsWith('data:')) dataLines.push(line.slice(5).trimStart())
+            })
+            if (dataLines.length) onEvent(event, JSON.parse(dataLines.join('\n')))
+        }
+    }
+}
+
+export { request, authRequest, requestForm, authStream }
@@ -1,7 +1,11 @@
 import { authRequest } from './apiClient.js'
 
-const fetchCourses = async (token) => {
-    return authRequest('/course/all', token)
+const fetchCourses = async (token, cursor = null, limit = 20) => {
+    const params = new URLSearchParams({ limit: String(limit) })
+    if (cursor) {
+        params.set('cursor', cursor)
+    }
+    return authRequest(`/course/all?${params.toString()}`, token)
 }
 
 const fetchCourseById = async (token, courseId) => {
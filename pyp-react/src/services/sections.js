@@ -1,4 +1,4 @@
-import { authRequest } from './apiClient.js'
+import { authRequest, authStream } from './apiClient.js'
 
 const fetchSectionDetails = async (token, courseId, sectionId) =>
     authRequest('/section/', token, {
@@ -9,4 +9,19 @@ const fetchSectionDetails = async (token, courseId, sectionId) =>
         },
     })
 
-export { fetchSectionDetails }
+// Same as fetchSectionDetails, but relays generation progress to onEvent:
+// text / heading / mcq / media / status events, then the final section.
+const streamSectionDetails = (token, courseId, sectionId, onEvent) =>
+    authStream(
+        '/section/stream',
+        token,
+        {
+            body: {
+                course_id: courseId,
+                section_id: sectionId,
+            },
+        },
+        onEvent
+    )
+
+export { fetchSectionDetails, streamSectionDetails }
@@ -3,6 +3,7 @@ import { createCourse as createCourseRequest, fetchCourses, fetchCourseById as f
 const coursesInitialState = {
     course: null,
     items: [],
+    nextCursor: null,
     status: 'idle',
     error: null,
 }
@@ -33,14 +34,15 @@ const createCourseSlice = (set, get) => ({
             false,
             'courses/clear'
         ),
-    fetchCourses: async () => {
+    fetchCourses: async (cursor = null) => {
         const token = get().auth?.token
 
         set(
             (state) => ({
                 courses: {
                     ...state.courses,
-                    status: 'loading',
+                    // keep the current list on screen while loading more
+                    status: cursor ? state.courses.status : 'loading',
                     error: null,
                 },
             }),
@@ -49,24 +51,23 @@ const createCourseSlice = (set, get) => ({
         )
 
         try {
-            const response = await fetchCourses(token)
-            const items = (response ?? []).map((course) => ({
+            const response = await fetchCourses(token, cursor)
+            const page = (response?.items ?? []).map((course) => ({
                 id: course._id ?? course.id,
-                userId: course.user_id,
                 prompt: course.prompt,
                 title: course.title,
-                description: course.description ?? '',
-                sections: course.sections ?? [],
-                sectionTitles: course.section_titles ?? [],
+                sectionCount: course.section_count ?? 0,
                 createdAt: course.created_at || course.createdAt,
-                updatedAt: course.updated_at || course.updatedAt,
             }))
+            // A cursor means "load more": append to what we already have
+            const items = cursor ? [...get().courses.items, ...page] : page
 
             set(
                 (state) => ({
                     courses: {
                         ...state.courses,
                         items,
+                        nextCursor: response?.next_cursor ?? null,
                         status: 'success',
                         error: null,
                     },
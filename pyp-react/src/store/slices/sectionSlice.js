@@ -1,4 +1,4 @@
-import { fetchSectionDetails } from '../../services/sections.js'
+import { streamSectionDetails } from '../../services/sections.js'
 
 const sectionsInitialState = {
     section: null,
@@ -52,22 +52,89 @@ const createSectionSlice = (set, get) => ({
             'sections/fetch-one'
         )
 
-        try {
-            const response = await fetchSectionDetails(token, courseId, sectionId)
+        const allSections = course?.sections?.map((secId, index) => ({
+            id: secId,
+            title: course.sectionTitles?.[index] ?? `Section ${index + 1}`,
+            order: index,
+        })) ?? []
+
+        const toSection = (response) => response ? {
+            id: response._id ?? response.id,
+            courseId: response.course_id ?? courseId,
+            title: response.title,
+            content: response.content ?? '',
+            order: response.order ?? 0,
+        } : null
 
-            const allSections = course?.sections?.map((secId, index) => ({
-                id: secId,
-                title: course.sectionTitles?.[index] ?? `Section ${index + 1}`,
-                order: index,
-            })) ?? []
+        // Partial section built from stream events until the saved one arrives
+        const sectionIndex = course?.sections?.indexOf(sectionId) ?? -1
+        const draft = {
+            id: sectionId,
+            courseId,
+            title: course?.sectionTitles?.[sectionIndex] ?? '',
+            content: { text: '', image_links: [], youtube_links: [], mcqs: [], headers: { h1: {}, h2: {} } },
+            order: Math.max(sectionIndex, 0),
+        }
+        let finalSection = null
+        let streamError = null
 
-            const section = response ? {
-                id: response._id ?? response.id,
-                courseId: response.course_id ?? courseId,
-                title: response.title,
-                content: response.content ?? '',
-                order: response.order ?? 0,
-            } : null
+        const applyEvent = (event, data) => {
+            const content = draft.content
+            switch (event) {
+                case 'text':
+                    content.text += data.delta
+                    break
+                case 'heading':
+                    content.headers = {
+                        ...content.headers,
+                        [data.level]: { ...(content.headers[data.level] ?? {}), [data.key]: data.text },
+                    }
+                    break
+                case 'mcq': {
+                    const { index, ...mcq } = data
+                    content.mcqs = [...content.mcqs]
+                    content.mcqs[index] = mcq
+                    break
+                }
+                case 'media': {
+                    const field = data.kind === 'image' ? 'image_links' : 'youtube_links'
+                    content[field] = [...content[field]]
+                    content[field][Number(data.key) - 1] = data.url
+                    break
+                }
+                case 'section':
+                    finalSection = toSection(data)
+                    return
+                case 'error':
+                    streamError = data?.detail || 'Failed to load section'
+                    return
+                default:
+                    return
+            }
+
+            set(
+                (state) => ({
+                    sections: {
+                        ...state.sections,
+                        section: { ...draft, content: { ...content } },
+                        courseTitle: course?.title ?? null,
+                        courseId,
+                        allSections,
+                        status: 'streaming',
+                        error: null,
+                    },
+                }),
+                false,
+                'sections/fetch-one-progress'
+            )
+        }
+
+        try {
+            await streamSectionDetails(token, courseId, sectionId, applyEvent)
+            if (streamError || !finalSection) {
+                throw new Error(streamError || 'Section stream ended unexpectedly')
+            }
+            const section = finalSection
 
             set(
                 (state) => ({
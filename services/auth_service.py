@@ -4,29 +4,32 @@ from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 from models.user_model import UserCreate, UserResponse
 from schemas.user_schema import UserInDB
-from auth.password_handler import verify_password
+from auth.password_handler import verify_password_async
 from auth.jwt_handler import create_access_token, create_refresh_token
 from services.user_service import get_user_by_email
 from db.connect import get_database
+import logging
+
+logger = logging.getLogger(__name__)
 
 
 async def login_user(email: str, password: str, database=Depends(get_database)) -> dict:
-    print("login_user start", email)
+    logger.debug("login_user start %s", email)
 
-    print("authenticate_user start", email)
+    logger.debug("authenticate_user start %s", email)
     user = await get_user_by_email(email, database)
 
-    if not user or not verify_password(password, user.password_hash):
-        print("login_user invalid credentials", email)
+    if not user or not await verify_password_async(password, user.password_hash):
+        logger.warning("login_user invalid credentials %s", email)
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect username or password",
             headers={"WWW-Authenticate": "Bearer"},
         )
-    print("authenticate_user ok", email)
+    logger.debug("authenticate_user ok %s", email)
 
     if not user.is_active:
-        print("login_user inactive", email)
+        logger.warning("login_user inactive %s", email)
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Inactive user",
@@ -38,16 +41,11 @@ async def login_user(email: str, password: str, database=Depends(get_database))
         "email": user.email,
         "scopes": user.roles,
     }
-    print(
-        "login_user token_data scopes",
-        token_data.get("scopes"),
-        "type",
-        type(token_data.get("scopes")),
-    )
+    logger.debug("login_user token_data scopes %s", token_data.get("scopes"))
 
     access_token = create_access_token(data=token_data)
     refresh_token = create_refresh_token(data=token_data)
-    print("login_user tokens issued", email)
+    logger.debug("login_user tokens issued %s", email)
 
     return {
         "access_token": access_token,
@@ -0,0 +1,262 @@
+"""
+Batch course generation, tracked in the `course_batches` collection.
+
+A batch holds one item per prompt. The batch is run by a worker as a single
+"course_batch" job: items are generated BATCH_CONCURRENCY at a time through
+course_service.get_response, with media searches shared across the whole
+batch, and each item's status/course_id is written back as it finishes. A
+re-run (e.g. after the worker died) skips items that already succeeded.
+
+A run claims each item before generating it (status -> running, with the
+run's token and a claim expiry it keeps renewing), so two runs of the same
+batch never generate the same item: a claim held by another run is waited
+out, and only taken over once it expires.
+"""
+
+import asyncio
+import logging
+from bson import ObjectId
+from bson.errors import InvalidId
+from fastapi import HTTPException
+from datetime import datetime, timedelta, timezone
+from config import BATCH_CONCURRENCY, BATCH_MAX_PROMPTS, JOB_LEASE_SECONDS
+from models.batch_model import CourseBatch, CourseBatchRequest
+from models.prompt_model import Prompt
+from services.course_service import get_response
+
+logger = logging.getLogger(__name__)
+
+QUEUED = "queued"
+RUNNING = "running"
+SUCCEEDED = "succeeded"
+PARTIAL = "partial"
+FAILED = "failed"
+
+# how often a run re-checks an item claimed by another run
+_CLAIM_POLL_SECONDS = 5
+
+
+async def create_batch(request: CourseBatchRequest, database) -> dict:
+    prompts = [p.strip() for p in request.prompts if p and p.strip()]
+    if not prompts:
+        raise HTTPException(status_code=400, detail="No prompts given")
+    if len(prompts) > BATCH_MAX_PROMPTS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"At most {BATCH_MAX_PROMPTS} prompts per batch",
+        )
+
+    now = datetime.now(timezone.utc)
+    batch = {
+        "user_id": ObjectId(request.user_id),
+        "bypass_cache": request.bypass_cache,
+        "job_id": None,
+        "status": QUEUED,
+        "items": [
+            {
+                "index": i,
+                "prompt": prompt,
+                "status": QUEUED,
+                "course_id": None,
+                "error": None,
+            }
+            for i, prompt in enumerate(prompts)
+        ],
+        "created_at": now,
+        "updated_at": now,
+    }
+    result = await database.get_collection("course_batches").insert_one(batch)
+    batch["_id"] = result.inserted_id
+    logger.info("Created course batch %s with %d prompts", batch["_id"], len(prompts))
+    return batch
+
+
+async def get_batch(batch_id: str, user_id, database) -> CourseBatch:
+    try:
+        batch_oid = ObjectId(batch_id)
+    except (InvalidId, TypeError):
+        raise HTTPException(status_code=404, detail="Batch not found")
+
+    batch = await database.get_collection("course_batches").find_one(
+        {"_id": batch_oid, "user_id": ObjectId(user_id)}
+    )
+    if not batch:
+        raise HTTPException(status_code=404, detail="Batch not found")
+    return CourseBatch(**batch)
+
+
+async def attach_job(batch: dict, job_id: ObjectId, database) -> dict:
+    """Record the job that runs `batch` on it (the batch is created first)."""
+    await _update_batch(database, batch["_id"], {"job_id": job_id})
+    batch["job_id"] = job_id
+    return batch
+
+
+async def _update_batch(database, batch_id: ObjectId, fields: dict) -> None:
+    fields["updated_at"] = datetime.now(timezone.utc)
+    await database.get_collection("course_batches").update_one(
+        {"_id": batch_id}, {"$set": fields}
+    )
+
+
+async def _claim_item(database, batch_id: ObjectId, index: int, token: str) -> bool:
+    """Take item `index` for the run `token`, unless another run holds it."""
+    now = datetime.now(timezone.utc)
+    status = f"items.{index}.status"
+    result = await database.get_collection("course_batches").update_one(
+        {
+            "_id": batch_id,
+            "$or": [
+                {status: {"$in": [QUEUED, FAILED]}},
+                {status: RUNNING, f"items.{index}.claim_expires_at": {"$lt": now}},
+                # running since before claims were recorded
+                {status: RUNNING, f"items.{index}.claim_expires_at": None},
+            ],
+        },
+        {
+            "$set": {
+                status: RUNNING,
+                f"items.{index}.claim": token,
+                f"items.{index}.claim_expires_at": now
+                + timedelta(seconds=JOB_LEASE_SECONDS),
+                "updated_at": now,
+            }
+        },
+    )
+    return result.modified_count == 1
+
+
+async def _update_claimed_item(
+    database, batch_id: ObjectId, index: int, token: str, fields: dict
+) -> bool:
+    """Update item `index` only while the run `token` still holds it."""
+    fields["updated_at"] = datetime.now(timezone.utc)
+    result = await database.get_collection("course_batches").update_one(
+        {"_id": batch_id, f"items.{index}.claim": token}, {"$set": fields}
+    )
+    return result.modified_count == 1
+
+
+async def _keep_claims(database, batch_id: ObjectId, token: str, held: set) -> None:
+    while True:
+        await asyncio.sleep(JOB_LEASE_SECONDS / 3)
+        expires_at = datetime.now(timezone.utc) + timedelta(seconds=JOB_LEASE_SECONDS)
+        for index in list(held):
+            await _update_claimed_item(
+                database,
+                batch_id,
+                index,
+                token,
+                {f"items.{index}.claim_expires_at": expires_at},
+            )
+
+
+async def run_course_batch(batch_id: str, database) -> dict:
+    """Generate every outstanding item of a batch; returns a summary."""
+    batch_oid = ObjectId(batch_id)
+    batches = database.get_collection("course_batches")
+    batch = await batches.find_one({"_id": batch_oid})
+    if not batch:
+        raise HTTPException(status_code=404, detail="Batch not found")
+
+    await _update_batch(database, batch_oid, {"status": RUNNING})
+    semaphore = asyncio.Semaphore(BATCH_CONCURRENCY)
+    # (kind, query) -> search task, shared by every course in the batch
+    media_lookups: dict = {}
+    token = str(ObjectId())
+    held: set[int] = set()
+
+    async def claim(index: int) -> bool:
+        """Claim the item, waiting out another run's claim; False if it succeeded."""
+        while not await _claim_item(database, batch_oid, index, token):
+            current = await batches.find_one({"_id": batch_oid})
+            item = current["items"][index]
+            if item["status"] == SUCCEEDED:
+                return False
+            logger.info(
+                "Batch %s item %d is held by another run, waiting", batch_id, index
+            )
+            await asyncio.sleep(_CLAIM_POLL_SECONDS)
+        return True
+
+    async def generate(item: dict) -> bool:
+        if item["status"] == SUCCEEDED:
+            return True
+        index = item["index"]
+        if not await claim(index):
+            return True
+        held.add(index)
+        prompt = Prompt(
+            user_id=str(batch["user_id"]),
+            prompt_text=item["prompt"],
+            bypass_cache=batch.get("bypass_cache", False),
+        )
+        try:
+            async with semaphore:
+                course = await get_response(
+                    prompt, database, media_lookups=media_lookups
+                )
+        except asyncio.CancelledError:
+            # give the item back so a re-run needn't wait for the claim
+            await _update_claimed_item(
+                database,
+                batch_oid,
+                index,
+                token,
+                {f"items.{index}.status": QUEUED, f"items.{index}.claim": None},
+            )
+            raise
+        except Exception as e:
+            error = e.detail if isinstance(e, HTTPException) else str(e)
+            logger.error("Batch %s item %d failed: %s", batch_id, index, error)
+            await _update_claimed_item(
+                database,
+                batch_oid,
+                index,
+                token,
+                {f"items.{index}.status": FAILED, f"items.{index}.error": error},
+            )
+            return False
+        finally:
+            held.discard(index)
+
+        await _update_claimed_item(
+            database,
+            batch_oid,
+            index,
+            token,
+            {
+                f"items.{index}.status": SUCCEEDED,
+                f"items.{index}.course_id": ObjectId(course.id),
+                f"items.{index}.error": None,
+            },
+        )
+        return True
+
+    heartbeat = asyncio.create_task(_keep_claims(database, batch_oid, token, held))
+    try:
+        outcomes = await asyncio.gather(*(generate(item) for item in batch["items"]))
+    finally:
+        heartbeat.cancel()
+    succeeded = sum(outcomes)
+    if succeeded == len(outcomes):
+        status = SUCCEEDED
+    elif succeeded:
+        status = PARTIAL
+    else:
+        status = FAILED
+    await _update_batch(database, batch_oid, {"status": status})
+    logger.info(
+        "Course batch %s %s: %d/%d courses, %d distinct media searches",
+        batch_id,
+        status,
+        succeeded,
+        len(outcomes),
+        len(media_lookups),
+    )
+    return {
+        "batch_id": batch_id,
+        "status": status,
+        "succeeded": succeeded,
+        "failed": len(outcomes) - succeeded,
+    }
@@ -1,21 +1,108 @@
 from models.prompt_model import Prompt
 from utils.course_inference import infer_course_structure
-from models.course_model import Course
+from models.course_model import Course, CoursePage, CourseSummary
 import json
+import math
+import base64
+from typing import Optional
 from bson import ObjectId
 from fastapi import HTTPException
 from datetime import datetime, timezone
+from db.connect import supports_transactions
+from utils.logger import truncate
+from utils.metrics import timed, MEDIA_BACKFILLS
+from utils.background import spawn
+import logging
 
+logger = logging.getLogger(__name__)
 
-async def get_response(prompt: Prompt, database) -> Course:
+
+@timed("db.course.persist")
+async def _persist_course(database, section_docs: list[dict], course_doc: dict):
+    """
+    Write all placeholder sections and the course in two round trips
+    (one insert_many, one insert_one), inside a transaction when the
+    deployment supports one so a crash can't leave orphan sections.
+    """
     section_collection = database.get_collection("sections")
     course_collection = database.get_collection("courses")
+
+    if not await supports_transactions():
+        if section_docs:
+            await section_collection.insert_many(section_docs, ordered=True)
+        await course_collection.insert_one(course_doc)
+        return
+
+    async with await database.client.start_session() as session:
+        async with session.start_transaction():
+            if section_docs:
+                await section_collection.insert_many(
+                    section_docs, ordered=True, session=session
+                )
+            await course_collection.insert_one(course_doc, session=session)
+
+
+def _description_payload(text: str, image_links: dict, ytvid_links: dict) -> str:
+    description_payload = {
+        "text": text,
+        "img_links": image_links,
+        "ytvid_links": ytvid_links,
+    }
+    try:
+        return json.dumps(description_payload)
+    except Exception:
+        return str(description_payload)
+
+
+async def _backfill_course_media(course_id: ObjectId, backfill, database) -> None:
+    with timed("media.backfill"):
+        fields = await backfill()
+    if not fields["image_links"] and not fields["ytvid_links"]:
+        MEDIA_BACKFILLS.labels("course", "empty").inc()
+        logger.warning("Media backfill for course %s found nothing", course_id)
+        return
+
+    await database.get_collection("courses").update_one(
+        {"_id": course_id},
+        {
+            "$set": {
+                "description": _description_payload(
+                    fields["description"], fields["image_links"], fields["ytvid_links"]
+                ),
+                "updated_at": datetime.now(timezone.utc),
+            }
+        },
+    )
+    MEDIA_BACKFILLS.labels("course", "updated").inc()
+    logger.info(
+        "Backfilled course %s media: images=%d, videos=%d",
+        course_id,
+        len(fields["image_links"]),
+        len(fields["ytvid_links"]),
+    )
+
+
+async def get_response(
+    prompt: Prompt, database, media_lookups: Optional[dict] = None
+) -> Course:
     prompt_data = prompt.model_dump()
 
     # Get course structure with media already fetched and placeholders replaced
-    response = await infer_course_structure(prompt_data["prompt_text"])
-    print("LLM Response with media:", response)
+    response = await infer_course_structure(
+        prompt_data["prompt_text"],
+        use_cache=not prompt_data.get("bypass_cache"),
+        media_lookups=media_lookups,
+    )
+    logger.debug("LLM response with media: %s", truncate(response))
 
+    if "retry_after" in response:
+        raise HTTPException(
+            status_code=503,
+            detail="Course generation is rate limited, retry later",
+            headers={"Retry-After": str(math.ceil(response["retry_after"]))},
+        )
+    if response.get("timed_out"):
+        raise HTTPException(status_code=504, detail="Course generation timed out")
     if "error" in response:
         raise HTTPException(
             status_code=500, detail="Failed to generate course structure"
@@ -26,12 +113,11 @@ async def get_response(prompt: Prompt, database) -> Course:
     ytvid_links = response.get("ytvid_links", {})
 
     section_titles = response.get("sections", [])
-    section_ids = []
 
     course_id = ObjectId()
 
-    for idx, title in enumerate(section_titles):
-        section_doc = {
+    section_docs = [
+        {
             "_id": ObjectId(),
             "course_id": None,  # set later by section inference flow
             "title": title,
@@ -44,20 +130,14 @@ async def get_response(prompt: Prompt, database) -> Course:
             },
             "order": idx,
         }
-        result = await section_collection.insert_one(section_doc)
-        section_ids.append(result.inserted_id)
+        for idx, title in enumerate(section_titles)
+    ]
+    section_ids = [doc["_id"] for doc in section_docs]
 
     # Build description payload with actual links
-    base_desc = response.get("description", "")
-    description_payload = {
-        "text": base_desc,
-        "img_links": image_links,
-        "ytvid_links": ytvid_links,
-    }
-    try:
-        final_desc = json.dumps(description_payload)
-    except Exception:
-        final_desc = str(description_payload)
+    final_desc = _description_payload(
+        response.get("description", ""), image_links, ytvid_links
+    )
 
     course_doc = {
         "_id": course_id,
@@ -74,13 +154,70 @@ async def get_response(prompt: Prompt, database) -> Course:
         "sections": section_ids,
         "section_titles": section_titles,
     }
-    await course_collection.insert_one(course_doc)
+    await _persist_course(database, section_docs, course_doc)
+
+    # media that missed the deadline is filled in once the providers answer
+    backfill = response.get("media_backfill")
+    if backfill is not None:
+        spawn(
+            _backfill_course_media(course_id, backfill, database),
+            name=f"backfill-course-{course_id}",
+        )
 
     return Course(**course_doc)
 
 
-async def get_user_courses(user_id: ObjectId, database) -> list[Course]:
+def _encode_cursor(created_at: datetime, course_id: ObjectId) -> str:
+    raw = json.dumps({"c": created_at.isoformat(), "i": str(course_id)})
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii")
+
+
+def _decode_cursor(cursor: str) -> tuple[datetime, ObjectId]:
+    try:
+        data = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+        return datetime.fromisoformat(data["c"]), ObjectId(data["i"])
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+async def get_user_courses(
+    user_id: ObjectId, database, limit: int = 20, cursor: Optional[str] = None
+) -> CoursePage:
+    """
+    One page of a user's courses, newest first, keyset-paginated on
+    (created_at, _id) and projected down to what the list page renders.
+    """
     collection = database.get_collection("courses")
-    cursor = collection.find({"user_id": user_id}).sort("created_at", -1)
-    courses = await cursor.to_list(length=100)
-    return [Course(**course) for course in courses]
+    match = {"user_id": user_id}
+    if cursor:
+        created_at, last_id = _decode_cursor(cursor)
+        match["$or"] = [
+            {"created_at": {"$lt": created_at}},
+            {"created_at": created_at, "_id": {"$lt": last_id}},
+        ]
+
+    pipeline = [
+        {"$match": match},
+        {"$sort": {"created_at": -1, "_id": -1}},
+        {"$limit": limit + 1},
+        {
+            "$project": {
+                "title": 1,
+                "prompt": 1,
+                "created_at": 1,
+                "section_count": {"$size": {"$ifNull": ["$sections", []]}},
+            }
+        },
+    ]
+    with timed("db.course.list"):
+        docs = await collection.aggregate(pipeline).to_list(length=limit + 1)
+
+    next_cursor = None
+    if len(docs) > limit:
+        docs = docs[:limit]
+        last = docs[-1]
+        next_cursor = _encode_cursor(last["created_at"], last["_id"])
+
+    return CoursePage(
+        items=[CourseSummary(**doc) for doc in docs], next_cursor=next_cursor
+    )
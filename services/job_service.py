@@ -0,0 +1,253 @@
+"""
+Durable generation jobs, stored in the `jobs` collection.
+
+A job goes queued -> running -> succeeded. Server-side failures are retried
+(back to queued after an exponential backoff) until max_attempts, after
+which the job is parked as "dead" for inspection; client errors (4xx) are
+not retried and end as "failed". A worker owns a running job through a
+lease it keeps renewing; if the worker dies the lease runs out and another
+worker reclaims the job. A worker that finds its lease gone (e.g. it was
+stalled long enough for the job to be reclaimed) abandons the job at once
+rather than keep running it alongside the new owner.
+"""
+
+import asyncio
+import logging
+import time
+from typing import Any, Optional
+from bson import ObjectId
+from bson.errors import InvalidId
+from fastapi import HTTPException
+from fastapi.encoders import jsonable_encoder
+from datetime import datetime, timedelta, timezone
+from config import JOB_LEASE_SECONDS, JOB_MAX_ATTEMPTS, JOB_RETRY_BASE_SECONDS
+from models.job_model import JobAccepted, JobStatus
+from models.prompt_model import Prompt
+from models.section_model import Section_request
+from services.batch_service import run_course_batch
+from services.course_service import get_response
+from services.section_service import get_section
+from utils.metrics import timed
+
+logger = logging.getLogger(__name__)
+
+QUEUED = "queued"
+RUNNING = "running"
+SUCCEEDED = "succeeded"
+FAILED = "failed"
+DEAD = "dead"
+# run_job outcome only, never stored: the lease was lost mid-run
+ABANDONED = "abandoned"
+
+
+async def enqueue_job(kind: str, payload: dict, user_id, database) -> dict:
+    now = datetime.now(timezone.utc)
+    job = {
+        "kind": kind,
+        "payload": payload,
+        "user_id": ObjectId(user_id),
+        "status": QUEUED,
+        "attempts": 0,
+        "max_attempts": JOB_MAX_ATTEMPTS,
+        "run_after": now,
+        "lease": None,
+        "error": None,
+        "result": None,
+        "created_at": now,
+        "updated_at": now,
+    }
+    with timed("db.job.insert"):
+        result = await database.get_collection("jobs").insert_one(job)
+    job["_id"] = result.inserted_id
+    logger.info("Enqueued %s job %s", kind, job["_id"])
+    return job
+
+
+def job_accepted(job: dict) -> JobAccepted:
+    return JobAccepted(
+        job_id=job["_id"], status=job["status"], status_url=f"/jobs/{job['_id']}"
+    )
+
+
+async def get_job(job_id: str, user_id, database) -> JobStatus:
+    try:
+        job_oid = ObjectId(job_id)
+    except (InvalidId, TypeError):
+        raise HTTPException(status_code=404, detail="Job not found")
+
+    job = await database.get_collection("jobs").find_one(
+        {"_id": job_oid, "user_id": ObjectId(user_id)}
+    )
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return JobStatus(**job)
+
+
+async def claim_job(database, worker_id: str) -> Optional[dict]:
+    """
+    Atomically take the next runnable job: the oldest queued one whose
+    backoff has elapsed, else a running one whose worker's lease expired.
+    """
+    jobs = database.get_collection("jobs")
+    now = datetime.now(timezone.utc)
+    update = {
+        "$set": {
+            "status": RUNNING,
+            "lease": {
+                "worker": worker_id,
+                "token": str(ObjectId()),
+                "expires_at": now + timedelta(seconds=JOB_LEASE_SECONDS),
+            },
+            "updated_at": now,
+        },
+        "$inc": {"attempts": 1},
+    }
+
+    job = await jobs.find_one_and_update(
+        {"status": QUEUED, "run_after": {"$lte": now}},
+        update,
+        sort=[("run_after", 1)],
+        return_document=True,
+    )
+    if job is None:
+        job = await jobs.find_one_and_update(
+            {"status": RUNNING, "lease.expires_at": {"$lt": now}},
+            update,
+            sort=[("lease.expires_at", 1)],
+            return_document=True,
+        )
+        if job is not None:
+            logger.warning("Reclaimed job %s after its lease expired", job["_id"])
+    return job
+
+
+async def renew_lease(database, job: dict) -> bool:
+    now = datetime.now(timezone.utc)
+    result = await database.get_collection("jobs").update_one(
+        {"_id": job["_id"], "lease.token": job["lease"]["token"]},
+        {
+            "$set": {
+                "lease.expires_at": now + timedelta(seconds=JOB_LEASE_SECONDS),
+                "updated_at": now,
+            }
+        },
+    )
+    return result.modified_count == 1
+
+
+async def complete_job(database, job: dict, result: Any) -> None:
+    await database.get_collection("jobs").update_one(
+        {"_id": job["_id"], "lease.token": job["lease"]["token"]},
+        {
+            "$set": {
+                "status": SUCCEEDED,
+                "result": result,
+                "error": None,
+                "updated_at": datetime.now(timezone.utc),
+            },
+            "$unset": {"lease": ""},
+        },
+    )
+
+
+async def fail_job(database, job: dict, error: str, retryable: bool = True) -> str:
+    """Record a failed attempt; returns the job's new status."""
+    now = datetime.now(timezone.utc)
+    fields = {"error": error, "updated_at": now}
+    if not retryable:
+        fields["status"] = FAILED
+    elif job["attempts"] >= job["max_attempts"]:
+        fields["status"] = DEAD
+    else:
+        fields["status"] = QUEUED
+        delay = JOB_RETRY_BASE_SECONDS * 2 ** (job["attempts"] - 1)
+        fields["run_after"] = now + timedelta(seconds=delay)
+
+    await database.get_collection("jobs").update_one(
+        {"_id": job["_id"], "lease.token": job["lease"]["token"]},
+        {"$set": fields, "$unset": {"lease": ""}},
+    )
+    return fields["status"]
+
+
+async def _run_course_job(payload: dict, database) -> Any:
+    course = await get_response(Prompt(**payload), database)
+    return jsonable_encoder(course)
+
+
+async def _run_section_job(payload: dict, database) -> Any:
+    section = await get_section(Section_request(**payload), database)
+    return jsonable_encoder(section)
+
+
+async def _run_course_batch_job(payload: dict, database) -> Any:
+    return await run_course_batch(payload["batch_id"], database)
+
+
+JOB_HANDLERS = {
+    "course": _run_course_job,
+    "section": _run_section_job,
+    "course_batch": _run_course_batch_job,
+}
+
+
+async def _keep_lease(database, job: dict) -> None:
+    """Renew the job's lease until cancelled; returns once the lease is lost."""
+    valid_until = time.monotonic() + JOB_LEASE_SECONDS
+    while True:
+        await asyncio.sleep(JOB_LEASE_SECONDS / 3)
+        renewing_at = time.monotonic()
+        try:
+            renewed = await renew_lease(database, job)
+        except Exception as e:
+            # the lease still held is good until it runs out; retry until then
+            if time.monotonic() < valid_until:
+                logger.warning(
+                    "Renewing the lease on job %s failed: %s", job["_id"], e
+                )
+                continue
+            logger.warning("Lease on job %s ran out: %s", job["_id"], e)
+            return
+        if not renewed:
+            logger.warning("Lost the lease on job %s", job["_id"])
+            return
+        valid_until = renewing_at + JOB_LEASE_SECONDS
+
+
+async def run_job(job: dict, database) -> str:
+    """Execute a claimed job and record the outcome; returns the final status."""
+    handler = JOB_HANDLERS.get(job["kind"])
+    if handler is None:
+        return await fail_job(
+            database, job, f"Unknown job kind {job['kind']!r}", retryable=False
+        )
+    if job["attempts"] > job["max_attempts"]:
+        # reclaimed from expired leases more often than it may be attempted
+        return await fail_job(database, job, "Worker lease expired on every attempt")
+
+    work = asyncio.create_task(handler(job["payload"], database))
+    heartbeat = asyncio.create_task(_keep_lease(database, job))
+    try:
+        with timed(f"job.{job['kind']}"):
+            await asyncio.wait({work, heartbeat}, return_when=asyncio.FIRST_COMPLETED)
+        if not work.done():
+            # the job may already be running elsewhere: stop rather than race it
+            work.cancel()
+            await asyncio.wait({work})
+            logger.warning("Abandoned job %s after losing its lease", job["_id"])
+            return ABANDONED
+        result = work.result()
+    except HTTPException as e:
+        logger.warning("Job %s failed: %s %s", job["_id"], e.status_code, e.detail)
+        return await fail_job(
+            database, job, str(e.detail), retryable=e.status_code >= 500
+        )
+    except Exception as e:
+        logger.exception("Job %s crashed", job["_id"])
+        return await fail_job(database, job, f"{type(e).__name__}: {e}")
+    finally:
+        heartbeat.cancel()
+        work.cancel()
+
+    await complete_job(database, job, result)
+    return SUCCEEDED
@@ -1,56 +1,319 @@
-import json
-import re
+import math
+import asyncio
+import logging
+from typing import Any, AsyncIterator, Callable, Optional
 from bson import ObjectId
 from fastapi import HTTPException
-from datetime import datetime, timezone
+from datetime import datetime, timedelta, timezone
 from models.section_model import Section_response, Section_request
-from utils.section_inference import infer_section_content
-from utils.media_fetcher import fetch_media_from_queries
+from utils.section_inference import infer_section_content, stream_section_content
+from utils.media_fetcher import MediaPipeline
+from config import (
+    MEDIA_DEADLINE_SECONDS,
+    PIPELINED_GENERATION,
+    SECTION_LEASE_SECONDS,
+    SECTION_LEASE_POLL_SECONDS,
+)
+from utils.logger import truncate
+from utils.metrics import timed, MEDIA_BACKFILLS
+from utils.background import spawn
 
+logger = logging.getLogger(__name__)
 
-async def get_section(section: Section_request, database) -> Section_response:
-    print("\n=== get_section called ===")
+# section_id -> in-flight generation task shared by every local requester
+_inflight: dict[str, asyncio.Task] = {}
+
+# emit(event, data): progress hook for streaming clients
+Emit = Callable[[str, Any], None]
+
+
+async def _acquire_lease(section_collection, section_oid: ObjectId) -> Optional[str]:
+    """
+    Atomically claim the right to generate a section. Succeeds only if the
+    section is still ungenerated and nobody holds a live lease; an expired
+    lease is reclaimed. Returns the lease token, or None if someone else owns it.
+    """
+    now = datetime.now(timezone.utc)
+    token = str(ObjectId())
+    claimed = await section_collection.find_one_and_update(
+        {
+            "_id": section_oid,
+            "course_id": None,
+            "$or": [
+                {"generation_lease": None},
+                {"generation_lease.expires_at": {"$lt": now}},
+            ],
+        },
+        {
+            "$set": {
+                "generation_lease": {
+                    "token": token,
+                    "expires_at": now + timedelta(seconds=SECTION_LEASE_SECONDS),
+                }
+            }
+        },
+    )
+    return token if claimed else None
+
+
+async def _release_lease(section_collection, section_oid: ObjectId, token: str):
+    await section_collection.update_one(
+        {"_id": section_oid, "generation_lease.token": token},
+        {"$unset": {"generation_lease": ""}},
+    )
+
+
+async def _generate_once(
+    section_doc: dict,
+    course_id: str,
+    course_title: str,
+    database,
+    emit: Optional[Emit] = None,
+) -> Section_response:
+    """
+    Generate the section exactly once across workers: whoever wins the lease
+    runs the LLM, everyone else polls until the document is filled in (or the
+    lease goes stale and can be reclaimed). emit, when given, receives
+    progress events for a streaming client.
+    """
+    section_collection = database.get_collection("sections")
+    section_oid = section_doc["_id"]
+
+    while True:
+        token = await _acquire_lease(section_collection, section_oid)
+        if token:
+            try:
+                return await _generate_section(
+                    section_doc, course_id, course_title, database, emit
+                )
+            finally:
+                await _release_lease(section_collection, section_oid, token)
+
+        logger.info("Section %s generation in progress elsewhere, waiting", section_oid)
+        if emit is not None:
+            emit("status", {"state": "waiting"})
+        while True:
+            await asyncio.sleep(SECTION_LEASE_POLL_SECONDS)
+            current = await section_collection.find_one({"_id": section_oid})
+            if not current:
+                raise HTTPException(status_code=404, detail="Section not found")
+            if current.get("course_id"):
+                return Section_response(**current)
+            lease = current.get("generation_lease")
+            if not lease:
+                break
+            expires_at = lease["expires_at"]
+            if expires_at.tzinfo is None:
+                expires_at = expires_at.replace(tzinfo=timezone.utc)
+            if expires_at < datetime.now(timezone.utc):
+                break
+
+
+async def _find_section(section: Section_request, database) -> tuple[dict, str]:
     section_collection = database.get_collection("sections")
-    course_collection = database["courses"]
     section = section.model_dump()
-    print(f"Section data: {section}")
     section_id = section["section_id"]
     course_id = section["course_id"]
-    print(f"Looking for section_id: {section_id}, course_id: {course_id}")
+    logger.debug("get_section section_id=%s course_id=%s", section_id, course_id)
 
-    section_doc = await section_collection.find_one({"_id": ObjectId(section_id)})
-    print(f"Section doc found: {section_doc is not None}")
+    with timed("db.section.find"):
+        section_doc = await section_collection.find_one({"_id": ObjectId(section_id)})
     if not section_doc:
         raise HTTPException(status_code=404, detail="Section not found")
+    return section_doc, course_id
 
-    print(f"Section doc has course_id: {section_doc.get('course_id')}")
-    if section_doc.get("course_id"):
-        print("Returning existing section with content")
-        return Section_response(**section_doc)
 
-    course_doc = await course_collection.find_one({"_id": ObjectId(course_id)})
-    print(f"Course doc found: {course_doc is not None}")
+async def _find_course_title(course_id: str, database) -> str:
+    with timed("db.course.find"):
+        course_doc = await database["courses"].find_one({"_id": ObjectId(course_id)})
     if not course_doc:
         raise HTTPException(status_code=404, detail="Course not found")
-    course_title = course_doc.get("title", "")
-    print(f"Course title: {course_title}")
+    return course_doc.get("title", "")
 
-    section_title = section_doc.get("title", "")
-    print(f"Section title: {section_title}")
-    print("Calling infer_section_content...")
 
-    section_data = await infer_section_content(section_title, course_title)
-    print(f"Section data received: {type(section_data)}")
-    print(
-        f"Section data keys: {section_data.keys() if isinstance(section_data, dict) else 'Not a dict'}"
+def _start_generation(
+    section_doc: dict,
+    course_id: str,
+    course_title: str,
+    database,
+    emit: Optional[Emit] = None,
+) -> asyncio.Task:
+    key = str(section_doc["_id"])
+    task = asyncio.create_task(
+        _generate_once(section_doc, course_id, course_title, database, emit)
+    )
+    _inflight[key] = task
+    task.add_done_callback(lambda _: _inflight.pop(key, None))
+    return task
+
+
+async def get_section(section: Section_request, database) -> Section_response:
+    section_doc, course_id = await _find_section(section, database)
+
+    if section_doc.get("course_id"):
+        logger.debug("Returning existing section %s", section_doc["_id"])
+        return Section_response(**section_doc)
+
+    course_title = await _find_course_title(course_id, database)
+
+    key = str(section_doc["_id"])
+    task = _inflight.get(key)
+    if task is None:
+        task = _start_generation(section_doc, course_id, course_title, database)
+    else:
+        logger.info("Joining in-flight generation for section %s", key)
+    # shield so one requester disconnecting doesn't cancel it for the others
+    return await asyncio.shield(task)
+
+
+async def stream_section(
+    section: Section_request, database
+) -> AsyncIterator[tuple[str, Any]]:
+    """
+    Streaming counterpart of get_section. Lookups (and their 404s) happen
+    before this returns; the iterator then yields ("text" | "heading" | "mcq"
+    | "media" | "status", data) events while the section is generated and
+    ends with ("section", Section_response) once it is persisted.
+    """
+    section_doc, course_id = await _find_section(section, database)
+    course_title = None
+    if not section_doc.get("course_id"):
+        course_title = await _find_course_title(course_id, database)
+    return _section_events(section_doc, course_id, course_title, database)
+
+
+async def _section_events(
+    section_doc: dict, course_id: str, course_title: Optional[str], database
+) -> AsyncIterator[tuple[str, Any]]:
+    if section_doc.get("course_id"):
+        yield "section", Section_response(**section_doc)
+        return
+
+    key = str(section_doc["_id"])
+    task = _inflight.get(key)
+    if task is not None:
+        # someone else's request owns the generation; all we can relay is the end
+        logger.info("Joining in-flight generation for section %s", key)
+        yield "status", {"state": "waiting"}
+        yield "section", await asyncio.shield(task)
+        return
+
+    queue: asyncio.Queue = asyncio.Queue()
+    task = _start_generation(
+        section_doc,
+        course_id,
+        course_title,
+        database,
+        emit=lambda event, data: queue.put_nowait((event, data)),
+    )
+    task.add_done_callback(lambda _: queue.put_nowait(None))
+    # the task keeps running if the client goes away, same as get_section
+    while (item := await queue.get()) is not None:
+        yield item
+    yield "section", await asyncio.shield(task)
+
+
+async def _relay_section_content(
+    section_title: str,
+    course_title: str,
+    emit: Optional[Emit],
+    media: MediaPipeline,
+) -> dict:
+    """
+    Stream the completion, starting each media lookup as soon as its query is
+    complete and passing everything else on to emit.
+    """
+    section_data = {"error": "Section stream ended without content"}
+    async for event, data in stream_section_content(section_title, course_title):
+        if event in ("content", "error"):
+            section_data = data
+        elif event == "media_query":
+            media.submit(data["kind"], data["key"], data["query"])
+        elif emit is not None:
+            emit(event, data)
+    return section_data
+
+
+async def _backfill_section_media(
+    section_id, course_id, media: MediaPipeline, database
+) -> None:
+    with timed("media.backfill"):
+        img_links, ytvid_links = await media.finish()
+    if not img_links and not ytvid_links:
+        MEDIA_BACKFILLS.labels("section", "empty").inc()
+        logger.warning("Media backfill for section %s found nothing", section_id)
+        return
+
+    # only the generation that was persisted may fill in its media
+    await database.get_collection("sections").update_one(
+        {"_id": ObjectId(section_id), "course_id": ObjectId(course_id)},
+        {
+            "$set": {
+                "content.image_links": list(img_links.values()),
+                "content.youtube_links": list(ytvid_links.values()),
+            }
+        },
+    )
+    MEDIA_BACKFILLS.labels("section", "updated").inc()
+    logger.info(
+        "Backfilled section %s media: images=%d, videos=%d",
+        section_id,
+        len(img_links),
+        len(ytvid_links),
+    )
+
+
+async def _generate_section(
+    section_doc: dict,
+    course_id: str,
+    course_title: str,
+    database,
+    emit: Optional[Emit] = None,
+) -> Section_response:
+    section_collection = database.get_collection("sections")
+    section_id = section_doc["_id"]
+    section_title = section_doc.get("title", "")
+    logger.info(
+        "Generating section %s: %r (course %r)", section_id, section_title, course_title
     )
-    print("Processing section data...")
+
+    on_link = None
+    if emit is not None:
+        on_link = lambda kind, key, url: emit(
+            "media", {"kind": kind, "key": key, "url": url}
+        )
+    media = MediaPipeline(on_link)
+
+    if emit is None and not PIPELINED_GENERATION:
+        section_data = await infer_section_content(section_title, course_title)
+    else:
+        try:
+            section_data = await _relay_section_content(
+                section_title, course_title, emit, media
+            )
+        except BaseException:
+            media.cancel()
+            raise
     if "error" in section_data:
-        print(f"Error in section data: {section_data['error']}")
+        media.cancel()
+        logger.error(
+            "Section %s generation failed: %s", section_id, section_data["error"]
+        )
+        if section_data.get("timed_out"):
+            raise HTTPException(
+                status_code=504, detail="Section generation timed out"
+            )
+        if "retry_after" in section_data:
+            raise HTTPException(
+                status_code=503,
+                detail="Section generation is rate limited, retry later",
+                headers={
+                    "Retry-After": str(math.ceil(section_data["retry_after"]))
+                },
+            )
         raise HTTPException(
             status_code=500, detail="Failed to generate section content"
         )
-    print("successfully inferred section content")
     # Extract data from new format
     text = section_data.get("text", "")
     image_queries = section_data.get("image_queries", {})
@@ -58,23 +321,29 @@ async def get_section(section: Section_request, database) -> Section_response:
     headings = section_data.get("headings", {})
     mcqs = section_data.get("mcqs", [])
 
-    print(
-        f"Extracted - text length: {len(text)}, image_queries: {len(image_queries)}, ytvid_queries: {len(ytvid_queries)}"
+    logger.debug(
+        "Section %s parsed: text=%d chars, image_queries=%d, ytvid_queries=%d",
+        section_id,
+        len(text),
+        len(image_queries),
+        len(ytvid_queries),
     )
 
-    # Fetch actual media from queries
-    print("Fetching media from queries...")
-    img_links, ytvid_links = await fetch_media_from_queries(
-        image_queries, ytvid_queries
+    # Fetch actual media from queries; in pipelined mode most lookups are
+    # already running (or done) by now and this only picks up stragglers
+    media.submit_queries(image_queries, ytvid_queries)
+    with timed("media.join"):
+        img_links, ytvid_links = await media.results(MEDIA_DEADLINE_SECONDS or None)
+    logger.debug(
+        "Section %s media: images=%d, videos=%d",
+        section_id,
+        len(img_links),
+        len(ytvid_links),
     )
-    print(f"Media fetched - images: {len(img_links)}, videos: {len(ytvid_links)}")
 
     # Don't replace placeholders in text - keep them for frontend rendering
     # The frontend will handle replacing placeholders with embedded components
 
-    print(f"Text length: {len(text)}")
-    print("Updating section in database...")
-
     # Prepare content in the expected format with separate arrays
     content_dict = {
         "text": text,  # Keep placeholders in text
@@ -84,26 +353,44 @@ async def get_section(section: Section_request, database) -> Section_response:
         "headers": headings,
     }
 
-    await section_collection.update_one(
-        {"_id": ObjectId(section_id)},
-        {"$set": {"course_id": ObjectId(course_id), "content": content_dict}},
-    )
-    print("Section updated successfully")
+    # Only the first completed generation is persisted
+    with timed("db.section.update"):
+        persisted = await section_collection.update_one(
+            {"_id": ObjectId(section_id), "course_id": None},
+            {
+                "$set": {"course_id": ObjectId(course_id), "content": content_dict},
+                "$unset": {"generation_lease": ""},
+            },
+        )
 
-    updated_section_doc = await section_collection.find_one(
-        {"_id": ObjectId(section_id)}
-    )
-    print(f"Updated section doc retrieved: {updated_section_doc is not None}")
-    print(
-        f"Updated section doc keys: {list(updated_section_doc.keys()) if updated_section_doc else 'None'}"
-    )
-    print("Creating Section_response...")
+        updated_section_doc = await section_collection.find_one(
+            {"_id": ObjectId(section_id)}
+        )
+
+    # media that missed the deadline is filled in once the providers answer,
+    # unless another generation was persisted first
+    if media.pending and not persisted.modified_count:
+        media.cancel()
+    elif media.pending:
+        logger.info(
+            "Section %s: %d media lookups unresolved at the deadline, backfilling",
+            section_id,
+            len(media.pending),
+        )
+        spawn(
+            _backfill_section_media(section_id, course_id, media, database),
+            name=f"backfill-section-{section_id}",
+        )
 
     try:
         response = Section_response(**updated_section_doc)
-        print(f"Section_response created successfully")
+        logger.info("Section %s generated", section_id)
         return response
     except Exception as e:
-        print(f"ERROR creating Section_response: {e}")
-        print(f"updated_section_doc: {updated_section_doc}")
+        logger.error(
+            "Invalid section document %s: %s (%s)",
+            section_id,
+            e,
+            truncate(updated_section_doc),
+        )
         raise
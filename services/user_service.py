@@ -5,43 +5,59 @@ from schemas.user_schema import UserInDB
 from bson import ObjectId
 from fastapi import HTTPException
 from datetime import datetime, timezone
-from auth.password_handler import get_password_hash, validate_password
+from auth.password_handler import get_password_hash_async, validate_password
+from utils.metrics import timed
+import logging
+
+logger = logging.getLogger(__name__)
 
 
 async def create_user(user: UserCreate, database: AsyncIOMotorDatabase) -> UserResponse:
-    print("create_user start", user.email)
+    logger.debug("create_user start %s", user.email)
     collection = database.get_collection("users")
 
     if await get_user_by_email(user.email, database):
-        print("create_user duplicate email", user.email)
+        logger.warning("create_user duplicate email %s", user.email)
         raise HTTPException(
             status_code=400, detail="User with this email already exists"
         )
 
     if await get_user_by_username(user.username, database):
-        print("create_user duplicate username", user.username)
+        logger.warning("create_user duplicate username %s", user.username)
         raise HTTPException(
             status_code=400, detail="User with this username already exists"
         )
 
     if not validate_password(user.password):
-        print("create_user weak password", user.email)
+        logger.warning("create_user weak password %s", user.email)
         raise HTTPException(
             status_code=400,
             detail="Password must be at least 8 characters and contain uppercase, lowercase, number, and special character",
         )
 
     user_dict = user.model_dump()
-    user_dict["password_hash"] = get_password_hash(user_dict.pop("password"))
+    user_dict["password_hash"] = await get_password_hash_async(user_dict.pop("password"))
     user_dict["created_at"] = datetime.now(timezone.utc)
     user_dict["is_active"] = True
     user_dict["is_admin"] = False
     user_dict["roles"] = ["user", "course", "section"]
     user_dict["profile_picture"] = None
 
-    result = await collection.insert_one(user_dict)
+    try:
+        with timed("db.user.insert"):
+            result = await collection.insert_one(user_dict)
+    except Exception as e:
+        # Unique indexes on email/username catch registrations that raced
+        # past the checks above (11000 = duplicate key)
+        if getattr(e, "code", None) == 11000:
+            field = "username" if "username" in str(e) else "email"
+            logger.warning("create_user duplicate on insert %s", field)
+            raise HTTPException(
+                status_code=400, detail=f"User with this {field} already exists"
+            )
+        raise
     user_dict["_id"] = result.inserted_id
-    print("create_user ok", user.email)
+    logger.info("create_user ok %s", user.email)
     return UserResponse(**user_dict)
 
 
@@ -50,14 +66,15 @@ async def get_user_by_id(id: str, database: AsyncIOMotorDatabase) -> Optional[Us
     try:
         id = ObjectId(id)
     except:
-        print("get_user_by_id invalid")
+        logger.warning("get_user_by_id invalid")
         raise HTTPException(status_code=400, detail="Invalid user id")
 
-    user = await collection.find_one({"_id": id})
+    with timed("db.user.find"):
+        user = await collection.find_one({"_id": id})
     if user:
-        print("get_user_by_id found")
+        logger.debug("get_user_by_id found")
         return UserInDB(**user)
-    print("get_user_by_id not found")
+    logger.debug("get_user_by_id not found")
     return None
 
 
@@ -65,11 +82,12 @@ async def get_user_by_email(
     email: str, database: AsyncIOMotorDatabase
 ) -> Optional[UserInDB]:
     collection = database.get_collection("users")
-    user = await collection.find_one({"email": email})
+    with timed("db.user.find"):
+        user = await collection.find_one({"email": email})
     if user:
-        print("get_user_by_email found", email)
+        logger.debug("get_user_by_email found %s", email)
         return UserInDB(**user)
-    print("get_user_by_email not found", email)
+    logger.debug("get_user_by_email not found %s", email)
     return None
 
 
@@ -77,11 +95,12 @@ async def get_user_by_username(
     username: str, database: AsyncIOMotorDatabase
 ) -> Optional[UserInDB]:
     collection = database.get_collection("users")
-    user = await collection.find_one({"username": username})
+    with timed("db.user.find"):
+        user = await collection.find_one({"username": username})
     if user:
-        print("get_user_by_username found", username)
+        logger.debug("get_user_by_username found %s", username)
         return UserInDB(**user)
-    print("get_user_by_username not found", username)
+    logger.debug("get_user_by_username not found %s", username)
     return None
 
 
@@ -0,0 +1,43 @@
+"""
+Fire-and-forget tasks that outlive the request that started them (e.g. media
+backfill). A reference is kept until each task ends so it can't be garbage
+collected mid-flight, failures are logged, and shutdown gives the stragglers
+a bounded amount of time to finish.
+"""
+
+import asyncio
+import logging
+from typing import Coroutine
+
+logger = logging.getLogger(__name__)
+
+_tasks: set[asyncio.Task] = set()
+
+
+def _finished(task: asyncio.Task) -> None:
+    _tasks.discard(task)
+    if not task.cancelled() and task.exception() is not None:
+        logger.error(
+            "Background task %s failed",
+            task.get_name(),
+            exc_info=task.exception(),
+        )
+
+
+def spawn(coro: Coroutine, name: str) -> asyncio.Task:
+    task = asyncio.create_task(coro, name=name)
+    _tasks.add(task)
+    task.add_done_callback(_finished)
+    return task
+
+
+async def drain(timeout: float) -> None:
+    """Wait up to `timeout` seconds for running tasks, then cancel the rest."""
+    if not _tasks:
+        return
+    logger.info("Waiting for %d background tasks", len(_tasks))
+    _, pending = await asyncio.wait(set(_tasks), timeout=timeout)
+    for task in pending:
+        task.cancel()
+    if pending:
+        logger.warning("Cancelled %d unfinished background tasks", len(pending))
@@ -0,0 +1,82 @@
+"""
+Per-provider circuit breakers for the media APIs.
+
+After MEDIA_BREAKER_FAILURES consecutive failed calls a provider's breaker
+opens and lookups fail fast (no network, no timeout to sit through) for
+MEDIA_BREAKER_RESET_SECONDS. Then a single trial call is let through
+(half-open): success closes the breaker, failure opens it again. A trial
+that never reports back (e.g. cancelled) is given up on after another
+reset period.
+"""
+
+import logging
+import time
+from typing import Optional
+from config import MEDIA_BREAKER_FAILURES, MEDIA_BREAKER_RESET_SECONDS
+from utils.metrics import CIRCUIT_OPEN
+
+logger = logging.getLogger(__name__)
+
+
+class CircuitBreaker:
+    def __init__(self, provider: str, threshold: int, reset_seconds: float):
+        self.provider = provider
+        self.threshold = threshold
+        self.reset_seconds = reset_seconds
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self._trial_at: Optional[float] = None
+
+    @property
+    def is_open(self) -> bool:
+        return self.opened_at is not None
+
+    def allow(self) -> bool:
+        """Whether a call may go out now; claims the trial call when half-open."""
+        if self.opened_at is None:
+            return True
+        now = time.monotonic()
+        if self.retry_in() > 0:
+            return False
+        if self._trial_at is not None and now - self._trial_at < self.reset_seconds:
+            return False
+        self._trial_at = now
+        return True
+
+    def retry_in(self) -> float:
+        """Seconds until the next call would be allowed (0 when closed)."""
+        if self.opened_at is None:
+            return 0.0
+        return max(0.0, self.opened_at + self.reset_seconds - time.monotonic())
+
+    def record_success(self) -> None:
+        if self.opened_at is not None:
+            logger.info("%s circuit closed", self.provider)
+            CIRCUIT_OPEN.labels(self.provider).set(0)
+        self.failures = 0
+        self.opened_at = None
+        self._trial_at = None
+
+    def record_failure(self) -> None:
+        self.failures += 1
+        trial = self._trial_at is not None
+        if trial or (self.opened_at is None and self.failures >= self.threshold):
+            logger.warning(
+                "%s circuit open for %.0fs after %d failures",
+                self.provider,
+                self.reset_seconds,
+                self.failures,
+            )
+            CIRCUIT_OPEN.labels(self.provider).set(1)
+            self.opened_at = time.monotonic()
+            self._trial_at = None
+
+
+BREAKERS = {
+    "pexels": CircuitBreaker(
+        "pexels", MEDIA_BREAKER_FAILURES, MEDIA_BREAKER_RESET_SECONDS
+    ),
+    "youtube": CircuitBreaker(
+        "youtube", MEDIA_BREAKER_FAILURES, MEDIA_BREAKER_RESET_SECONDS
+    ),
+}
@@ -1,54 +1,56 @@
-import json
 import re
-import ast
-import os
-from groq import Groq
-from utils.media_fetcher import fetch_media_from_queries
-from config import GROQ_API_KEY, GROQ_MODEL
-
-
-def _extract_json_like(text: str) -> str:
-    if not isinstance(text, str):
-        text = str(text)
-    m = re.search(r"```(?:json)?\s*(.*?)\s*```", text, flags=re.S | re.I)
-    if m:
-        inner = m.group(1).strip()
-        return inner
-    text = re.sub(r"```.*?```", "", text, flags=re.S)
-    text = re.sub(r"`([^`]*)`", r"\1", text)
-    text = text.strip()
-    start = text.find("{")
-    end = text.rfind("}")
-    if start != -1 and end != -1 and end > start:
-        return text[start : end + 1]
-    return text
-
-
-def _find_balanced_json(text: str) -> str | None:
-    start = text.find("{")
-    if start == -1:
-        return None
-    depth = 0
-    for i in range(start, len(text)):
-        ch = text[i]
-        if ch == "{":
-            depth += 1
-        elif ch == "}":
-            depth -= 1
-            if depth == 0:
-                return text[start : i + 1]
-    return None
-
-
-def _clean_json_text(s: str) -> str:
-    if s.startswith("```") and s.endswith("```"):
-        s = s[3:-3].strip()
-    s = re.sub(r",\s*([}\]])", r"\1", s)
-    return s
-
-
-async def infer_course_structure(topic: str) -> dict:
-    prompt = f"""
+import functools
+from typing import Optional
+from utils.media_fetcher import MediaPipeline
+from config import MEDIA_DEADLINE_SECONDS, PIPELINED_GENERATION
+from utils.llm_client import cut_off, get_llm_client, llm_error
+from utils.model_router import ROUTES, routed_completion, routed_stream
+from utils.llm_cache import make_cache_key, get_cached_response, set_cached_response
+import logging
+from utils.logger import truncate
+from utils.json_stream import JSONStreamParser, parse_json_object
+from utils.metrics import timed, PARSE_FALLBACKS
+from utils.structured_output import conforms, json_mode, validated
+from models.generation_model import CourseOutline
+
+logger = logging.getLogger(__name__)
+
+
+def substitute_media_placeholders(
+    description: str, image_links: dict, ytvid_links: dict
+) -> str:
+    """Replace __imageN__/__ytvidN__ placeholders with resolved links."""
+    # First, replace found placeholders with actual links
+    # Replace image placeholders
+    for key, url in image_links.items():
+        placeholder = f"__image{key}__"
+        description = description.replace(placeholder, url)
+
+    # Replace video placeholders
+    for key, url in ytvid_links.items():
+        placeholder = f"__ytvid{key}__"
+        description = description.replace(placeholder, url)
+
+    # Remove any remaining unreplaced placeholders (for missing media)
+    # This handles cases like __image1__ when we only have image '2'
+    description = re.sub(r"__image\d+__", " ", description)
+    description = re.sub(r"__ytvid\d+__", " ", description)
+
+    # Clean up: remove comma/period followed by space that comes after URLs
+    # This handles "text https://url, other" -> "text https://url other"
+    description = re.sub(r"(https?://[^\s,\.]+)[,\.](\s)", r"\1\2", description)
+
+    # Clean up multiple spaces
+    description = re.sub(r"\s+", " ", description).strip()
+
+    return description
+
+
+COURSE_TEMPERATURE = 0.2
+
+_QUERY_KINDS = {"image_queries": "image", "ytvid_queries": "video"}
+
+COURSE_PROMPT_TEMPLATE = """
         You are an expert course designer and educator.
 
         Your task is to generate a high-quality course outline for the topic provided.
@@ -70,17 +72,11 @@ async def infer_course_structure(topic: str) -> dict:
         - Video queries should describe educational content: tutorials, explanations, demonstrations
         - Queries should be specific enough to find relevant, high-quality content
 
-        Generate a JSON object with the following structure:
+        Generate a JSON object with the following structure, keeping the keys in the order shown:
 
         {{
         "title": "Concise, professional course title derived from the topic",
 
-        "description": "A well-written introduction that flows naturally.
-                        Insert placeholders inline where media fits contextually.
-                        Example:
-                        'We begin by understanding the core architecture of modern systems __image1__,
-                        followed by a high-level overview of real-world applications __ytvid1__.'",
-
         "image_queries": {{
             "1": "specific search query for relevant diagram or infographic",
             "2": "another specific image search query"
@@ -91,6 +87,12 @@ async def infer_course_structure(topic: str) -> dict:
             "2": "optional second video search query if clearly valuable"
         }},
 
+        "description": "A well-written introduction that flows naturally.
+                        Insert placeholders inline where media fits contextually.
+                        Example:
+                        'We begin by understanding the core architecture of modern systems __image1__,
+                        followed by a high-level overview of real-world applications __ytvid1__.'",
+
         "sections": [
             "Clear, top-down section titles that guide the learner",
             "Start from fundamentals and progress logically",
@@ -118,99 +120,178 @@ async def infer_course_structure(topic: str) -> dict:
         "{topic}"
         """
 
-    api_key = GROQ_API_KEY
-    if not api_key:
+
+async def _generate_course_outline(prompt: str) -> dict:
+    client = get_llm_client()
+    if client is None:
         return {"error": "Missing GROQ_API_KEY"}
-    client = Groq(api_key=api_key)
     try:
-        groq_model = GROQ_MODEL
-        chat = client.chat.completions.create(
-            model=groq_model,
-            messages=[
-                {"role": "system", "content": "Return strictly valid JSON only."},
-                {"role": "user", "content": prompt},
-            ],
-            temperature=0.2,
-        )
+        with timed("llm.course"):
+            chat = await routed_completion(
+                client,
+                "outline",
+                messages=[
+                    {"role": "system", "content": "Return strictly valid JSON only."},
+                    {"role": "user", "content": prompt},
+                ],
+                temperature=COURSE_TEMPERATURE,
+                **json_mode(),
+            )
         raw = chat.choices[0].message.content
     except Exception as e:
-        return {"error": "Groq request failed", "detail": str(e)}
-    print("Raw LLM Response:", raw)
+        return llm_error(e)
+    logger.debug("Raw LLM response: %s", truncate(raw))
+    with timed("parse.course"):
+        return _parse_course_outline(raw, cut_off(chat))
+
+
+async def _stream_course_outline(prompt: str, media: MediaPipeline) -> dict:
+    """
+    Streaming variant of _generate_course_outline: each media query is handed
+    to `media` as soon as it is complete, so lookups overlap generation.
+    """
+    client = get_llm_client()
+    if client is None:
+        return {"error": "Missing GROQ_API_KEY"}
+
+    def on_value(path: tuple, value) -> None:
+        if len(path) == 2 and path[0] in _QUERY_KINDS:
+            media.submit(_QUERY_KINDS[path[0]], path[1], value)
+
+    parser = JSONStreamParser(on_value=on_value)
+    raw_parts = []
     try:
-        parsed_response = json.loads(raw)
-    except Exception:
-        parsed_response = None
+        async with timed("llm.course"):
+            async for delta in routed_stream(
+                client,
+                "outline",
+                messages=[
+                    {"role": "system", "content": "Return strictly valid JSON only."},
+                    {"role": "user", "content": prompt},
+                ],
+                temperature=COURSE_TEMPERATURE,
+            ):
+                raw_parts.append(delta)
+                parser.feed(delta)
+    except Exception as e:
+        return llm_error(e)
+    raw = "".join(raw_parts)
+    logger.debug("Raw LLM response: %s", truncate(raw))
+    return _checked_course_outline(
+        parser.close(), parser.repaired, raw, parser.truncated
+    )
 
-    if not parsed_response:
-        balanced = _find_balanced_json(raw)
-        if balanced:
-            cleaned = _clean_json_text(balanced)
-            try:
-                parsed_response = json.loads(cleaned)
-            except Exception:
-                try:
-                    parsed_response = ast.literal_eval(cleaned)
-                except Exception:
-                    pass
 
-    if not parsed_response:
-        candidate = _extract_json_like(raw)
-        if candidate and candidate != raw:
-            cleaned = _clean_json_text(candidate)
-            try:
-                parsed_response = json.loads(cleaned)
-            except Exception:
-                try:
-                    parsed_response = ast.literal_eval(cleaned)
-                except Exception:
-                    try:
-                        relaxed = cleaned.replace("'", '"')
-                        parsed_response = json.loads(relaxed)
-                    except Exception:
-                        pass
+def _parse_course_outline(raw: str, truncated: bool = False) -> dict:
+    parsed_response, repaired = parse_json_object(raw or "")
+    return _checked_course_outline(parsed_response, repaired, raw, truncated)
+
+
+def _checked_course_outline(
+    parsed_response: dict | None, repaired: bool, raw: str, truncated: bool = False
+) -> dict:
+    if truncated:
+        # closing a cut-off output would pass off half an outline as complete
+        PARSE_FALLBACKS.labels("course", "truncated").inc()
+        logger.warning("Course outline was cut off: %s", truncate(repr(raw)))
+        return {"error": "Model output was cut off", "raw": raw}
 
     if not parsed_response:
-        print("Raw model output (repr):")
-        print(repr(raw))
+        PARSE_FALLBACKS.labels("course", "failed").inc()
+        logger.warning("Failed to parse course outline: %s", truncate(repr(raw)))
         return {"error": "Failed to parse model output", "raw": raw}
 
+    if repaired:
+        PARSE_FALLBACKS.labels("course", "repaired").inc()
+    return parsed_response
+
+
+async def backfill_course_media(media: MediaPipeline, description: str) -> dict:
+    """Finish a course's media after the deadline; the fields to update."""
+    image_links, ytvid_links = await media.finish()
+    return {
+        "description": substitute_media_placeholders(
+            description, image_links, ytvid_links
+        ),
+        "image_links": image_links,
+        "ytvid_links": ytvid_links,
+    }
+
+
+async def infer_course_structure(
+    topic: str, use_cache: bool = True, media_lookups: Optional[dict] = None
+) -> dict:
+    """
+    Course outline with media resolved and placeholders replaced. Media still
+    unresolved after MEDIA_DEADLINE_SECONDS is left out, and the response
+    gets a "media_backfill" entry: a coroutine function that finishes the
+    lookups and returns the updated description/links.
+    """
+    prompt = COURSE_PROMPT_TEMPLATE.format(topic=topic)
+
+    cache_key = make_cache_key(
+        "course",
+        ROUTES["outline"].models,
+        COURSE_PROMPT_TEMPLATE,
+        COURSE_TEMPERATURE,
+        topic=topic,
+    )
+    media = MediaPipeline(shared=media_lookups)
+    parsed_response = await get_cached_response(cache_key) if use_cache else None
+    if parsed_response is not None and not conforms(CourseOutline, parsed_response):
+        # cached before schema validation, or under another schema
+        parsed_response = None
+    if parsed_response is None:
+        if PIPELINED_GENERATION:
+            parsed_response = await _stream_course_outline(prompt, media)
+        else:
+            parsed_response = await _generate_course_outline(prompt)
+        if "error" not in parsed_response:
+            parsed_response = await validated(
+                "course",
+                CourseOutline,
+                parsed_response,
+                f'The JSON is the outline of a course on "{topic}".',
+            )
+        if "error" in parsed_response:
+            media.cancel()
+            return parsed_response
+        await set_cached_response(cache_key, parsed_response)
+    else:
+        logger.info("LLM cache hit for course topic %r", topic)
+
     # Fetch actual media from queries and replace placeholders
     image_queries = parsed_response.get("image_queries", {})
     ytvid_queries = parsed_response.get("ytvid_queries", {})
 
     if image_queries or ytvid_queries:
         try:
-            print(f"Fetching media - Images: {image_queries}, Videos: {ytvid_queries}")
-            image_links, ytvid_links = await fetch_media_from_queries(
-                image_queries, ytvid_queries
+            logger.debug(
+                "Fetching media - images: %s, videos: %s", image_queries, ytvid_queries
+            )
+            # lookups already started mid-stream are picked up, not repeated
+            media.submit_queries(image_queries, ytvid_queries)
+            with timed("media.join"):
+                image_links, ytvid_links = await media.results(
+                    MEDIA_DEADLINE_SECONDS or None
+                )
+            logger.debug(
+                "Fetched media - images: %s, videos: %s", image_links, ytvid_links
             )
-            print(f"Fetched media - Images: {image_links}, Videos: {ytvid_links}")
-
-            # Replace placeholders in description with actual links
-            description = parsed_response.get("description", "")
-
-            # First, replace found placeholders with actual links
-            # Replace image placeholders
-            for key, url in image_links.items():
-                placeholder = f"__image{key}__"
-                description = description.replace(placeholder, url)
-
-            # Replace video placeholders
-            for key, url in ytvid_links.items():
-                placeholder = f"__ytvid{key}__"
-                description = description.replace(placeholder, url)
-
-            # Remove any remaining unreplaced placeholders (for missing media)
-            # This handles cases like __image1__ when we only have image '2'
-            description = re.sub(r"__image\d+__", " ", description)
-            description = re.sub(r"__ytvid\d+__", " ", description)
-
-            # Clean up: remove comma/period followed by space that comes after URLs
-            # This handles "text https://url, other" -> "text https://url other"
-            description = re.sub(r"(https?://[^\s,\.]+)[,\.](\s)", r"\1\2", description)
 
-            # Clean up multiple spaces
-            description = re.sub(r"\s+", " ", description).strip()
+            template = parsed_response.get("description", "")
+            with timed("placeholders.course"):
+                description = substitute_media_placeholders(
+                    template, image_links, ytvid_links
+                )
+            if media.pending:
+                logger.info(
+                    "%d media lookups unresolved at the deadline, backfilling",
+                    len(media.pending),
+                )
+                parsed_response["media_backfill"] = functools.partial(
+                    backfill_course_media, media, template
+                )
 
             # Update response with replaced description and links
             parsed_response["description"] = description
@@ -222,7 +303,8 @@ async def infer_course_structure(topic: str) -> dict:
             parsed_response.pop("ytvid_queries", None)
 
         except Exception as e:
-            print(f"Error fetching media: {e}")
+            media.cancel()
+            logger.error("Error fetching media: %s", e)
             # Continue with original response if media fetching fails
 
     return parsed_response
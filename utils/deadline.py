@@ -0,0 +1,33 @@
+"""
+Per-request time budget.
+
+The HTTP middleware starts a budget of REQUEST_DEADLINE_SECONDS for every
+request; code further down (e.g. the LLM call wrapper) asks how much of it is
+left to size its own timeouts. Like the request id, the deadline lives in a
+ContextVar, so tasks spawned while handling the request inherit it. Outside
+a request (worker jobs, scripts) there is no budget.
+"""
+
+import time
+from contextvars import ContextVar
+from typing import Optional
+
+
+class DeadlineExceeded(Exception):
+    """Work that couldn't finish within the request's budget."""
+
+
+_deadline_var: ContextVar[Optional[float]] = ContextVar("deadline", default=None)
+
+
+def start_deadline(seconds: Optional[float]) -> None:
+    """Give the current context `seconds` from now; None or 0 means no limit."""
+    _deadline_var.set(time.monotonic() + seconds if seconds else None)
+
+
+def remaining_seconds() -> Optional[float]:
+    """Seconds left in the current budget (may be negative), None if unlimited."""
+    deadline = _deadline_var.get()
+    if deadline is None:
+        return None
+    return deadline - time.monotonic()
@@ -0,0 +1,115 @@
+"""
+Record/replay of upstream HTTP traffic (Groq, Pexels, YouTube).
+
+Both the LLM client and the media client are plain httpx clients, so the
+fixture layer is an httpx transport:
+
+- record: requests go to the real upstream and every response body is saved,
+  byte for byte, under HTTP_FIXTURE_DIR
+- replay: responses come from the fixture directory only; a request with no
+  fixture fails loudly instead of touching the network. HTTP_FIXTURE_LATENCY
+  adds an artificial delay per response to mimic upstream timing.
+
+Fixtures are keyed by method, URL and body with credentials stripped, so the
+same prompt or query always maps to the same file.
+"""
+
+import asyncio
+import hashlib
+import json
+from pathlib import Path
+from typing import Optional
+import httpx
+from config import HTTP_FIXTURE_MODE, HTTP_FIXTURE_DIR, HTTP_FIXTURE_LATENCY
+
+# never part of the fixture key, never written to disk
+_SECRET_PARAMS = {"key", "api_key"}
+_DROPPED_RESPONSE_HEADERS = {"content-encoding", "content-length", "transfer-encoding"}
+
+
+def fixture_key(request: httpx.Request) -> str:
+    params = sorted(
+        (k, v) for k, v in request.url.params.multi_items() if k not in _SECRET_PARAMS
+    )
+    url = request.url.copy_with(query=None)
+    material = json.dumps(
+        [request.method, str(url), params, request.content.decode("utf-8", "replace")]
+    )
+    return hashlib.sha256(material.encode("utf-8")).hexdigest()
+
+
+class RecordingTransport(httpx.AsyncBaseTransport):
+    def __init__(self, directory: Path, inner: Optional[httpx.AsyncBaseTransport] = None):
+        self.directory = directory
+        self.inner = inner or httpx.AsyncHTTPTransport()
+        self.directory.mkdir(parents=True, exist_ok=True)
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        await request.aread()
+        response = await self.inner.handle_async_request(request)
+        upstream = httpx.Response(
+            status_code=response.status_code,
+            headers=response.headers,
+            stream=response.stream,
+            request=request,
+        )
+        body = await upstream.aread()
+        headers = {
+            k: v
+            for k, v in upstream.headers.items()
+            if k.lower() not in _DROPPED_RESPONSE_HEADERS
+        }
+
+        key = fixture_key(request)
+        (self.directory / f"{key}.body").write_bytes(body)
+        (self.directory / f"{key}.json").write_text(
+            json.dumps(
+                {
+                    "method": request.method,
+                    "url": str(request.url.copy_with(query=None)),
+                    "status_code": upstream.status_code,
+                    "headers": headers,
+                },
+                indent=2,
+            )
+        )
+        return httpx.Response(
+            upstream.status_code, headers=headers, content=body, request=request
+        )
+
+    async def aclose(self) -> None:
+        await self.inner.aclose()
+
+
+class ReplayTransport(httpx.AsyncBaseTransport):
+    def __init__(self, directory: Path, latency: float = 0.0):
+        self.directory = directory
+        self.latency = latency
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        await request.aread()
+        key = fixture_key(request)
+        meta_path = self.directory / f"{key}.json"
+        if not meta_path.exists():
+            raise httpx.ConnectError(
+                f"No fixture for {request.method} {request.url.copy_with(query=None)} "
+                f"({key}); record it first with HTTP_FIXTURE_MODE=record",
+                request=request,
+            )
+        meta = json.loads(meta_path.read_text())
+        body = (self.directory / f"{key}.body").read_bytes()
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        return httpx.Response(
+            meta["status_code"], headers=meta["headers"], content=body, request=request
+        )
+
+
+def fixture_transport() -> Optional[httpx.AsyncBaseTransport]:
+    """Transport for the configured HTTP_FIXTURE_MODE, or None when disabled."""
+    directory = Path(HTTP_FIXTURE_DIR)
+    if HTTP_FIXTURE_MODE == "record":
+        return RecordingTransport(directory)
+    if HTTP_FIXTURE_MODE == "replay":
+        return ReplayTransport(directory, HTTP_FIXTURE_LATENCY)
+    return None
@@ -0,0 +1,360 @@
+"""
+Tolerant, incremental JSON object parser for model output.
+
+Consumes text in one pass, either all at once or chunk by chunk as a
+completion streams in. Prose and markdown fences before the first "{" are
+skipped, trailing commas, missing commas/colons, single-quoted strings and
+Python literals (True/False/None) are accepted, and anything after the root
+object is ignored. close() closes whatever is still open, so output that was
+cut off can still be inspected, but flags it as `truncated`: such output is
+incomplete and must not be accepted as a result.
+"""
+
+import json
+import re
+from typing import Any, Callable, Optional
+
+_WS = re.compile(r"\s*")
+_NUMBER = re.compile(r"-?(?:\d+\.?\d*|\.\d+)(?:[eE][+-]?\d+)?")
+# a number cut off by the end of a chunk, e.g. "1." or "2e-"
+_NUMBER_TAIL = re.compile(r"[.eE][+-]?")
+_WORD = re.compile(r"[A-Za-z_][\w$-]*")
+_STRING_STOP = {'"': re.compile(r'["\\]'), "'": re.compile(r"['\\]")}
+_SURROGATES = re.compile("[\ud800-\udfff]")
+_ESCAPES = {
+    "n": "\n",
+    "t": "\t",
+    "r": "\r",
+    "b": "\b",
+    "f": "\f",
+    "/": "/",
+    "\\": "\\",
+    '"': '"',
+    "'": "'",
+}
+_LITERALS = {
+    "true": True,
+    "false": False,
+    "null": None,
+    "True": True,
+    "False": False,
+    "None": None,
+}
+
+# What the innermost container expects next.
+_KEY, _COLON, _VALUE, _AFTER = range(4)
+
+Path = tuple
+
+
+class JSONStreamParser:
+    """
+    feed() model output, then close() to get the root dict (or None).
+
+    on_value(path, value) is called for every completed value, innermost
+    first, with path being the tuple of keys/indexes from the root; the root
+    itself is reported with path (). Containers are attached to their parent
+    as soon as they open, so `result` can be inspected mid-stream.
+
+    `repaired` is set when the output needed any leniency; `truncated` when
+    close() found strings or containers still open, i.e. the output ended
+    before the root object did.
+    """
+
+    def __init__(self, on_value: Optional[Callable[[Path, Any], None]] = None):
+        self.on_value = on_value
+        self.repaired = False
+        self.truncated = False
+        self._buf = ""
+        self._pos = 0
+        # frames are [container, key_or_index, expecting]
+        self._stack: list[list] = []
+        # [quote, parts, is_key, parts_relayed] while inside a string
+        self._string: Optional[list] = None
+        self._root: Optional[dict] = None
+        self._done = False
+        self._closed = False
+
+    @property
+    def done(self) -> bool:
+        return self._done
+
+    @property
+    def result(self) -> Optional[dict]:
+        return self._root
+
+    @property
+    def path(self) -> Path:
+        """Path of the value currently being parsed."""
+        return tuple(frame[1] for frame in self._stack)
+
+    def string_delta(self) -> str:
+        """
+        Characters added to the string value being read since the last call,
+        so long fields can be relayed while they stream. Empty outside a
+        string value.
+        """
+        current = self._string
+        if current is None or current[2]:
+            return ""
+        parts, seen = current[1], current[3]
+        current[3] = len(parts)
+        return "".join(parts[seen:])
+
+    def feed(self, chunk: str) -> None:
+        if self._done or not chunk:
+            return
+        self._buf = self._buf[self._pos :] + chunk
+        self._pos = 0
+        self._run()
+
+    def close(self) -> Optional[dict]:
+        if not self._done:
+            self._closed = True
+            self._run()
+        if self._string is not None:
+            self.repaired = self.truncated = True
+            self._finish_string()
+        while self._stack:
+            self.repaired = self.truncated = True
+            self._close_container()
+        self._buf = ""
+        self._pos = 0
+        return self._root
+
+    def _run(self) -> None:
+        buf = self._buf
+        pos = self._pos
+        n = len(buf)
+        stack = self._stack
+
+        while pos < n and not self._done:
+            if self._string is not None:
+                pos, complete = self._read_string(buf, pos, n)
+                if not complete:
+                    break
+                continue
+
+            pos = _WS.match(buf, pos).end()
+            if pos >= n:
+                break
+
+            if not stack:
+                start = buf.find("{", pos)
+                if start == -1:
+                    if buf[pos:].strip():
+                        self.repaired = True
+                    pos = n
+                    break
+                if buf[pos:start].strip():
+                    self.repaired = True
+                self._root = {}
+                stack.append([self._root, None, _KEY])
+                pos = start + 1
+                continue
+
+            c = buf[pos]
+            frame = stack[-1]
+            is_object = type(frame[0]) is dict
+            state = frame[2]
+
+            if c == "}" or c == "]":
+                if state != _AFTER and (len(frame[0]) or (is_object and state != _KEY)):
+                    # trailing comma or a key with nothing after it
+                    self.repaired = True
+                if (c == "}") != is_object:
+                    self.repaired = True
+                pos += 1
+                self._close_container()
+                continue
+
+            if c == ",":
+                frame[2] = _KEY if is_object else _VALUE
+                pos += 1
+                continue
+
+            if is_object and state in (_KEY, _AFTER):
+                if state == _AFTER:
+                    self.repaired = True
+                if c == '"' or c == "'":
+                    if c == "'":
+                        self.repaired = True
+                    self._string = [c, [], True, 0]
+                    pos += 1
+                    continue
+                m = _WORD.match(buf, pos)
+                if m:
+                    if m.end() == n and not self._closed:
+                        break
+                    self.repaired = True
+                    frame[1] = m.group()
+                    frame[2] = _COLON
+                    pos = m.end()
+                    continue
+                self.repaired = True
+                pos += 1
+                continue
+
+            if is_object and state == _COLON:
+                if c == ":":
+                    frame[2] = _VALUE
+                    pos += 1
+                    continue
+                self.repaired = True
+                frame[2] = _VALUE
+
+            if c == ":":
+                self.repaired = True
+                pos += 1
+                continue
+
+            if not is_object and state == _AFTER:
+                self.repaired = True
+
+            if c == "{" or c == "[":
+                child = {} if c == "{" else []
+                self._attach(child)
+                stack.append([child, None, _KEY if c == "{" else _VALUE])
+                pos += 1
+                continue
+
+            if c == '"' or c == "'":
+                if c == "'":
+                    self.repaired = True
+                self._string = [c, [], False, 0]
+                pos += 1
+                continue
+
+            m = _NUMBER.match(buf, pos)
+            if m:
+                if not self._closed and (
+                    m.end() == n or _NUMBER_TAIL.fullmatch(buf, m.end())
+                ):
+                    break
+                text = m.group()
+                if "." in text or "e" in text or "E" in text:
+                    self._emit(float(text))
+                else:
+                    self._emit(int(text))
+                pos = m.end()
+                continue
+
+            m = _WORD.match(buf, pos)
+            if m:
+                if m.end() == n and not self._closed:
+                    break
+                word = m.group()
+                if word in _LITERALS:
+                    if word[0].isupper():
+                        self.repaired = True
+                    self._emit(_LITERALS[word])
+                else:
+                    self.repaired = True
+                    self._emit(word)
+                pos = m.end()
+                continue
+
+            if c == "-" and pos + 1 == n and not self._closed:
+                break
+            self.repaired = True
+            pos += 1
+
+        self._pos = pos
+
+    def _read_string(self, buf: str, pos: int, n: int) -> tuple[int, bool]:
+        quote, parts, _, _ = self._string
+        stop = _STRING_STOP[quote]
+        while True:
+            m = stop.search(buf, pos)
+            if m is None:
+                if pos < n:
+                    parts.append(buf[pos:])
+                return n, False
+            i = m.start()
+            if i > pos:
+                parts.append(buf[pos:i])
+            if buf[i] == quote:
+                self._finish_string()
+                return i + 1, True
+
+            # backslash escape; wait for the rest of it if the chunk ends here
+            if i + 1 >= n:
+                return i, False
+            esc = buf[i + 1]
+            if esc == "u":
+                if i + 6 > n and not self._closed:
+                    return i, False
+                try:
+                    parts.append(chr(int(buf[i + 2 : i + 6], 16)))
+                    pos = i + 6
+                except ValueError:
+                    parts.append(esc)
+                    pos = i + 2
+                continue
+            parts.append(_ESCAPES.get(esc, esc))
+            pos = i + 2
+
+    def _finish_string(self) -> None:
+        _, parts, is_key, _ = self._string
+        self._string = None
+        text = "".join(parts)
+        if _SURROGATES.search(text):
+            text = text.encode("utf-16", "surrogatepass").decode("utf-16", "replace")
+        if is_key:
+            frame = self._stack[-1]
+            frame[1] = text
+            frame[2] = _COLON
+        else:
+            self._emit(text)
+
+    def _attach(self, value: Any) -> None:
+        frame = self._stack[-1]
+        container = frame[0]
+        if type(container) is dict:
+            container[frame[1]] = value
+        else:
+            frame[1] = len(container)
+            container.append(value)
+        frame[2] = _AFTER
+
+    def _emit(self, value: Any) -> None:
+        self._attach(value)
+        if self.on_value is not None:
+            self.on_value(self.path, value)
+
+    def _close_container(self) -> None:
+        frame = self._stack.pop()
+        container = frame[0]
+        if not self._stack:
+            self._done = True
+            if self.on_value is not None:
+                self.on_value((), container)
+            return
+        if self.on_value is not None:
+            self.on_value(self.path, container)
+
+
+def parse_json_object(text: str) -> tuple[Optional[dict], bool]:
+    """
+    One-shot parse of a complete model output: (root object or None, repaired).
+
+    Well-formed output goes through the C json decoder; anything else gets a
+    single tolerant pass instead of a chain of retries. Output cut off before
+    the root object closed gives None.
+    """
+    if not isinstance(text, str):
+        text = str(text)
+    if text.lstrip()[:1] == "{":
+        try:
+            value = json.loads(text)
+        except (ValueError, RecursionError):
+            pass
+        else:
+            if isinstance(value, dict):
+                return value, False
+    parser = JSONStreamParser()
+    parser.feed(text)
+    root = parser.close()
+    if parser.truncated:
+        return None, True
+    return root, parser.repaired
@@ -0,0 +1,86 @@
+"""
+Content-addressed cache for parsed LLM responses.
+
+Keys are a SHA-256 over the stage, model, prompt template, temperature and the
+normalized prompt inputs, so any change to the template or model naturally
+misses the old entries. Entries live in the Mongo `llm_cache` collection and
+expire per entry through a TTL index on `expires_at`.
+"""
+
+import hashlib
+import json
+import logging
+import re
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+from db.connect import db
+from config import LLM_CACHE_ENABLED, LLM_CACHE_TTL_SECONDS
+
+logger = logging.getLogger(__name__)
+
+COLLECTION_NAME = "llm_cache"
+
+
+def _normalize(value: str) -> str:
+    return re.sub(r"\s+", " ", (value or "").strip().lower())
+
+
+def make_cache_key(
+    stage: str, model: str, template: str, temperature: float, **inputs: str
+) -> str:
+    template_hash = hashlib.sha256(template.encode("utf-8")).hexdigest()
+    material = json.dumps(
+        {
+            "stage": stage,
+            "model": model,
+            "template": template_hash,
+            "temperature": temperature,
+            "inputs": {k: _normalize(v) for k, v in sorted(inputs.items())},
+        },
+        sort_keys=True,
+    )
+    return hashlib.sha256(material.encode("utf-8")).hexdigest()
+
+
+async def get_cached_response(key: str) -> Optional[dict]:
+    """Return the cached parsed response for key, or None on a miss."""
+    if not LLM_CACHE_ENABLED:
+        return None
+    try:
+        doc = await db[COLLECTION_NAME].find_one(
+            {"_id": key, "expires_at": {"$gt": datetime.now(timezone.utc)}}
+        )
+    except Exception as e:
+        logger.warning("llm_cache lookup failed: %s", e)
+        return None
+    if not doc:
+        return None
+    try:
+        return json.loads(doc["response"])
+    except Exception:
+        return None
+
+
+async def set_cached_response(
+    key: str, response: dict, ttl_seconds: Optional[int] = None
+) -> None:
+    """Store a parsed response; the payload is kept JSON-encoded so arbitrary
+    model keys never clash with Mongo field-name rules."""
+    if not LLM_CACHE_ENABLED:
+        return
+    ttl = LLM_CACHE_TTL_SECONDS if ttl_seconds is None else ttl_seconds
+    try:
+        now = datetime.now(timezone.utc)
+        await db[COLLECTION_NAME].update_one(
+            {"_id": key},
+            {
+                "$set": {
+                    "response": json.dumps(response),
+                    "created_at": now,
+                    "expires_at": now + timedelta(seconds=ttl),
+                }
+            },
+            upsert=True,
+        )
+    except Exception as e:
+        logger.warning("llm_cache write failed: %s", e)
@@ -0,0 +1,252 @@
+"""
+Deadline-bound, hedged and retried LLM calls.
+
+Both inference modules go through `complete` (whole completion) or
+`stream_completion` (content deltas). Each call:
+
+- gets a deadline: the request's remaining budget minus
+  LLM_DEADLINE_RESERVE_SECONDS (left for media and persistence), capped at
+  LLM_TIMEOUT_SECONDS;
+- is hedged: if the first attempt hasn't answered after the stage's
+  LLM_HEDGE_PERCENTILE latency, an identical request is sent and whichever
+  finishes first wins; the other is cancelled. For streams, "answered"
+  means the first content chunk arrived;
+- is retried up to LLM_MAX_RETRIES times on connection errors and timeouts
+  while the deadline allows (429/5xx are already retried by the rate
+  limiter underneath). A stream that has started producing output is never
+  retried.
+
+Every attempt is counted in coursegen_llm_attempts_total with whether it won,
+lost the race or failed, so the hedging threshold can be tuned.
+"""
+
+import asyncio
+import logging
+import random
+import time
+from collections import deque
+from typing import Any, AsyncIterator, Awaitable, Callable, Optional
+import groq
+from groq import AsyncGroq
+from config import (
+    LLM_DEADLINE_RESERVE_SECONDS,
+    LLM_HEDGE_DELAY_SECONDS,
+    LLM_HEDGE_ENABLED,
+    LLM_HEDGE_MIN_DELAY_SECONDS,
+    LLM_HEDGE_MIN_SAMPLES,
+    LLM_HEDGE_PERCENTILE,
+    LLM_MAX_RETRIES,
+    LLM_TIMEOUT_SECONDS,
+    RATE_LIMIT_BACKOFF_BASE_SECONDS,
+)
+from utils.deadline import DeadlineExceeded, remaining_seconds
+from utils.llm_client import create_chat_completion
+from utils.metrics import LLM_ATTEMPTS, UPSTREAM_RETRIES
+
+logger = logging.getLogger(__name__)
+
+# recent latencies of winning attempts per (stage, model), for the hedge delay
+_latencies: dict[tuple[str, str], deque] = {}
+
+
+def _deadline_at(limit: Optional[float] = None) -> float:
+    budget = LLM_TIMEOUT_SECONDS if limit is None else min(LLM_TIMEOUT_SECONDS, limit)
+    remaining = remaining_seconds()
+    if remaining is not None:
+        budget = min(budget, remaining - LLM_DEADLINE_RESERVE_SECONDS)
+    if budget <= 0:
+        raise DeadlineExceeded("No request budget left for the LLM call")
+    return time.monotonic() + budget
+
+
+def hedge_delay(stage: str, model: str) -> float:
+    """The LLM_HEDGE_PERCENTILE latency of `model` on `stage`, given enough samples."""
+    samples = _latencies.get((stage, model))
+    if not samples or len(samples) < LLM_HEDGE_MIN_SAMPLES:
+        return LLM_HEDGE_DELAY_SECONDS
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, int(LLM_HEDGE_PERCENTILE * len(ordered)))
+    return max(LLM_HEDGE_MIN_DELAY_SECONDS, ordered[index])
+
+
+def _record_latency(stage: str, model: str, seconds: float) -> None:
+    _latencies.setdefault((stage, model), deque(maxlen=200)).append(seconds)
+
+
+def _succeeded(task: asyncio.Task) -> bool:
+    return task.done() and not task.cancelled() and task.exception() is None
+
+
+async def _race(
+    stage: str,
+    model: str,
+    attempt: Callable[[], Awaitable[Any]],
+    deadline_at: float,
+    discard: Optional[Callable[[Any], Awaitable[None]]] = None,
+) -> Any:
+    """
+    Run `attempt`, plus a hedge if it is slow; first success wins. `discard`
+    releases the result of a losing attempt that also finished.
+    """
+    started = time.monotonic()
+    labels: dict[asyncio.Task, str] = {asyncio.create_task(attempt()): "primary"}
+    hedge_at = started + hedge_delay(stage, model) if LLM_HEDGE_ENABLED else None
+    pending = set(labels)
+    winner: Optional[asyncio.Task] = None
+    error: Optional[BaseException] = None
+    try:
+        while pending:
+            wake_at = deadline_at if hedge_at is None else min(deadline_at, hedge_at)
+            done, pending = await asyncio.wait(
+                pending,
+                timeout=max(0.0, wake_at - time.monotonic()),
+                return_when=asyncio.FIRST_COMPLETED,
+            )
+            winner = next((t for t in done if _succeeded(t)), None)
+            for task in done:
+                if task is not winner:
+                    if not task.cancelled():
+                        error = task.exception()
+                    LLM_ATTEMPTS.labels(stage, labels[task], "failed").inc()
+            if winner is not None:
+                elapsed = time.monotonic() - started
+                _record_latency(stage, model, elapsed)
+                LLM_ATTEMPTS.labels(stage, labels[winner], "won").inc()
+                for task in pending:
+                    LLM_ATTEMPTS.labels(stage, labels[task], "lost").inc()
+                if labels[winner] == "hedge":
+                    logger.info("Hedged %s call won after %.1fs", stage, elapsed)
+                return winner.result()
+
+            if time.monotonic() >= deadline_at:
+                for task in pending:
+                    LLM_ATTEMPTS.labels(stage, labels[task], "failed").inc()
+                raise DeadlineExceeded(f"{stage} LLM call missed its deadline")
+            if hedge_at is not None and time.monotonic() >= hedge_at:
+                hedge_at = None
+                if pending:
+                    logger.info(
+                        "%s call slow after %.1fs, sending a hedge",
+                        stage,
+                        time.monotonic() - started,
+                    )
+                    hedge = asyncio.create_task(attempt())
+                    labels[hedge] = "hedge"
+                    pending.add(hedge)
+    finally:
+        losers = [t for t in labels if t is not winner]
+        for task in losers:
+            task.cancel()
+        if losers:
+            await asyncio.wait(losers)
+        if discard is not None:
+            for task in losers:
+                if _succeeded(task):
+                    await discard(task.result())
+    if error is None:
+        # every attempt ended cancelled from within: no answer, no error
+        raise DeadlineExceeded(f"{stage} LLM call was cancelled before answering")
+    raise error
+
+
+async def _with_retries(
+    stage: str,
+    model: str,
+    attempt: Callable[[], Awaitable[Any]],
+    deadline_at: float,
+    discard: Optional[Callable[[Any], Awaitable[None]]] = None,
+) -> Any:
+    retry = 0
+    while True:
+        try:
+            return await _race(stage, model, attempt, deadline_at, discard)
+        except groq.APIConnectionError as e:
+            delay = RATE_LIMIT_BACKOFF_BASE_SECONDS * 2**retry * random.uniform(0.5, 1)
+            if retry >= LLM_MAX_RETRIES or time.monotonic() + delay >= deadline_at:
+                raise
+            UPSTREAM_RETRIES.labels("groq", type(e).__name__).inc()
+            logger.warning(
+                "%s call failed (%s), retry %d/%d in %.1fs",
+                stage,
+                e,
+                retry + 1,
+                LLM_MAX_RETRIES,
+                delay,
+            )
+            await asyncio.sleep(delay)
+            retry += 1
+
+
+async def complete(
+    client: AsyncGroq, stage: str, budget: Optional[float] = None, **params
+) -> Any:
+    """
+    A whole chat completion (see module docstring); `budget` further caps
+    the call's deadline.
+    """
+    return await _with_retries(
+        stage,
+        params["model"],
+        lambda: create_chat_completion(client, **params),
+        _deadline_at(budget),
+    )
+
+
+async def _open_stream(client: AsyncGroq, params: dict) -> tuple[Any, Any, str]:
+    """Open a completion stream and wait for its first content."""
+    stream = await create_chat_completion(client, stream=True, **params)
+    chunks = stream.__aiter__()
+    try:
+        while True:
+            try:
+                chunk = await chunks.__anext__()
+            except StopAsyncIteration:
+                return stream, chunks, ""
+            delta = chunk.choices[0].delta.content if chunk.choices else None
+            if delta:
+                return stream, chunks, delta
+    except BaseException:
+        await stream.close()
+        raise
+
+
+async def _close_stream(opened: tuple[Any, Any, str]) -> None:
+    await opened[0].close()
+
+
+async def stream_completion(
+    client: AsyncGroq, stage: str, first_token_budget: Optional[float] = None, **params
+) -> AsyncIterator[str]:
+    """
+    Content deltas of a streamed chat completion (see module docstring);
+    `first_token_budget` caps the wait for the first content.
+    """
+    deadline_at = _deadline_at()
+    open_deadline_at = deadline_at
+    if first_token_budget is not None:
+        open_deadline_at = min(deadline_at, time.monotonic() + first_token_budget)
+    stream, chunks, first = await _with_retries(
+        f"{stage}.first_token",
+        params["model"],
+        lambda: _open_stream(client, params),
+        open_deadline_at,
+        discard=_close_stream,
+    )
+    try:
+        if first:
+            yield first
+        while True:
+            try:
+                chunk = await asyncio.wait_for(
+                    chunks.__anext__(), max(0.0, deadline_at - time.monotonic())
+                )
+            except StopAsyncIteration:
+                return
+            except asyncio.TimeoutError:
+                raise DeadlineExceeded(f"{stage} stream missed its deadline")
+            delta = chunk.choices[0].delta.content if chunk.choices else None
+            if delta:
+                yield delta
+    finally:
+        await stream.close()
+
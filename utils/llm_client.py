@@ -0,0 +1,110 @@
+"""
+Shared async LLM client.
+
+A single AsyncGroq instance is created lazily on first use and reused for the
+lifetime of the process, so every completion goes through the same pooled
+keep-alive connections instead of blocking the event loop on a fresh sync client.
+
+Completions go through `create_chat_completion`, which queues them behind the
+Groq rate limiter and retries 429/5xx responses (the SDK's own retries are
+turned off so the two don't multiply).
+"""
+
+from typing import Any, Optional
+import httpx
+from groq import AsyncGroq
+from utils.http_fixtures import fixture_transport
+from utils.deadline import DeadlineExceeded
+from utils.metrics import UPSTREAM_ERRORS
+from utils.rate_limit import LIMITERS, call_with_retry, observe_headers, retry_after_for
+from config import (
+    GROQ_API_KEY,
+    GROQ_BASE_URL,
+    GROQ_EXPECTED_COMPLETION_TOKENS,
+    LLM_MAX_CONNECTIONS,
+    LLM_MAX_KEEPALIVE_CONNECTIONS,
+    LLM_TIMEOUT_SECONDS,
+)
+
+_client: Optional[AsyncGroq] = None
+
+
+def get_llm_client() -> Optional[AsyncGroq]:
+    """
+    Return the app-wide AsyncGroq client, creating it on first call.
+    Returns None when GROQ_API_KEY is not configured.
+    """
+    global _client
+    if _client is not None:
+        return _client
+    if not GROQ_API_KEY:
+        return None
+
+    http_client = httpx.AsyncClient(
+        timeout=httpx.Timeout(LLM_TIMEOUT_SECONDS, connect=10.0),
+        limits=httpx.Limits(
+            max_connections=LLM_MAX_CONNECTIONS,
+            max_keepalive_connections=LLM_MAX_KEEPALIVE_CONNECTIONS,
+        ),
+        transport=fixture_transport(),
+        event_hooks={"response": [observe_headers("groq")]},
+    )
+    _client = AsyncGroq(
+        api_key=GROQ_API_KEY,
+        base_url=GROQ_BASE_URL,
+        http_client=http_client,
+        max_retries=0,
+    )
+    return _client
+
+
+def estimate_tokens(messages: list[dict]) -> int:
+    """Rough prompt size (~4 chars per token) plus the expected completion."""
+    chars = sum(len(m.get("content") or "") for m in messages)
+    return chars // 4 + GROQ_EXPECTED_COMPLETION_TOKENS
+
+
+async def create_chat_completion(client: AsyncGroq, **params) -> Any:
+    """
+    `client.chat.completions.create(**params)` within the Groq rate budget.
+    With stream=True only opening the stream is retried, never a stream
+    that has already produced output.
+    """
+    limiter = LIMITERS["groq"]
+    estimated = estimate_tokens(params.get("messages", []))
+    completion = await call_with_retry(
+        limiter, lambda: client.chat.completions.create(**params), tokens=estimated
+    )
+    usage = getattr(completion, "usage", None)
+    if usage is not None and usage.total_tokens:
+        limiter.settle(estimated, usage.total_tokens)
+    return completion
+
+
+def llm_error(e: Exception) -> dict:
+    """
+    Error dict for a failed completion; rate limits carry `retry_after`, a
+    missed request deadline sets `timed_out`.
+    """
+    UPSTREAM_ERRORS.labels("groq", type(e).__name__).inc()
+    error = {"error": "Groq request failed", "detail": str(e)}
+    if isinstance(e, DeadlineExceeded):
+        error["timed_out"] = True
+    retry_after = retry_after_for(e)
+    if retry_after is not None:
+        error["retry_after"] = retry_after
+    return error
+
+
+def cut_off(completion: Any) -> bool:
+    """Whether a completion stopped at max_tokens, leaving its content unfinished."""
+    return completion.choices[0].finish_reason == "length"
+
+
+async def close_llm_client() -> None:
+    """Close the shared client and its connection pool (called on shutdown)."""
+    global _client
+    if _client is None:
+        return
+    await _client.close()
+    _client = None
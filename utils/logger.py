@@ -0,0 +1,94 @@
+"""
+Non-blocking logging pipeline.
+
+Request-path code only enqueues records: a QueueHandler on the root logger
+pushes them onto an in-memory queue and a QueueListener thread formats and
+writes them to stdout. On the way in, records are stamped with the current
+request's correlation id, and DEBUG records are dropped unless the request
+was picked for debug sampling. Formatted messages are capped at
+LOG_MAX_PAYLOAD_CHARS so a raw model response can't flood the output.
+
+Usage:
+    logger = logging.getLogger(__name__)
+    logger.debug("raw response: %s", truncate(raw))
+"""
+
+import logging
+import logging.handlers
+import queue
+import random
+import sys
+import uuid
+from contextvars import ContextVar
+from typing import Any, Optional
+from config import LOG_LEVEL, LOG_DEBUG_SAMPLE_RATE, LOG_MAX_PAYLOAD_CHARS
+
+request_id_var: ContextVar[str] = ContextVar("request_id", default="-")
+debug_sampled_var: ContextVar[bool] = ContextVar("debug_sampled", default=True)
+
+_listener: Optional[logging.handlers.QueueListener] = None
+
+LOG_FORMAT = "%(asctime)s %(levelname)s [%(request_id)s] %(name)s: %(message)s"
+
+
+def truncate(value: Any, limit: int = LOG_MAX_PAYLOAD_CHARS) -> str:
+    """Cap a large payload (e.g. raw LLM output) before it goes into a log line."""
+    text = value if isinstance(value, str) else repr(value)
+    if len(text) <= limit:
+        return text
+    return f"{text[:limit]}... [truncated {len(text) - limit} chars]"
+
+
+def start_request_context(request_id: Optional[str] = None) -> str:
+    """Bind a correlation id (and a debug sampling decision) to this request."""
+    rid = request_id or uuid.uuid4().hex[:16]
+    request_id_var.set(rid)
+    debug_sampled_var.set(random.random() < LOG_DEBUG_SAMPLE_RATE)
+    return rid
+
+
+class RequestContextFilter(logging.Filter):
+    """Stamp records with the request id and drop unsampled DEBUG records."""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        record.request_id = request_id_var.get()
+        if record.levelno <= logging.DEBUG and not debug_sampled_var.get():
+            return False
+        return True
+
+
+class CappedFormatter(logging.Formatter):
+    def formatMessage(self, record: logging.LogRecord) -> str:
+        record.message = truncate(record.message)
+        return super().formatMessage(record)
+
+
+def configure_logging() -> None:
+    """Install the queue handler on the root logger. Safe to call twice."""
+    global _listener
+    if _listener is not None:
+        return
+
+    log_queue: queue.SimpleQueue = queue.SimpleQueue()
+    queue_handler = logging.handlers.QueueHandler(log_queue)
+    queue_handler.addFilter(RequestContextFilter())
+
+    stream_handler = logging.StreamHandler(sys.stdout)
+    stream_handler.setFormatter(CappedFormatter(LOG_FORMAT))
+
+    root = logging.getLogger()
+    root.handlers = [queue_handler]
+    root.setLevel(LOG_LEVEL)
+
+    _listener = logging.handlers.QueueListener(
+        log_queue, stream_handler, respect_handler_level=True
+    )
+    _listener.start()
+
+
+def shutdown_logging() -> None:
+    """Flush queued records and stop the writer thread."""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
@@ -0,0 +1,135 @@
+"""
+Two-tier cache for Pexels/YouTube query results.
+
+Tier 1 is an in-process LRU; tier 2 is the Mongo `media_cache` collection so
+results survive restarts and are shared between workers. Entries are keyed by
+provider + normalized query + result count and expire after a TTL. Empty
+results are cached too (with a shorter TTL) so dead queries don't burn quota.
+"""
+
+import re
+import logging
+from datetime import datetime, timedelta, timezone
+from typing import List, Optional
+from db.connect import db
+from utils.ttl_cache import TTLCache
+from config import (
+    MEDIA_CACHE_ENABLED,
+    MEDIA_CACHE_MAX_ENTRIES,
+    MEDIA_CACHE_TTL_SECONDS,
+    MEDIA_CACHE_NEGATIVE_TTL_SECONDS,
+)
+
+logger = logging.getLogger(__name__)
+
+COLLECTION_NAME = "media_cache"
+
+_lru = TTLCache(MEDIA_CACHE_MAX_ENTRIES, MEDIA_CACHE_TTL_SECONDS)
+
+_stats = {
+    "memory_hits": 0,
+    "mongo_hits": 0,
+    "misses": 0,
+    "negative_hits": 0,
+    "writes": 0,
+    "errors": 0,
+}
+
+
+def normalize_query(query: str) -> str:
+    return re.sub(r"\s+", " ", (query or "").strip().lower())
+
+
+def make_key(provider: str, query: str, max_results: int) -> str:
+    return f"{provider}:{max_results}:{normalize_query(query)}"
+
+
+def _ttl_for(results: List[str]) -> int:
+    return MEDIA_CACHE_TTL_SECONDS if results else MEDIA_CACHE_NEGATIVE_TTL_SECONDS
+
+
+async def get_cached(provider: str, query: str, max_results: int) -> Optional[List[str]]:
+    """
+    Look up a cached result list. Returns None on a miss; an empty list is a
+    valid (negative) hit.
+    """
+    if not MEDIA_CACHE_ENABLED:
+        return None
+    key = make_key(provider, query, max_results)
+
+    results = _lru.get(key)
+    if results is not None:
+        _stats["memory_hits"] += 1
+        if not results:
+            _stats["negative_hits"] += 1
+        return list(results)
+
+    try:
+        now = datetime.now(timezone.utc)
+        doc = await db[COLLECTION_NAME].find_one(
+            {"_id": key, "expires_at": {"$gt": now}}
+        )
+    except Exception as e:
+        _stats["errors"] += 1
+        logger.warning("media_cache lookup failed for %r: %s", key, e)
+        doc = None
+
+    if doc is None:
+        _stats["misses"] += 1
+        return None
+
+    results = doc.get("results", [])
+    expires_at = doc["expires_at"]
+    if expires_at.tzinfo is None:
+        expires_at = expires_at.replace(tzinfo=timezone.utc)
+    _lru.set(key, list(results), (expires_at - now).total_seconds())
+    _stats["mongo_hits"] += 1
+    if not results:
+        _stats["negative_hits"] += 1
+    return list(results)
+
+
+async def set_cached(
+    provider: str, query: str, max_results: int, results: List[str]
+) -> None:
+    """Store a successful lookup in both tiers."""
+    if not MEDIA_CACHE_ENABLED:
+        return
+    key = make_key(provider, query, max_results)
+    ttl = _ttl_for(results)
+    _lru.set(key, list(results), ttl)
+
+    try:
+        now = datetime.now(timezone.utc)
+        await db[COLLECTION_NAME].update_one(
+            {"_id": key},
+            {
+                "$set": {
+                    "provider": provider,
+                    "query": normalize_query(query),
+                    "results": list(results),
+                    "created_at": now,
+                    "expires_at": now + timedelta(seconds=ttl),
+                }
+            },
+            upsert=True,
+        )
+        _stats["writes"] += 1
+    except Exception as e:
+        _stats["errors"] += 1
+        logger.warning("media_cache write failed for %r: %s", key, e)
+
+
+def get_media_cache_stats() -> dict:
+    hits = _stats["memory_hits"] + _stats["mongo_hits"]
+    lookups = hits + _stats["misses"]
+    return {
+        **_stats,
+        "hits": hits,
+        "hit_rate": (hits / lookups) if lookups else 0.0,
+        "memory_entries": len(_lru),
+    }
+
+
+def clear_memory_cache() -> None:
+    _lru.clear()
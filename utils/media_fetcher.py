@@ -1,8 +1,56 @@
-import os
 import re
+import asyncio
 import httpx
-from typing import Dict, Optional, List
-from config import PEXELS_API_KEY, YOUTUBE_API_KEY
+import logging
+from typing import Callable, Dict, Optional, List
+from utils.media_cache import get_cached, set_cached
+from utils.metrics import timed, UPSTREAM_ERRORS
+from utils.http_fixtures import fixture_transport
+from utils.rate_limit import LIMITERS, call_with_retry
+from utils.circuit_breaker import BREAKERS
+from config import (
+    PEXELS_API_KEY,
+    YOUTUBE_API_KEY,
+    PEXELS_API_URL,
+    YOUTUBE_API_URL,
+    MEDIA_TIMEOUT_SECONDS,
+    MEDIA_MAX_CONNECTIONS,
+    PEXELS_MAX_CONCURRENCY,
+    YOUTUBE_MAX_CONCURRENCY,
+    MEDIA_BACKFILL_ATTEMPTS,
+    MEDIA_BACKFILL_RETRY_SECONDS,
+)
+
+logger = logging.getLogger(__name__)
+
+# Shared pooled client (created on first use) and per-provider concurrency caps
+_http_client: Optional[httpx.AsyncClient] = None
+_pexels_semaphore = asyncio.Semaphore(PEXELS_MAX_CONCURRENCY)
+_youtube_semaphore = asyncio.Semaphore(YOUTUBE_MAX_CONCURRENCY)
+_PROVIDERS = {"image": "pexels", "video": "youtube"}
+
+
+def get_http_client() -> httpx.AsyncClient:
+    """Return the shared keep-alive HTTP client used for all media lookups."""
+    global _http_client
+    if _http_client is None or _http_client.is_closed:
+        _http_client = httpx.AsyncClient(
+            timeout=MEDIA_TIMEOUT_SECONDS,
+            limits=httpx.Limits(
+                max_connections=MEDIA_MAX_CONNECTIONS,
+                max_keepalive_connections=MEDIA_MAX_CONNECTIONS,
+            ),
+            transport=fixture_transport(),
+        )
+    return _http_client
+
+
+async def close_http_client() -> None:
+    """Close the shared media HTTP client (called on shutdown)."""
+    global _http_client
+    if _http_client is not None:
+        await _http_client.aclose()
+        _http_client = None
 
 
 def extract_queries(text: str, max_queries: int = 3) -> List[str]:
@@ -25,89 +73,146 @@ def extract_queries(text: str, max_queries: int = 3) -> List[str]:
 
 async def is_valid_url(url: str) -> bool:
     try:
-        async with httpx.AsyncClient(timeout=5.0) as client:
-            response = await client.head(url, follow_redirects=True)
-            return response.status_code == 200
+        response = await get_http_client().head(
+            url, follow_redirects=True, timeout=5.0
+        )
+        return response.status_code == 200
     except Exception:
         return False
 
 
-async def search_images_pexels(query: str, max_results: int = 2) -> List[str]:
+class MediaUnavailable(Exception):
+    """The provider couldn't answer (circuit open or the call failed)."""
+
+
+async def fetch_pexels_images(query: str, max_results: int = 2) -> List[str]:
+    """Pexels image search; raises MediaUnavailable when Pexels can't answer."""
     pexels_api_key = PEXELS_API_KEY
     if not pexels_api_key:
-        print("Warning: PEXELS_API_KEY not found in environment")
+        logger.warning("PEXELS_API_KEY not found in environment")
         return []
 
+    cached = await get_cached("pexels", query, max_results)
+    if cached is not None:
+        return cached
+
+    breaker = BREAKERS["pexels"]
+    if not breaker.allow():
+        raise MediaUnavailable("pexels circuit open")
     try:
-        async with httpx.AsyncClient(timeout=10.0) as client:
-            response = await client.get(
-                "https://api.pexels.com/v1/search",
-                params={
-                    "query": query,
-                    "per_page": max_results,
-                    "orientation": "landscape",
-                },
-                headers={"Authorization": pexels_api_key},
-            )
+        async def request() -> httpx.Response:
+            # the slot is taken once the rate limiter lets the call through
+            async with _pexels_semaphore:
+                response = await get_http_client().get(
+                    PEXELS_API_URL,
+                    params={
+                        "query": query,
+                        "per_page": max_results,
+                        "orientation": "landscape",
+                    },
+                    headers={"Authorization": pexels_api_key},
+                )
+            LIMITERS["pexels"].observe(response.headers)
             response.raise_for_status()
-            data = response.json()
+            return response
 
-            images = []
-            photos = data.get("photos", [])
+        async with timed("media.pexels"):
+            response = await call_with_retry(LIMITERS["pexels"], request)
+        data = response.json()
 
-            for photo in photos:
-                img_url = photo.get("src", {}).get("large") or photo.get("src", {}).get(
-                    "original"
-                )
-                if img_url:
-                    images.append(img_url)
+        images = []
+        photos = data.get("photos", [])
 
-            return images[:max_results]
+        for photo in photos:
+            img_url = photo.get("src", {}).get("large") or photo.get("src", {}).get(
+                "original"
+            )
+            if img_url:
+                images.append(img_url)
 
     except Exception as e:
-        print(f"Error searching Pexels images for '{query}': {e}")
+        breaker.record_failure()
+        UPSTREAM_ERRORS.labels("pexels", type(e).__name__).inc()
+        logger.error("Error searching Pexels images for %r: %s", query, e)
+        raise MediaUnavailable(str(e)) from e
+
+    breaker.record_success()
+    images = images[:max_results]
+    await set_cached("pexels", query, max_results, images)
+    return images
+
+
+async def search_images_pexels(query: str, max_results: int = 2) -> List[str]:
+    try:
+        return await fetch_pexels_images(query, max_results)
+    except MediaUnavailable:
         return []
 
 
-async def search_youtube_video(query: str, max_results: int = 1) -> List[str]:
-    youtube_api_key = os.getenv("YOUTUBE_API_KEY")
+async def fetch_youtube_videos(query: str, max_results: int = 1) -> List[str]:
+    """YouTube video search; raises MediaUnavailable when YouTube can't answer."""
+    youtube_api_key = YOUTUBE_API_KEY
     if not youtube_api_key:
-        print("Warning: YOUTUBE_API_KEY not found in environment")
+        logger.warning("YOUTUBE_API_KEY not found in environment")
         return []
 
+    cached = await get_cached("youtube", query, max_results)
+    if cached is not None:
+        return cached
+
+    breaker = BREAKERS["youtube"]
+    if not breaker.allow():
+        raise MediaUnavailable("youtube circuit open")
     try:
-        async with httpx.AsyncClient(timeout=10.0) as client:
-            response = await client.get(
-                "https://www.googleapis.com/youtube/v3/search",
-                params={
-                    "part": "snippet",
-                    "q": query,
-                    "type": "video",
-                    "maxResults": max_results,
-                    "key": youtube_api_key,
-                    "videoEmbeddable": "true",
-                    "relevanceLanguage": "en",
-                },
-            )
+        async def request() -> httpx.Response:
+            # the slot is taken once the rate limiter lets the call through
+            async with _youtube_semaphore:
+                response = await get_http_client().get(
+                    YOUTUBE_API_URL,
+                    params={
+                        "part": "snippet",
+                        "q": query,
+                        "type": "video",
+                        "maxResults": max_results,
+                        "key": youtube_api_key,
+                        "videoEmbeddable": "true",
+                        "relevanceLanguage": "en",
+                    },
+                )
+            LIMITERS["youtube"].observe(response.headers)
             response.raise_for_status()
-            data = response.json()
+            return response
+
+        async with timed("media.youtube"):
+            response = await call_with_retry(LIMITERS["youtube"], request)
+        data = response.json()
+
+        videos = []
+        items = data.get("items", [])
+        for item in items:
+            video_id = item.get("id", {}).get("videoId")
+            if video_id:
+                videos.append(f"https://www.youtube.com/watch?v={video_id}")
+    except Exception as e:
+        breaker.record_failure()
+        UPSTREAM_ERRORS.labels("youtube", type(e).__name__).inc()
+        logger.error("Error fetching YouTube video for query %r: %s", query, e)
+        raise MediaUnavailable(str(e)) from e
 
-            videos = []
-            items = data.get("items", [])
-            for item in items:
-                video_id = item.get("id", {}).get("videoId")
-                if video_id:
-                    videos.append(f"https://www.youtube.com/watch?v={video_id}")
+    breaker.record_success()
+    await set_cached("youtube", query, max_results, videos)
+    return videos
 
-            return videos
 
-    except Exception as e:
-        print(f"Error fetching YouTube video for query '{query}': {e}")
+async def search_youtube_video(query: str, max_results: int = 1) -> List[str]:
+    try:
+        return await fetch_youtube_videos(query, max_results)
+    except MediaUnavailable:
         return []
 
 
 async def resolve_media_from_text(text: str) -> Dict:
-    youtube_api_key = os.getenv("YOUTUBE_API_KEY")
+    youtube_api_key = YOUTUBE_API_KEY
     queries = extract_queries(text)
 
     images = []
@@ -131,28 +236,156 @@ async def resolve_media_from_text(text: str) -> Dict:
     }
 
 
-async def fetch_media_from_queries(
-    image_queries: Dict[str, str], ytvid_queries: Dict[str, str]
-) -> tuple[Dict[str, str], Dict[str, str]]:
-    image_links = {}
-    ytvid_links = {}
-
-    for key, query in (image_queries or {}).items():
-        if query:
-            results = await search_images_pexels(query, max_results=1)
-            if results:
-                image_links[key] = results[0]
-                print(f"Found image for '{query}': {results[0]}")
+class MediaPipeline:
+    """
+    Media lookups started as soon as each query is known (e.g. while the
+    completion containing them is still streaming) and joined at the end.
+    on_link(kind, key, url), with kind "image" or "video", is called as each
+    lookup succeeds.
+
+    Pipelines given the same `shared` dict (e.g. every course of a batch)
+    run each distinct (kind, query) search once and share its result.
+
+    `results(timeout)` returns whatever resolved in time; lookups still
+    running or refused by a provider are left `pending`, and `finish()`
+    (meant for a background task) waits for / retries them.
+    """
+
+    def __init__(
+        self,
+        on_link: Optional[Callable[[str, str, str], None]] = None,
+        shared: Optional[Dict[tuple[str, str], asyncio.Task]] = None,
+    ):
+        self.on_link = on_link
+        self.shared = shared
+        self._queries: Dict[tuple[str, str], str] = {}
+        self._tasks: Dict[tuple[str, str], asyncio.Task] = {}
+
+    def submit(self, kind: str, key: str, query: str) -> None:
+        key = str(key)
+        if not query or not isinstance(query, str) or (kind, key) in self._tasks:
+            return
+        self._queries[(kind, key)] = query
+        self._tasks[(kind, key)] = asyncio.create_task(self._lookup(kind, key, query))
+
+    def submit_queries(
+        self, image_queries: Dict[str, str], ytvid_queries: Dict[str, str]
+    ) -> None:
+        for key, query in (image_queries or {}).items():
+            self.submit("image", key, query)
+        for key, query in (ytvid_queries or {}).items():
+            self.submit("video", key, query)
+
+    @staticmethod
+    async def _search(kind: str, query: str) -> List[str]:
+        if kind == "image":
+            return await fetch_pexels_images(query, max_results=1)
+        return await fetch_youtube_videos(query, max_results=1)
+
+    async def _lookup(self, kind: str, key: str, query: str) -> Optional[List[str]]:
+        """Found URLs ([] if none); None if the provider couldn't answer."""
+        try:
+            if self.shared is None:
+                found = await self._search(kind, query)
             else:
-                print(f"No image found for query '{query}'")
-
-    for key, query in (ytvid_queries or {}).items():
-        if query:
-            results = await search_youtube_video(query, max_results=1)
-            if results:
-                ytvid_links[key] = results[0]
-                print(f"Found video for '{query}': {results[0]}")
-            else:
-                print(f"No video found for query '{query}'")
+                search_key = (kind, " ".join(query.lower().split()))
+                search = self.shared.get(search_key)
+                if search is None or (
+                    search.done()
+                    and (search.cancelled() or search.exception() is not None)
+                ):
+                    search = asyncio.create_task(self._search(kind, query))
+                    self.shared[search_key] = search
+                # shield: cancelling this pipeline must not cancel a search
+                # other pipelines are waiting on
+                found = await asyncio.shield(search)
+        except MediaUnavailable:
+            return None
+        if found:
+            logger.debug("Found %s for %r: %s", kind, query, found[0])
+            if self.on_link is not None:
+                self.on_link(kind, key, found[0])
+        else:
+            logger.debug("No %s found for query %r", kind, query)
+        return found
+
+    @staticmethod
+    def _answered(task: asyncio.Task) -> bool:
+        return (
+            task.done()
+            and not task.cancelled()
+            and task.exception() is None
+            and task.result() is not None
+        )
+
+    @property
+    def pending(self) -> List[tuple[str, str]]:
+        """(kind, key) of lookups that are still running or went unanswered."""
+        return [
+            kind_key
+            for kind_key, task in self._tasks.items()
+            if not self._answered(task)
+        ]
+
+    def _links(self) -> tuple[Dict[str, str], Dict[str, str]]:
+        image_links = {}
+        ytvid_links = {}
+        for (kind, key), task in self._tasks.items():
+            if self._answered(task) and task.result():
+                links = image_links if kind == "image" else ytvid_links
+                links[key] = task.result()[0]
+        return image_links, ytvid_links
+
+    async def results(
+        self, timeout: Optional[float] = None
+    ) -> tuple[Dict[str, str], Dict[str, str]]:
+        """
+        Wait for the submitted lookups, at most `timeout` seconds if given;
+        links keyed like the queries. Unfinished lookups keep running.
+        """
+        if self._tasks:
+            done, _ = await asyncio.wait(list(self._tasks.values()), timeout=timeout)
+            for task in done:
+                if not task.cancelled() and task.exception() is not None:
+                    raise task.exception()
+        return self._links()
+
+    async def finish(self) -> tuple[Dict[str, str], Dict[str, str]]:
+        """
+        Background completion: wait for stragglers, then retry lookups the
+        provider refused, once its circuit lets calls through again, up to
+        MEDIA_BACKFILL_ATTEMPTS times. Returns every link found.
+        """
+        await self.results()
+        for _ in range(MEDIA_BACKFILL_ATTEMPTS):
+            retry = self.pending
+            if not retry:
+                break
+            delay = max(
+                [MEDIA_BACKFILL_RETRY_SECONDS]
+                + [BREAKERS[_PROVIDERS[kind]].retry_in() for kind, _ in retry]
+            )
+            await asyncio.sleep(delay)
+            for kind, key in retry:
+                self._tasks[(kind, key)] = asyncio.create_task(
+                    self._lookup(kind, key, self._queries[(kind, key)])
+                )
+            await self.results()
+        return self._links()
+
+    def cancel(self) -> None:
+        for task in self._tasks.values():
+            task.cancel()
 
-    return image_links, ytvid_links
+
+@timed("media.resolve")
+async def fetch_media_from_queries(
+    image_queries: Dict[str, str],
+    ytvid_queries: Dict[str, str],
+    on_link: Optional[Callable[[str, str, str], None]] = None,
+) -> tuple[Dict[str, str], Dict[str, str]]:
+    # Fan out every image and video lookup at once; the per-provider
+    # semaphores bound how many actually hit each API concurrently.
+    pipeline = MediaPipeline(on_link)
+    pipeline.submit_queries(image_queries, ytvid_queries)
+    return await pipeline.results()
@@ -0,0 +1,152 @@
+"""
+Prometheus instrumentation.
+
+- REQUEST_LATENCY: per-route HTTP latency, recorded by the middleware in main.py
+- STAGE_LATENCY: per-stage latency inside the generation pipeline, recorded
+  with `timed("stage")` as a context manager or async-function decorator
+- PARSE_FALLBACKS / UPSTREAM_ERRORS: counters for the slow/failing paths
+- RATE_LIMIT_WAIT / UPSTREAM_RETRIES: time spent queued for an upstream's
+  rate budget and retried 429/5xx responses (utils/rate_limit.py)
+- LLM_ATTEMPTS: primary/hedge LLM attempts and whether they won, lost the
+  race or failed (utils/llm_call.py)
+- MODEL_ROUTES / MODEL_LATENCY: which model served each stage (primary or
+  fallback, and why) and how long each model took (utils/model_router.py)
+- SCHEMA_REPAIRS: fields of model output that failed schema validation and
+  whether re-prompting for them fixed it (utils/structured_output.py)
+- CIRCUIT_OPEN / MEDIA_BACKFILLS: media provider breaker state and
+  generations whose media finished in the background
+
+Everything is served in Prometheus text format on /metrics.
+"""
+
+import functools
+import time
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+)
+
+# LLM and media stages run from milliseconds to a minute
+_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20, 40, 60, 120)
+
+REQUEST_LATENCY = Histogram(
+    "coursegen_http_request_duration_seconds",
+    "HTTP request latency by route",
+    ["method", "route", "status"],
+    buckets=_BUCKETS,
+)
+
+STAGE_LATENCY = Histogram(
+    "coursegen_stage_duration_seconds",
+    "Latency of individual pipeline stages (LLM, parsing, media, DB)",
+    ["stage"],
+    buckets=_BUCKETS,
+)
+
+PARSE_FALLBACKS = Counter(
+    "coursegen_llm_parse_fallbacks_total",
+    "Model outputs that needed a fallback parse strategy, failed to parse or were cut off",
+    ["stage", "strategy"],
+)
+
+UPSTREAM_ERRORS = Counter(
+    "coursegen_upstream_errors_total",
+    "Errors returned by upstream providers",
+    ["provider", "kind"],
+)
+
+RATE_LIMIT_WAIT = Histogram(
+    "coursegen_rate_limit_wait_seconds",
+    "Time spent waiting for an upstream provider's rate budget",
+    ["provider"],
+    buckets=(0, 0.01, 0.1, 0.5, 1, 2.5, 5, 10, 20, 40, 60),
+)
+
+UPSTREAM_RETRIES = Counter(
+    "coursegen_upstream_retries_total",
+    "Upstream calls retried after a 429 or 5xx response",
+    ["provider", "status"],
+)
+
+LLM_ATTEMPTS = Counter(
+    "coursegen_llm_attempts_total",
+    "LLM call attempts by stage, role (primary or hedge) and outcome",
+    ["stage", "attempt", "outcome"],
+)
+
+MODEL_ROUTES = Counter(
+    "coursegen_model_routes_total",
+    "Model calls by stage, model, role (primary/fallback) and outcome",
+    ["stage", "model", "role", "outcome"],
+)
+
+MODEL_LATENCY = Histogram(
+    "coursegen_model_latency_seconds",
+    "Latency of successful model calls by stage and model",
+    ["stage", "model"],
+    buckets=_BUCKETS,
+)
+
+SCHEMA_REPAIRS = Counter(
+    "coursegen_llm_schema_repairs_total",
+    "Output fields that failed schema validation, by stage, field and outcome",
+    ["stage", "field", "outcome"],
+)
+
+CIRCUIT_OPEN = Gauge(
+    "coursegen_circuit_open",
+    "1 while a provider's circuit breaker is open",
+    ["provider"],
+)
+
+MEDIA_BACKFILLS = Counter(
+    "coursegen_media_backfills_total",
+    "Generations persisted before their media resolved, by backfill outcome",
+    ["target", "outcome"],
+)
+
+
+class timed:
+    """
+    Record the duration of a block or an async function under a stage label:
+
+        with timed("llm.course"):
+            ...
+
+        @timed("media.resolve")
+        async def fetch(...): ...
+    """
+
+    def __init__(self, stage: str):
+        self.stage = stage
+        self._started = 0.0
+
+    def __enter__(self):
+        self._started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        STAGE_LATENCY.labels(self.stage).observe(time.perf_counter() - self._started)
+        return False
+
+    # also usable in `async with`, e.g. alongside a semaphore
+    async def __aenter__(self):
+        return self.__enter__()
+
+    async def __aexit__(self, *exc):
+        return self.__exit__(*exc)
+
+    def __call__(self, func):
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            with timed(self.stage):
+                return await func(*args, **kwargs)
+
+        return wrapper
+
+
+def render_metrics() -> tuple[bytes, str]:
+    return generate_latest(), CONTENT_TYPE_LATEST
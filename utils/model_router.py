@@ -0,0 +1,166 @@
+"""
+Per-stage model routing.
+
+ROUTES maps each generation stage to a primary model, a fallback model and a
+latency budget:
+
+- outline: the course outline, short and structured (small fast model)
+- section: the long-form section body (large model)
+- mcqs:    the section's multiple-choice questions (small fast model)
+- repair:  re-prompts for fields that failed schema validation (small fast model)
+
+The primary gets the stage's budget as its deadline (for streams, as the
+wait for the first content). When it misses the budget or fails, the same
+request goes to the fallback with whatever is left of the request's budget.
+Every decision is counted in coursegen_model_routes_total and every
+successful call's latency in coursegen_model_latency_seconds, per model.
+"""
+
+import logging
+import time
+from dataclasses import dataclass
+from typing import Any, AsyncIterator, Optional
+from groq import AsyncGroq
+from config import (
+    OUTLINE_MODEL,
+    OUTLINE_FALLBACK_MODEL,
+    OUTLINE_LATENCY_BUDGET_SECONDS,
+    SECTION_MODEL,
+    SECTION_FALLBACK_MODEL,
+    SECTION_LATENCY_BUDGET_SECONDS,
+    MCQ_MODEL,
+    MCQ_FALLBACK_MODEL,
+    MCQ_LATENCY_BUDGET_SECONDS,
+    REPAIR_MODEL,
+    REPAIR_FALLBACK_MODEL,
+    REPAIR_LATENCY_BUDGET_SECONDS,
+)
+from utils.deadline import DeadlineExceeded
+from utils.llm_call import complete, stream_completion
+from utils.metrics import MODEL_LATENCY, MODEL_ROUTES
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class Route:
+    primary: str
+    fallback: Optional[str]
+    budget_seconds: float
+
+    @property
+    def models(self) -> str:
+        """Identifies the route, e.g. for cache keys."""
+        return f"{self.primary}|{self.fallback or ''}"
+
+
+ROUTES = {
+    "outline": Route(
+        OUTLINE_MODEL, OUTLINE_FALLBACK_MODEL or None, OUTLINE_LATENCY_BUDGET_SECONDS
+    ),
+    "section": Route(
+        SECTION_MODEL, SECTION_FALLBACK_MODEL or None, SECTION_LATENCY_BUDGET_SECONDS
+    ),
+    "mcqs": Route(MCQ_MODEL, MCQ_FALLBACK_MODEL or None, MCQ_LATENCY_BUDGET_SECONDS),
+    "repair": Route(
+        REPAIR_MODEL, REPAIR_FALLBACK_MODEL or None, REPAIR_LATENCY_BUDGET_SECONDS
+    ),
+}
+
+
+def _primary_failed(stage: str, route: Route, e: Exception, started: float) -> None:
+    outcome = "over_budget" if isinstance(e, DeadlineExceeded) else "error"
+    MODEL_ROUTES.labels(stage, route.primary, "primary", outcome).inc()
+    logger.warning(
+        "%s: %s %s after %.1fs (%s), falling back to %s",
+        stage,
+        route.primary,
+        "missed its budget" if outcome == "over_budget" else "failed",
+        time.monotonic() - started,
+        e,
+        route.fallback,
+    )
+
+
+def _served(stage: str, model: str, role: str, started: float) -> None:
+    MODEL_ROUTES.labels(stage, model, role, "ok").inc()
+    MODEL_LATENCY.labels(stage, model).observe(time.monotonic() - started)
+
+
+async def routed_completion(client: AsyncGroq, stage: str, **params) -> Any:
+    """A whole chat completion from the stage's primary, else its fallback."""
+    route = ROUTES[stage]
+    started = time.monotonic()
+    try:
+        completion = await complete(
+            client,
+            stage,
+            budget=route.budget_seconds if route.fallback else None,
+            model=route.primary,
+            **params,
+        )
+    except Exception as e:
+        if not route.fallback:
+            MODEL_ROUTES.labels(stage, route.primary, "primary", "error").inc()
+            raise
+        _primary_failed(stage, route, e, started)
+    else:
+        _served(stage, route.primary, "primary", started)
+        return completion
+
+    started = time.monotonic()
+    try:
+        completion = await complete(client, stage, model=route.fallback, **params)
+    except Exception:
+        MODEL_ROUTES.labels(stage, route.fallback, "fallback", "error").inc()
+        raise
+    _served(stage, route.fallback, "fallback", started)
+    return completion
+
+
+async def routed_stream(client: AsyncGroq, stage: str, **params) -> AsyncIterator[str]:
+    """
+    Content deltas from the stage's primary; the fallback is used only if the
+    primary fails or misses the budget before producing any content.
+    """
+    route = ROUTES[stage]
+    model, role = route.primary, "primary"
+    started = time.monotonic()
+    deltas = stream_completion(
+        client,
+        stage,
+        first_token_budget=route.budget_seconds if route.fallback else None,
+        model=model,
+        **params,
+    )
+    try:
+        first = await deltas.__anext__()
+    except StopAsyncIteration:
+        first = ""
+    except Exception as e:
+        if not route.fallback:
+            MODEL_ROUTES.labels(stage, model, role, "error").inc()
+            raise
+        _primary_failed(stage, route, e, started)
+        model, role = route.fallback, "fallback"
+        started = time.monotonic()
+        deltas = stream_completion(client, stage, model=model, **params)
+        try:
+            first = await deltas.__anext__()
+        except StopAsyncIteration:
+            first = ""
+        except Exception:
+            MODEL_ROUTES.labels(stage, model, role, "error").inc()
+            raise
+
+    try:
+        if first:
+            yield first
+        async for delta in deltas:
+            yield delta
+    except Exception:
+        MODEL_ROUTES.labels(stage, model, role, "error").inc()
+        raise
+    finally:
+        await deltas.aclose()
+    _served(stage, model, role, started)
@@ -0,0 +1,255 @@
+"""
+Provider-aware throttling for upstream APIs (Groq, Pexels, YouTube).
+
+Every provider has a RateLimiter with token buckets sized from its configured
+budgets: requests per minute, plus tokens per minute for Groq (0 disables a
+bucket). Callers wait their turn in FIFO order for capacity instead of all
+firing at once and collecting 429s.
+
+The buckets are only a local estimate, so the limiter also listens to the
+provider: an httpx response hook feeds it every response's rate-limit headers
+(remaining/reset counters, Retry-After), and `call_with_retry` retries 429
+and 5xx responses with jittered exponential backoff. A 429 pauses the whole
+provider, not just the caller that hit it.
+"""
+
+import asyncio
+import logging
+import random
+import re
+import time
+from email.utils import parsedate_to_datetime
+from typing import Awaitable, Callable, Optional, TypeVar
+import httpx
+from config import (
+    GROQ_RPM,
+    GROQ_TPM,
+    PEXELS_RPM,
+    YOUTUBE_RPM,
+    RATE_LIMIT_MAX_RETRIES,
+    RATE_LIMIT_BACKOFF_BASE_SECONDS,
+    RATE_LIMIT_BACKOFF_MAX_SECONDS,
+)
+from utils.metrics import RATE_LIMIT_WAIT, UPSTREAM_RETRIES
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+RETRYABLE_STATUSES = {429, 500, 502, 503, 504}
+
+_DURATION_PART = re.compile(r"(\d+(?:\.\d+)?)(ms|h|m|s)")
+_DURATION_UNITS = {"ms": 0.001, "s": 1, "m": 60, "h": 3600}
+
+
+class TokenBucket:
+    """Refills continuously at per_minute/60 per second up to `capacity`."""
+
+    def __init__(self, per_minute: float, capacity: Optional[float] = None):
+        self.rate = per_minute / 60.0
+        self.capacity = capacity or per_minute
+        self.tokens = self.capacity
+        self._updated = time.monotonic()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def wait_time(self, amount: float) -> float:
+        """Seconds until `amount` can be taken (0 if it can be taken now)."""
+        self._refill()
+        amount = min(amount, self.capacity)
+        if self.tokens >= amount:
+            return 0.0
+        return (amount - self.tokens) / self.rate
+
+    def take(self, amount: float) -> None:
+        self._refill()
+        self.tokens -= amount
+
+    def clamp(self, remaining: float) -> None:
+        """Never believe we have more left than the provider says we do."""
+        self._refill()
+        self.tokens = min(self.tokens, remaining)
+
+
+class RateLimiter:
+    def __init__(self, provider: str, rpm: int = 0, tpm: int = 0):
+        self.provider = provider
+        self.requests = TokenBucket(rpm) if rpm > 0 else None
+        self.tokens = TokenBucket(tpm) if tpm > 0 else None
+        self.blocked_until = 0.0  # time.monotonic() deadline set by 429s/headers
+        self._turn = asyncio.Lock()  # waiters are served in arrival order
+
+    def block(self, seconds: float) -> None:
+        """Hold every caller of this provider for at least `seconds`."""
+        if seconds > 0:
+            self.blocked_until = max(self.blocked_until, time.monotonic() + seconds)
+
+    async def acquire(self, tokens: int = 0) -> None:
+        """Wait until one request (and `tokens` LLM tokens) fit the budget."""
+        started = time.monotonic()
+        async with self._turn:
+            while True:
+                wait = self.blocked_until - time.monotonic()
+                if self.requests is not None:
+                    wait = max(wait, self.requests.wait_time(1))
+                if self.tokens is not None and tokens:
+                    wait = max(wait, self.tokens.wait_time(tokens))
+                if wait <= 0:
+                    break
+                await asyncio.sleep(wait)
+            if self.requests is not None:
+                self.requests.take(1)
+            if self.tokens is not None and tokens:
+                self.tokens.take(tokens)
+        waited = time.monotonic() - started
+        RATE_LIMIT_WAIT.labels(self.provider).observe(waited)
+        if waited > 1:
+            logger.info("Waited %.1fs for %s rate limit", waited, self.provider)
+
+    def settle(self, estimated: int, actual: int) -> None:
+        """Correct the token bucket once the real usage of a call is known."""
+        if self.tokens is not None:
+            self.tokens.take(actual - estimated)
+
+    def observe(self, headers: httpx.Headers) -> None:
+        """Fold a response's rate-limit headers into the local budget."""
+        retry_after = parse_retry_after(headers.get("retry-after"))
+        if retry_after is not None:
+            self.block(retry_after)
+
+        # Groq: x-ratelimit-{remaining,reset}-{requests,tokens}
+        # Pexels: x-ratelimit-remaining / x-ratelimit-reset (epoch seconds)
+        for suffix, bucket in (
+            ("-requests", self.requests),
+            ("", self.requests),
+            ("-tokens", self.tokens),
+        ):
+            remaining = headers.get(f"x-ratelimit-remaining{suffix}")
+            if remaining is None:
+                continue
+            try:
+                remaining = float(remaining)
+            except ValueError:
+                continue
+            if bucket is not None:
+                bucket.clamp(remaining)
+            if remaining <= 0:
+                reset = parse_reset(headers.get(f"x-ratelimit-reset{suffix}"))
+                if reset is not None:
+                    self.block(reset)
+
+    def backoff(self, attempt: int, retry_after: Optional[float] = None) -> float:
+        """Delay before retry number `attempt` (0-based), with jitter."""
+        if retry_after is not None:
+            # honour the provider, spread the herd a little past it
+            return retry_after + random.uniform(0, RATE_LIMIT_BACKOFF_BASE_SECONDS)
+        ceiling = min(
+            RATE_LIMIT_BACKOFF_MAX_SECONDS,
+            RATE_LIMIT_BACKOFF_BASE_SECONDS * 2**attempt,
+        )
+        return random.uniform(ceiling / 2, ceiling)
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Retry-After as delta-seconds or an HTTP date."""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+def parse_reset(value: Optional[str]) -> Optional[float]:
+    """
+    Seconds until a rate-limit window resets: a duration such as "7.66s",
+    "1m30s" or "120ms", or a unix timestamp.
+    """
+    if not value:
+        return None
+    try:
+        number = float(value)
+    except ValueError:
+        parts = _DURATION_PART.findall(value)
+        if not parts:
+            return None
+        return sum(float(n) * _DURATION_UNITS[unit] for n, unit in parts)
+    if number > 1e9:
+        return max(0.0, number - time.time())
+    return number
+
+
+def error_status(e: Exception) -> tuple[Optional[int], Optional[httpx.Headers]]:
+    """HTTP status and headers of an httpx or Groq SDK status error."""
+    response = getattr(e, "response", None)
+    if not isinstance(response, httpx.Response):
+        return None, None
+    return response.status_code, response.headers
+
+
+def retry_after_for(e: Exception) -> Optional[float]:
+    """Retry-After hint of a 429 error, None if `e` isn't a rate-limit error."""
+    status, headers = error_status(e)
+    if status != 429:
+        return None
+    hint = parse_retry_after(headers.get("retry-after"))
+    return hint if hint is not None else RATE_LIMIT_BACKOFF_BASE_SECONDS
+
+
+async def call_with_retry(
+    limiter: RateLimiter, call: Callable[[], Awaitable[T]], tokens: int = 0
+) -> T:
+    """
+    Run `call` within the provider's budget, retrying 429/5xx responses up
+    to RATE_LIMIT_MAX_RETRIES times. Anything else, or the last failure,
+    is raised to the caller.
+    """
+    attempt = 0
+    while True:
+        await limiter.acquire(tokens)
+        try:
+            return await call()
+        except Exception as e:
+            status, headers = error_status(e)
+            if status not in RETRYABLE_STATUSES or attempt >= RATE_LIMIT_MAX_RETRIES:
+                raise
+            hint = parse_retry_after(headers.get("retry-after"))
+            delay = limiter.backoff(attempt, hint)
+            UPSTREAM_RETRIES.labels(limiter.provider, str(status)).inc()
+            logger.warning(
+                "%s returned %d, retry %d/%d in %.1fs",
+                limiter.provider,
+                status,
+                attempt + 1,
+                RATE_LIMIT_MAX_RETRIES,
+                delay,
+            )
+            if status == 429:
+                limiter.block(delay)
+            else:
+                await asyncio.sleep(delay)
+            attempt += 1
+
+
+LIMITERS = {
+    "groq": RateLimiter("groq", GROQ_RPM, GROQ_TPM),
+    "pexels": RateLimiter("pexels", PEXELS_RPM),
+    "youtube": RateLimiter("youtube", YOUTUBE_RPM),
+}
+
+
+def observe_headers(provider: str) -> Callable[[httpx.Response], Awaitable[None]]:
+    """httpx response event hook that reports headers to `provider`'s limiter."""
+    limiter = LIMITERS[provider]
+
+    async def hook(response: httpx.Response) -> None:
+        limiter.observe(response.headers)
+
+    return hook
@@ -1,59 +1,21 @@
-import json
-import re
-import ast
-import os
-from groq import Groq
-from config import GROQ_API_KEY, GROQ_MODEL
-
-
-def _extract_json_like(text: str) -> str:
-    if not isinstance(text, str):
-        text = str(text)
-
-    # fenced json
-    m = re.search(r"```(?:json)?\s*(.*?)\s*```", text, flags=re.S | re.I)
-    if m:
-        return m.group(1).strip()
-
-    # remove inline code
-    text = re.sub(r"`([^`]*)`", r"\1", text)
-
-    start = text.find("{")
-    end = text.rfind("}")
-    if start != -1 and end != -1 and end > start:
-        return text[start : end + 1]
-
-    return text
-
-
-def _find_balanced_json(text: str) -> str | None:
-    start = text.find("{")
-    if start == -1:
-        return None
-
-    depth = 0
-    for i in range(start, len(text)):
-        if text[i] == "{":
-            depth += 1
-        elif text[i] == "}":
-            depth -= 1
-            if depth == 0:
-                return text[start : i + 1]
-    return None
-
+import asyncio
+from typing import AsyncIterator
+from utils.llm_client import cut_off, get_llm_client, llm_error
+from utils.model_router import ROUTES, routed_completion, routed_stream
+from utils.llm_cache import make_cache_key, get_cached_response, set_cached_response
+import logging
+from utils.logger import truncate
+from utils.json_stream import JSONStreamParser, parse_json_object
+from utils.metrics import timed, PARSE_FALLBACKS
+from utils.structured_output import conforms, json_mode, validated
+from models.generation_model import SectionContent, SectionMcqs
 
-def _clean_json_text(s: str) -> str:
-    s = s.strip()
-    s = re.sub(r",\s*([}\]])", r"\1", s)
-    return s
+logger = logging.getLogger(__name__)
 
 
-async def infer_section_content(section_title: str, course_title: str) -> dict:
-    print(f"\n=== infer_section_content called ===")
-    print(f"Section title: {section_title}")
-    print(f"Course title: {course_title}")
+SECTION_TEMPERATURE = 0.2
 
-    prompt = f"""
+SECTION_PROMPT_TEMPLATE = """
         You are an expert course author having lot of experience in creating technical courses.
         Generate **one section** content of a technical course.
         place the below placeholders in the content where relevant media or headings or MCQs should appear.
@@ -62,17 +24,16 @@ async def infer_section_content(section_title: str, course_title: str) -> dict:
                 __ytvid1__, __ytvid2__
                 __h1_1__, __h1_2__
                 __h2_1__, __h2_2__
-                __mcq1__, __mcq2__
+                __mcq1__, __mcq2__, __mcq3__
         CRITICAL OUTPUT RULES:
         - DO NOT generate URLs
         - DO NOT generate image/video links
         - USE PLACEHOLDERS ONLY
 
     
-        You must return VALID JSON in the structure below.
+        You must return VALID JSON in the structure below, keeping the keys in the order shown.
 
         {{
-        "text": "Long-form educational text only related to the section title in the course. Headings must appear ONLY via placeholders. Example: __h1_1__ Explanation... __image1__ More explanation... __h2_1__ __ytvid1__ __mcq1__",
         "image_queries": {{
             "1": "search query describing the related image to the section content",
             "2": "optional second image query",
@@ -83,6 +44,7 @@ async def infer_section_content(section_title: str, course_title: str) -> dict:
             "2": "optional second video query",
             ...
         }},
+        "text": "Long-form educational text only related to the section title in the course. Headings must appear ONLY via placeholders. Example: __h1_1__ Explanation... __image1__ More explanation... __h2_1__ __ytvid1__ __mcq1__",
         "headings": {{
             "h1": {{
             "1": "Main conceptual heading",
@@ -94,73 +56,345 @@ async def infer_section_content(section_title: str, course_title: str) -> dict:
             "2": "Subheading for second concept",
             ...
             }}
-        }},
+        }}
+        }}
+
+        for images and youtube videos, provide specific SEARCH QUERIES only that can be used to find relevant media.    
+        The text content should atleast be 500 words long and highly relevant to the section title and course title.
+        Place __mcq1__, __mcq2__ and __mcq3__ where a quiz question fits; the questions themselves are written separately.
+        atleast 2 images related to section and 2 youtube video queries must be provided (placeholders must be used in text accordingly).
+        heading placeholders must be used in text accordingly.
+        Course Title: "{course_title}"
+        Section Title: "{section_title}"
+
+        Generate ONLY the JSON. No markdown, no extra text.
+        """
+
+MCQ_TEMPERATURE = 0.2
+
+MCQ_PROMPT_TEMPLATE = """
+        You are an expert course author writing multiple-choice questions for one section of a technical course.
+        Write exactly 3 questions that intermediate to advanced learners can solve, in the order they should appear in the section.
+
+        You must return VALID JSON in the structure below.
+
+        {{
         "mcqs": [
             {{
             "question": "Clear test question",
             "options": ["A", "B", "C", "D"],
-            "answer": "Correct option"
+            "answer": "Correct option, copied exactly from options"
             }},
             ...
         ]
         }}
 
-        for images and youtube videos, provide specific SEARCH QUERIES only that can be used to find relevant media.    
-        The text content should atleast be 500 words long and highly relevant to the section title and course title.
-        Atleast 3 mcqs must be provided which intermediate to advanced learners can solve.
-        atleast 2 images related to section and 2 youtube video queries must be provided (placeholders must be used in text accordingly).
-        heading placeholders must be used in text accordingly.
         Course Title: "{course_title}"
         Section Title: "{section_title}"
 
         Generate ONLY the JSON. No markdown, no extra text.
         """
 
-    api_key = GROQ_API_KEY
-    print(f"GROQ_API_KEY present: {bool(api_key)}")
-    if not api_key:
+
+def _repair_context(section_title: str, course_title: str, what: str) -> str:
+    return (
+        f'The JSON holds {what} for the section "{section_title}" '
+        f'of the course "{course_title}".'
+    )
+
+
+async def _generate_section_content(prompt: str, context: str) -> dict:
+    client = get_llm_client()
+    if client is None:
         return {"error": "Missing GROQ_API_KEY"}
 
-    client = Groq(api_key=api_key)
+    try:
+        with timed("llm.section"):
+            chat = await routed_completion(
+                client,
+                "section",
+                messages=[
+                    {"role": "system", "content": "Return strictly valid JSON only."},
+                    {"role": "user", "content": prompt},
+                ],
+                temperature=SECTION_TEMPERATURE,
+                **json_mode(),
+            )
+        raw = chat.choices[0].message.content
+    except Exception as e:
+        return llm_error(e)
+
+    with timed("parse.section"):
+        section_data = _parse_section_content(raw, cut_off(chat))
+    if "error" in section_data:
+        return section_data
+    return await validated("section", SectionContent, section_data, context)
+
+
+def _parse_section_content(raw: str, truncated: bool = False) -> dict:
+    parsed, repaired = parse_json_object(raw or "")
+    return _checked_section_content(parsed, repaired, raw, truncated)
 
+
+def _checked_section_content(
+    parsed: dict | None, repaired: bool, raw: str, truncated: bool = False
+) -> dict:
+    if truncated:
+        # closing a cut-off output would pass off half a section as complete
+        PARSE_FALLBACKS.labels("section", "truncated").inc()
+        logger.warning("Section output was cut off: %s", truncate(repr(raw)))
+        return {"error": "Model output was cut off", "raw": raw}
+
+    if parsed is None:
+        PARSE_FALLBACKS.labels("section", "failed").inc()
+        logger.debug("Raw LLM section response: %s", truncate(raw))
+        return {"error": "Failed to parse model output", "raw": raw}
+
+    if repaired:
+        PARSE_FALLBACKS.labels("section", "repaired").inc()
+        logger.debug("Raw LLM section response: %s", truncate(raw))
+    return parsed
+
+
+async def _generate_mcqs(section_title: str, course_title: str) -> dict:
+    """The section's MCQs, from their own (smaller) model: {"mcqs": [...]}."""
+    client = get_llm_client()
+    if client is None:
+        return {"error": "Missing GROQ_API_KEY"}
+
+    prompt = MCQ_PROMPT_TEMPLATE.format(
+        course_title=course_title, section_title=section_title
+    )
     try:
-        model = GROQ_MODEL
-        chat = client.chat.completions.create(
-            model=model,
-            messages=[
-                {"role": "system", "content": "Return strictly valid JSON only."},
-                {"role": "user", "content": prompt},
-            ],
-            temperature=0.2,
-        )
+        with timed("llm.mcqs"):
+            chat = await routed_completion(
+                client,
+                "mcqs",
+                messages=[
+                    {"role": "system", "content": "Return strictly valid JSON only."},
+                    {"role": "user", "content": prompt},
+                ],
+                temperature=MCQ_TEMPERATURE,
+                **json_mode(),
+            )
         raw = chat.choices[0].message.content
     except Exception as e:
-        return {"error": "Groq request failed", "detail": str(e)}
+        return llm_error(e)
+
+    if cut_off(chat):
+        PARSE_FALLBACKS.labels("mcqs", "truncated").inc()
+        logger.warning("MCQ output was cut off: %s", truncate(repr(raw)))
+        return {"error": "Model output was cut off", "raw": raw}
+    with timed("parse.mcqs"):
+        parsed, repaired = parse_json_object(raw or "")
+    if parsed is None:
+        PARSE_FALLBACKS.labels("mcqs", "failed").inc()
+        logger.debug("Raw LLM mcq response: %s", truncate(raw))
+        return {"error": "Failed to parse model output", "raw": raw}
+    if repaired:
+        PARSE_FALLBACKS.labels("mcqs", "repaired").inc()
+
+    mcq_data = await validated(
+        "mcqs",
+        SectionMcqs,
+        parsed,
+        _repair_context(section_title, course_title, "multiple-choice questions"),
+    )
+    if "error" not in mcq_data and not isinstance(mcq_data.get("mcqs"), list):
+        return {"error": "Model output has no mcqs list", "raw": raw}
+    return mcq_data
+
+
+def _with_mcqs(section_data: dict, mcq_data: dict) -> dict:
+    """
+    Merge the MCQ call's result into the section. A failed MCQ call fails the
+    section (the error dict is returned): a section is persisted once, so
+    saving it without its quiz would lose the quiz for good.
+    """
+    if "error" in mcq_data:
+        logger.warning("MCQ generation failed: %s", mcq_data["error"])
+        return mcq_data
+    section_data["mcqs"] = mcq_data["mcqs"]
+    return section_data
+
+
+def _mcq_events(mcqs: list):
+    for index, mcq in enumerate(mcqs or []):
+        if isinstance(mcq, dict):
+            yield "mcq", {"index": index, **mcq}
+
+
+def _section_prompt_and_key(section_title: str, course_title: str) -> tuple[str, str]:
+    prompt = SECTION_PROMPT_TEMPLATE.format(
+        course_title=course_title, section_title=section_title
+    )
+    cache_key = make_cache_key(
+        "section",
+        f"{ROUTES['section'].models}+{ROUTES['mcqs'].models}",
+        SECTION_PROMPT_TEMPLATE + MCQ_PROMPT_TEMPLATE,
+        SECTION_TEMPERATURE,
+        course_title=course_title,
+        section_title=section_title,
+    )
+    return prompt, cache_key
+
+
+async def infer_section_content(
+    section_title: str, course_title: str, use_cache: bool = True
+) -> dict:
+    logger.debug(
+        "infer_section_content section=%r course=%r", section_title, course_title
+    )
 
+    prompt, cache_key = _section_prompt_and_key(section_title, course_title)
+    if use_cache:
+        cached = await get_cached_response(cache_key)
+        if cached is not None and conforms(SectionContent, cached):
+            logger.info("LLM cache hit for section %r", section_title)
+            return cached
+
+    # the MCQs come from their own call, run alongside the section body
+    section_data, mcq_data = await asyncio.gather(
+        _generate_section_content(
+            prompt, _repair_context(section_title, course_title, "the content")
+        ),
+        _generate_mcqs(section_title, course_title),
+    )
+    if not isinstance(section_data, dict) or "error" in section_data:
+        return section_data
+    section_data = _with_mcqs(section_data, mcq_data)
+    if "error" not in section_data:
+        await set_cached_response(cache_key, section_data)
+    return section_data
+
+
+_QUERY_KINDS = {"image_queries": "image", "ytvid_queries": "video"}
+
+
+def _section_event(path: tuple, value) -> tuple[str, dict] | None:
+    """Event for a completed value of the section JSON, if it warrants one."""
+    if len(path) == 2 and path[0] in _QUERY_KINDS and isinstance(value, str):
+        return "media_query", {
+            "kind": _QUERY_KINDS[path[0]],
+            "key": str(path[1]),
+            "query": value,
+        }
+    if len(path) == 3 and path[0] == "headings" and isinstance(value, str):
+        return "heading", {"level": path[1], "key": str(path[2]), "text": value}
+    return None
+
+
+def _content_events(section_data: dict):
+    """The events a stream would have produced, for already-complete content."""
+    for field, kind in _QUERY_KINDS.items():
+        for key, query in (section_data.get(field) or {}).items():
+            if isinstance(query, str):
+                yield "media_query", {"kind": kind, "key": str(key), "query": query}
+    if section_data.get("text"):
+        yield "text", {"delta": section_data["text"]}
+    for level, items in (section_data.get("headings") or {}).items():
+        if isinstance(items, dict):
+            for key, heading in items.items():
+                yield "heading", {"level": level, "key": str(key), "text": heading}
+    yield from _mcq_events(section_data.get("mcqs"))
+
+
+async def stream_section_content(
+    section_title: str, course_title: str, use_cache: bool = True
+) -> AsyncIterator[tuple[str, dict]]:
+    """
+    Stream the section completion as ("media_query" | "text" | "heading" |
+    "mcq", data) events while it is generated, ending with ("content", section_data) or
+    ("error", error_dict). Results are cached exactly like
+    infer_section_content. The final content is schema-validated, so fields
+    repaired after streaming can differ from what the events announced.
+    """
+    logger.debug(
+        "stream_section_content section=%r course=%r", section_title, course_title
+    )
+
+    prompt, cache_key = _section_prompt_and_key(section_title, course_title)
+    if use_cache:
+        cached = await get_cached_response(cache_key)
+        if cached is not None and conforms(SectionContent, cached):
+            logger.info("LLM cache hit for section %r", section_title)
+            for event in _content_events(cached):
+                yield event
+            yield "content", cached
+            return
+
+    client = get_llm_client()
+    if client is None:
+        yield "error", {"error": "Missing GROQ_API_KEY"}
+        return
+
+    # the MCQs come from their own call; their events go out once it returns
+    mcq_task = asyncio.create_task(_generate_mcqs(section_title, course_title))
+    mcqs_sent = False
+    completed = []
+    parser = JSONStreamParser(on_value=lambda path, value: completed.append((path, value)))
+    raw_parts = []
+    text_sent = 0
     try:
-        return json.loads(raw)
-    except Exception:
-        pass
-    print("Raw LLM Section Response:", raw)
-
-    balanced = _find_balanced_json(raw)
-    if balanced:
-        try:
-            return json.loads(_clean_json_text(balanced))
-        except Exception:
-            try:
-                return ast.literal_eval(_clean_json_text(balanced))
-            except Exception:
-                pass
-
-    candidate = _extract_json_like(raw)
-    if candidate:
-        try:
-            return json.loads(_clean_json_text(candidate))
-        except Exception:
-            try:
-                return ast.literal_eval(_clean_json_text(candidate))
-            except Exception:
-                pass
-
-    return {"error": "Failed to parse model output", "raw": raw}
+        async with timed("llm.section"):
+            async for delta in routed_stream(
+                client,
+                "section",
+                messages=[
+                    {"role": "system", "content": "Return strictly valid JSON only."},
+                    {"role": "user", "content": prompt},
+                ],
+                temperature=SECTION_TEMPERATURE,
+            ):
+                raw_parts.append(delta)
+                parser.feed(delta)
+
+                if parser.path == ("text",):
+                    piece = parser.string_delta()
+                    if piece:
+                        text_sent += len(piece)
+                        yield "text", {"delta": piece}
+                for path, value in completed:
+                    if path == ("text",) and isinstance(value, str):
+                        if len(value) > text_sent:
+                            yield "text", {"delta": value[text_sent:]}
+                            text_sent = len(value)
+                        continue
+                    event = _section_event(path, value)
+                    if event:
+                        yield event
+                completed.clear()
+                if not mcqs_sent and mcq_task.done():
+                    mcqs_sent = True
+                    for event in _mcq_events(mcq_task.result().get("mcqs")):
+                        yield event
+
+        section_data = _checked_section_content(
+            parser.close(), parser.repaired, "".join(raw_parts), parser.truncated
+        )
+        if "error" not in section_data:
+            section_data = await validated(
+                "section",
+                SectionContent,
+                section_data,
+                _repair_context(section_title, course_title, "the content"),
+            )
+        if "error" in section_data:
+            yield "error", section_data
+            return
+        mcq_data = await mcq_task
+    except Exception as e:
+        yield "error", llm_error(e)
+        return
+    finally:
+        mcq_task.cancel()
+
+    section_data = _with_mcqs(section_data, mcq_data)
+    if "error" in section_data:
+        yield "error", section_data
+        return
+    if not mcqs_sent:
+        for event in _mcq_events(section_data["mcqs"]):
+            yield event
+    await set_cached_response(cache_key, section_data)
+    yield "content", section_data
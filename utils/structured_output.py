@@ -0,0 +1,183 @@
+"""
+Schema-validated LLM output.
+
+With STRUCTURED_OUTPUT on, whole-completion calls ask the provider for a
+JSON object (`json_mode()`), and every parsed output goes through
+`validated()`: it is checked against its Pydantic schema
+(models/generation_model.py), and only the top-level fields that failed are
+asked for again, in a small repair prompt on the "repair" route, instead of
+regenerating the whole output. Fields still invalid after
+STRUCTURED_REPAIR_ATTEMPTS fail the output. Every invalid field is counted
+in coursegen_llm_schema_repairs_total with whether the repair fixed it.
+"""
+
+import json
+import logging
+from typing import Type
+from pydantic import BaseModel, ValidationError
+from config import STRUCTURED_OUTPUT, STRUCTURED_REPAIR_ATTEMPTS
+from utils.llm_client import cut_off, get_llm_client, llm_error
+from utils.model_router import routed_completion
+from utils.json_stream import parse_json_object
+from utils.logger import truncate
+from utils.metrics import timed, SCHEMA_REPAIRS
+
+logger = logging.getLogger(__name__)
+
+REPAIR_TEMPERATURE = 0.2
+
+# current values are quoted so small mistakes get fixed rather than rewritten
+_MAX_QUOTED_CHARS = 1500
+
+REPAIR_PROMPT_TEMPLATE = """
+        Some fields of a JSON object you generated are missing or invalid.
+        {context}
+
+        Problems:
+        {problems}
+
+        Current values:
+        {current}
+
+        Return a JSON object with ONLY the keys {fields}, fixed so that it
+        matches this JSON schema:
+        {schema}
+
+        Generate ONLY the JSON. No markdown, no extra text.
+        """
+
+
+def json_mode() -> dict:
+    """Extra completion params requesting a JSON object, when enabled."""
+    if not STRUCTURED_OUTPUT:
+        return {}
+    return {"response_format": {"type": "json_object"}}
+
+
+def invalid_fields(schema: Type[BaseModel], data: dict) -> dict[str, list[str]]:
+    """The top-level fields of `data` that fail `schema`, with their errors."""
+    try:
+        schema.model_validate(data)
+    except ValidationError as e:
+        errors: dict[str, list[str]] = {}
+        for error in e.errors():
+            if not error["loc"]:
+                continue
+            field, *where = error["loc"]
+            where = ".".join(str(part) for part in where)
+            message = f"{where}: {error['msg']}" if where else error["msg"]
+            errors.setdefault(str(field), []).append(message)
+        return errors
+    return {}
+
+
+def conforms(schema: Type[BaseModel], data: dict) -> bool:
+    """Whether `data` passes `schema`; always True without STRUCTURED_OUTPUT."""
+    return not STRUCTURED_OUTPUT or not invalid_fields(schema, data)
+
+
+def _repair_prompt(
+    schema: Type[BaseModel], data: dict, errors: dict[str, list[str]], context: str
+) -> str:
+    full = schema.model_json_schema()
+    subset = {
+        "type": "object",
+        "properties": {field: full["properties"][field] for field in errors},
+        "required": list(errors),
+    }
+    if "$defs" in full:
+        subset["$defs"] = full["$defs"]
+    problems = "\n        ".join(
+        f"- {field}: {'; '.join(messages)}" for field, messages in errors.items()
+    )
+    current = "\n        ".join(
+        f"- {field}: {json.dumps(data[field])[:_MAX_QUOTED_CHARS]}"
+        if field in data
+        else f"- {field}: (missing)"
+        for field in errors
+    )
+    return REPAIR_PROMPT_TEMPLATE.format(
+        context=context,
+        problems=problems,
+        current=current,
+        fields=", ".join(errors),
+        schema=json.dumps(subset),
+    )
+
+
+async def _repair(
+    schema: Type[BaseModel], data: dict, errors: dict[str, list[str]], context: str
+) -> dict:
+    """New values for the invalid fields, from one repair call."""
+    client = get_llm_client()
+    if client is None:
+        return {"error": "Missing GROQ_API_KEY"}
+
+    prompt = _repair_prompt(schema, data, errors, context)
+    try:
+        with timed("llm.repair"):
+            chat = await routed_completion(
+                client,
+                "repair",
+                messages=[
+                    {"role": "system", "content": "Return strictly valid JSON only."},
+                    {"role": "user", "content": prompt},
+                ],
+                temperature=REPAIR_TEMPERATURE,
+                **json_mode(),
+            )
+        raw = chat.choices[0].message.content
+    except Exception as e:
+        return llm_error(e)
+
+    if cut_off(chat):
+        return {"error": "Model output was cut off", "raw": raw}
+    parsed, _ = parse_json_object(raw or "")
+    if parsed is None:
+        logger.debug("Raw LLM repair response: %s", truncate(raw))
+        return {"error": "Failed to parse model output", "raw": raw}
+    return {field: parsed[field] for field in errors if field in parsed}
+
+
+async def validated(
+    stage: str, schema: Type[BaseModel], data: dict, context: str
+) -> dict:
+    """
+    `data` normalised to `schema`, re-prompting (with `context` describing
+    what was generated) for the fields that fail it; an error dict listing
+    the fields that stayed invalid. Without STRUCTURED_OUTPUT, `data` as is.
+    """
+    if not STRUCTURED_OUTPUT:
+        return data
+
+    errors = invalid_fields(schema, data)
+    attempt = 0
+    while errors and attempt < STRUCTURED_REPAIR_ATTEMPTS:
+        attempt += 1
+        logger.info(
+            "%s output has invalid fields %s, repair %d/%d",
+            stage,
+            ", ".join(errors),
+            attempt,
+            STRUCTURED_REPAIR_ATTEMPTS,
+        )
+        fixed = await _repair(schema, data, errors, context)
+        if "error" in fixed:
+            logger.warning("%s repair failed: %s", stage, fixed["error"])
+            break
+        data = {**data, **fixed}
+        still_invalid = invalid_fields(schema, data)
+        for field in errors:
+            if field not in still_invalid:
+                SCHEMA_REPAIRS.labels(stage, field, "repaired").inc()
+        errors = still_invalid
+
+    if errors:
+        for field in errors:
+            SCHEMA_REPAIRS.labels(stage, field, "failed").inc()
+        logger.warning("%s output failed schema validation: %s", stage, errors)
+        return {
+            "error": "Model output failed schema validation",
+            "invalid_fields": errors,
+        }
+    return schema.model_validate(data).model_dump()
@@ -0,0 +1,105 @@
+"""
+Query-plan regression check.
+
+Applies the index registry, then runs explain() on every query shape the
+services issue and fails if any winning plan contains a COLLSCAN.
+Requires a reachable MongoDB (MONGO_URL / DB_NAME, same as the app).
+"""
+
+import asyncio
+from datetime import datetime, timezone
+from bson import ObjectId
+from db.connect import db
+from db.indexes import apply_indexes
+
+# (description, collection, filter, sort) for each service query
+QUERY_SHAPES = [
+    ("user_service.get_user_by_id", "users", {"_id": ObjectId()}, None),
+    ("user_service.get_user_by_email", "users", {"email": "x@example.com"}, None),
+    ("user_service.get_user_by_username", "users", {"username": "x"}, None),
+    (
+        "course_service.get_user_courses",
+        "courses",
+        {"user_id": ObjectId()},
+        [("created_at", -1), ("_id", -1)],
+    ),
+    ("course_router.get_course", "courses", {"_id": ObjectId()}, None),
+    ("course_router.delete_course", "sections", {"course_id": ObjectId()}, None),
+    ("section_service.get_section", "sections", {"_id": ObjectId()}, None),
+    (
+        "job_service.claim_job (queued)",
+        "jobs",
+        {"status": "queued", "run_after": {"$lte": datetime.now(timezone.utc)}},
+        [("run_after", 1)],
+    ),
+    (
+        "job_service.claim_job (stale lease)",
+        "jobs",
+        {"status": "running", "lease.expires_at": {"$lt": datetime.now(timezone.utc)}},
+        [("lease.expires_at", 1)],
+    ),
+    ("job_service.get_job", "jobs", {"_id": ObjectId()}, None),
+    ("batch_service.get_batch", "course_batches", {"_id": ObjectId()}, None),
+    ("media_cache.get_cached", "media_cache", {"_id": "pexels:1:x"}, None),
+    ("llm_cache.get_cached_response", "llm_cache", {"_id": "0" * 64}, None),
+]
+
+
+def find_stages(plan: dict) -> list[str]:
+    """Collect every stage name in a (possibly nested) plan tree."""
+    stages = []
+    if not isinstance(plan, dict):
+        return stages
+    if "stage" in plan:
+        stages.append(plan["stage"])
+    for key in ("inputStage", "queryPlan"):
+        if key in plan:
+            stages.extend(find_stages(plan[key]))
+    for child in plan.get("inputStages", []):
+        stages.extend(find_stages(child))
+    for shard in plan.get("shards", []):
+        stages.extend(find_stages(shard.get("winningPlan", {})))
+    return stages
+
+
+async def check_plans() -> list[str]:
+    # Collections must exist for explain() to report a real plan
+    existing = set(await db.list_collection_names())
+    for _, name, _, _ in QUERY_SHAPES:
+        if name not in existing:
+            await db.create_collection(name)
+            existing.add(name)
+
+    failures = await apply_indexes(db)
+
+    for description, name, query, sort in QUERY_SHAPES:
+        cursor = db.get_collection(name).find(query)
+        if sort:
+            cursor = cursor.sort(sort)
+        explain = await cursor.explain()
+        winning = explain.get("queryPlanner", {}).get("winningPlan", {})
+        stages = find_stages(winning)
+        status = "COLLSCAN" if "COLLSCAN" in stages else "ok"
+        print(f"  {status:8} {description}: {' <- '.join(stages)}")
+        if status != "ok":
+            failures.append(f"{description} uses COLLSCAN")
+    return failures
+
+
+def main():
+    print("=" * 80)
+    print("Index / Query Plan Verification")
+    print("=" * 80)
+    failures = asyncio.run(check_plans())
+    print()
+    if failures:
+        print(f"❌ Problems found: {len(failures)}")
+        for failure in failures:
+            print(f"   {failure}")
+        return 1
+    print("✅ All service queries are index-backed")
+    return 0
+
+
+if __name__ == "__main__":
+    exit(main())
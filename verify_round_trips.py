@@ -0,0 +1,125 @@
+"""
+Round-trip regression check for course persistence.
+
+Runs course_service._persist_course against a counting fake database for
+courses of 1, 10 and 50 sections, with and without the transaction path,
+and fails if the number of database round trips depends on the section
+count. Needs no MongoDB.
+"""
+
+import asyncio
+from bson import ObjectId
+from services import course_service
+
+SECTION_COUNTS = (1, 10, 50)
+
+# insert_many + insert_one, plus commitTransaction on the transaction path
+EXPECTED = {False: 2, True: 3}
+
+
+class CountingCollection:
+    def __init__(self, calls: list):
+        self.calls = calls
+
+    async def insert_many(self, documents, ordered=True, session=None):
+        self.calls.append(f"insert_many({len(documents)})")
+
+    async def insert_one(self, document, session=None):
+        self.calls.append("insert_one")
+
+
+class CountingTransaction:
+    def __init__(self, calls: list):
+        self.calls = calls
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, *exc):
+        outcome = "commitTransaction" if exc_type is None else "abortTransaction"
+        self.calls.append(outcome)
+
+
+class CountingSession:
+    def __init__(self, calls: list):
+        self.calls = calls
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        pass
+
+    def start_transaction(self):
+        # startTransaction itself is sent with the first operation
+        return CountingTransaction(self.calls)
+
+
+class CountingClient:
+    def __init__(self, calls: list):
+        self.calls = calls
+
+    async def start_session(self):
+        return CountingSession(self.calls)
+
+
+class CountingDatabase:
+    def __init__(self):
+        self.calls: list[str] = []
+        self.client = CountingClient(self.calls)
+
+    def get_collection(self, name: str):
+        return CountingCollection(self.calls)
+
+
+async def count_round_trips(sections: int, transactions: bool) -> list[str]:
+    async def supports_transactions():
+        return transactions
+
+    course_service.supports_transactions = supports_transactions
+    course_id = ObjectId()
+    section_docs = [
+        {"_id": ObjectId(), "course_id": course_id, "title": f"Section {i}", "order": i}
+        for i in range(sections)
+    ]
+    database = CountingDatabase()
+    await course_service._persist_course(database, section_docs, {"_id": course_id})
+    return database.calls
+
+
+async def check_round_trips() -> list[str]:
+    failures = []
+    for transactions in (False, True):
+        path = "transaction" if transactions else "no transaction"
+        for sections in SECTION_COUNTS:
+            calls = await count_round_trips(sections, transactions)
+            status = "ok" if len(calls) == EXPECTED[transactions] else "FAIL"
+            print(
+                f"  {status:8} {path}, {sections:3} sections: "
+                f"{len(calls)} round trips ({', '.join(calls)})"
+            )
+            if status != "ok":
+                failures.append(
+                    f"{path} with {sections} sections took {len(calls)} round trips, "
+                    f"expected {EXPECTED[transactions]}"
+                )
+    return failures
+
+
+def main():
+    print("=" * 80)
+    print("Course Persistence Round-Trip Verification")
+    print("=" * 80)
+    failures = asyncio.run(check_round_trips())
+    print()
+    if failures:
+        print(f"❌ Problems found: {len(failures)}")
+        for failure in failures:
+            print(f"   {failure}")
+        return 1
+    print("✅ Course persistence takes a constant number of round trips")
+    return 0
+
+
+if __name__ == "__main__":
+    exit(main())
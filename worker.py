@@ -0,0 +1,89 @@
+"""
+Generation worker: claims jobs from the `jobs` collection and runs them.
+
+    python worker.py [--concurrency N]
+
+Run as many workers as needed. Claims are atomic, so a job never runs twice
+concurrently, and a crashed worker's jobs are picked up again once their
+lease expires. SIGINT/SIGTERM stop new claims and let running jobs finish.
+"""
+
+import argparse
+import asyncio
+import logging
+import os
+import signal
+import socket
+from config import BACKGROUND_DRAIN_SECONDS, JOB_POLL_SECONDS, JOB_WORKER_CONCURRENCY
+from db.connect import db
+from db.indexes import apply_indexes
+from services.job_service import claim_job, run_job
+from utils.llm_client import close_llm_client
+from utils.media_fetcher import close_http_client
+from utils.background import drain as drain_background
+from utils.logger import configure_logging, shutdown_logging, start_request_context
+
+configure_logging()
+logger = logging.getLogger("worker")
+
+
+async def work(worker_id: str, stop: asyncio.Event) -> None:
+    while not stop.is_set():
+        try:
+            job = await claim_job(db, worker_id)
+        except Exception as e:
+            logger.error("Claiming a job failed: %s", e)
+            job = None
+
+        if job is None:
+            try:
+                await asyncio.wait_for(stop.wait(), JOB_POLL_SECONDS)
+            except asyncio.TimeoutError:
+                pass
+            continue
+
+        # tag every log line of this job with its id
+        start_request_context(str(job["_id"]))
+        logger.info(
+            "%s running %s job %s (attempt %d/%d)",
+            worker_id,
+            job["kind"],
+            job["_id"],
+            job["attempts"],
+            job["max_attempts"],
+        )
+        status = await run_job(job, db)
+        logger.info("Job %s finished: %s", job["_id"], status)
+
+
+async def run(concurrency: int) -> None:
+    failures = await apply_indexes(db)
+    if failures:
+        logger.error("Index bootstrap failed: %s", failures)
+
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, stop.set)
+
+    base = f"{socket.gethostname()}:{os.getpid()}"
+    logger.info("Worker %s started with %d slots", base, concurrency)
+    try:
+        await asyncio.gather(*(work(f"{base}:{i}", stop) for i in range(concurrency)))
+    finally:
+        await drain_background(BACKGROUND_DRAIN_SECONDS)
+        await close_llm_client()
+        await close_http_client()
+        logger.info("Worker %s stopped", base)
+        shutdown_logging()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--concurrency", type=int, default=JOB_WORKER_CONCURRENCY)
+    args = parser.parse_args()
+    asyncio.run(run(args.concurrency))
+
+
+if __name__ == "__main__":
+    main()